@@ -0,0 +1,15 @@
+"""
+    Performance benchmarks of the database queries behind the views and reports.
+
+    - `benchmarks.synthetic_ledger`: Fills a database with a reproducible synthetic ledger.
+    - `benchmarks.suite`: The benchmarks, registered with the `@benchmark` decorator.
+    - `benchmarks.run`: Runs the suite against a synthetic ledger and writes the timings as JSON.
+    - `benchmarks.pragmas`: Compares the SQLite profiles of `database.pragmas` (inserts and reports).
+    - `benchmarks.startup`: Measures the cold start of the application (import and first frame).
+
+    Usage (from `src`):
+
+        python -m benchmarks.run --transactions 100000 --output results.json
+        python -m benchmarks.run --transactions 100000 --baseline results.json
+        python -m benchmarks.startup --repeat 10 --target 0.5
+"""
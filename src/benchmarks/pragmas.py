@@ -0,0 +1,97 @@
+"""
+    Compare the SQLite profiles of `database.pragmas`. For each profile, a new synthetic ledger is generated, and:
+
+    - inserts: Transactions are inserted with one commit each, through the ORM (as the transaction form does).
+    - reports: The benchmarks of `benchmarks.suite` are run (see `benchmarks.run`).
+
+    Usage (from `src`):
+
+        python -m benchmarks.pragmas --transactions 50000 --inserts 1000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+from benchmarks.run import run_benchmarks
+from benchmarks.synthetic_ledger import LEDGER_END, LedgerSize, generate_ledger
+from database.models import Transaction
+from database.pragmas import PRAGMA_PROFILES
+from database.sqlite_handler import close_database, open_database
+from decimal import Decimal
+
+
+def time_inserts(engine: Engine, count: int, accounts: int) -> dict:
+    """ Insert `count` transactions, each one in its own session and commit. """
+    start = time.perf_counter()
+    for index in range(count):
+        with Session(engine) as session:
+            session.add(Transaction(
+                timestamp=LEDGER_END + index,
+                description=f"Insert {index + 1}",
+                installment_number=1,
+                installment_total=1,
+                debit_reference='',
+                debit_account_id=index % accounts + 1,
+                debit_amount=Decimal('10.00'),
+                credit_reference='',
+                credit_account_id=(index + 1) % accounts + 1,
+                credit_amount=Decimal('10.00'),
+                is_reconciled=False,
+            ))
+            session.commit()
+    seconds = time.perf_counter() - start
+    return {'count': count, 'seconds': seconds, 'per_second': count / seconds if seconds else None}
+
+
+def run_profile(profile: str, size: LedgerSize, inserts: int, repeat: int, names: list[str], directory: str) -> dict:
+    engine = open_database(os.path.join(directory, f'{profile}.db'), profile=profile)
+    try:
+        start = time.perf_counter()
+        generate_ledger(engine, size=size)
+        return {
+            'generate_seconds': time.perf_counter() - start,
+            'inserts': time_inserts(engine, count=inserts, accounts=size.accounts),
+            'reports': run_benchmarks(engine, repeat=repeat, names=names),
+        }
+    finally:
+        close_database()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare the SQLite profiles on a synthetic ledger.")
+    parser.add_argument('--profiles', nargs='*', choices=PRAGMA_PROFILES, default=list(PRAGMA_PROFILES))
+    parser.add_argument('--transactions', type=int, default=LedgerSize.transactions)
+    parser.add_argument('--accounts', type=int, default=LedgerSize.accounts)
+    parser.add_argument('--inserts', type=int, default=500, help="The number of transactions inserted one by one")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filter', nargs='*', help="Run only the reports whose name contains any of these strings")
+    parser.add_argument('--output', help="Also write the results as JSON to this path")
+    args = parser.parse_args()
+
+    size = LedgerSize(accounts=args.accounts, transactions=args.transactions)
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            profile: run_profile(profile, size, args.inserts, args.repeat, args.filter, directory)
+            for profile in args.profiles
+        }
+
+    print(f"{'':<55}" + ''.join(f"{profile:>14}" for profile in results))
+    print(f"{'generate ledger (s)':<55}" + ''.join(f"{result['generate_seconds']:>14.2f}" for result in results.values()))
+    print(f"{'inserts (per second)':<55}" + ''.join(f"{result['inserts']['per_second']:>14.0f}" for result in results.values()))
+    for name in next(iter(results.values()))['reports']:
+        print(f"{name + ' (ms)':<55}" + ''.join(
+            f"{result['reports'][name]['median'] * 1000:>14.2f}" for result in results.values()
+        ))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(json.dumps({'ledger': size.to_dict(), 'results': results}, indent=2) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+    Run the benchmarks of `benchmarks.suite` against a synthetic ledger, and write the results as JSON.
+
+    The JSON has the environment (commit, versions), the ledger size and, for each benchmark, the timings in seconds.
+    With `--baseline`, the medians are compared with a previous result, and the exit code is 1 if any benchmark
+    is slower than `--threshold` times its baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import sqlalchemy
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+from benchmarks.suite import BENCHMARKS
+from benchmarks.synthetic_ledger import LedgerSize, generate_ledger
+from database.pragmas import PRAGMA_PROFILES
+from database.sqlite_handler import close_database, open_database
+from config import SQLITE_PROFILE, logger
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_benchmark(engine: Engine, func: callable, repeat: int) -> dict:
+    """ Run the benchmark once to warm up the caches, and then `repeat` times, each one with a new session. """
+    with Session(engine) as session:
+        result = func(session)
+
+    timings = []
+    for _ in range(repeat):
+        with Session(engine) as session:
+            start = time.perf_counter()
+            func(session)
+            timings.append(time.perf_counter() - start)
+
+    if isinstance(result, tuple):
+        # e.g. the (groups, accounts) of the chart of accounts
+        rows = sum(len(part) for part in result)
+    else:
+        rows = len(result) if hasattr(result, '__len__') else None
+
+    return {
+        'rows': rows,
+        'repeat': repeat,
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'max': max(timings),
+    }
+
+
+def run_benchmarks(engine: Engine, repeat: int = 5, names: list[str] = None) -> dict[str, dict]:
+    results = {}
+    for name, func in BENCHMARKS.items():
+        if names and not any(part in name for part in names):
+            continue
+        results[name] = time_benchmark(engine, func, repeat=repeat)
+        logger.info(f"{name}: median {results[name]['median'] * 1000:.2f} ms ({results[name]['rows']} rows)")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """ Print the ratio of each median to its baseline, and return the names of the regressions. """
+    regressions = []
+    print(f"{'benchmark':<55} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name, result in results['results'].items():
+        if name not in baseline['results']:
+            print(f"{name:<55} {'-':>12} {result['median'] * 1000:>10.2f}ms {'new':>7}")
+            continue
+        base = baseline['results'][name]['median']
+        ratio = result['median'] / base if base else float('inf')
+        flag = ' <<' if ratio > threshold else ''
+        print(f"{name:<55} {base * 1000:>10.2f}ms {result['median'] * 1000:>10.2f}ms {ratio:>7.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmarks against a synthetic ledger.")
+    parser.add_argument('--transactions', type=int, default=LedgerSize.transactions)
+    parser.add_argument('--accounts', type=int, default=LedgerSize.accounts)
+    parser.add_argument('--currencies', type=int, default=LedgerSize.currencies)
+    parser.add_argument('--group-depth', type=int, default=LedgerSize.group_depth)
+    parser.add_argument('--group-fanout', type=int, default=LedgerSize.group_fanout)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filter', nargs='*', help="Run only the benchmarks whose name contains any of these strings")
+    parser.add_argument('--profile', choices=PRAGMA_PROFILES, default=SQLITE_PROFILE, help="The SQLite profile of the connections")
+    parser.add_argument('--database', help="Reuse (or create) the ledger in this file, instead of a temporary one")
+    parser.add_argument('--output', help="The path of the JSON results. Defaults to the standard output")
+    parser.add_argument('--baseline', help="A previous JSON result to compare with")
+    parser.add_argument('--threshold', type=float, default=1.2, help="The ratio to the baseline considered a regression")
+    args = parser.parse_args()
+
+    size = LedgerSize(
+        currencies=args.currencies,
+        group_depth=args.group_depth,
+        group_fanout=args.group_fanout,
+        accounts=args.accounts,
+        transactions=args.transactions,
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.database or os.path.join(directory, 'benchmark.db')
+        is_new_database = not os.path.exists(path)
+        # The reference data queries (`database.common_queries`) use the application's session
+        engine = open_database(path, profile=args.profile)
+
+        generate_seconds = None
+        if is_new_database:
+            start = time.perf_counter()
+            generate_ledger(engine, size=size, seed=args.seed)
+            generate_seconds = time.perf_counter() - start
+        else:
+            logger.info(f"Reusing the ledger in {path}, the size arguments are ignored")
+
+        results = {
+            'commit': get_commit(),
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'sqlalchemy': sqlalchemy.__version__,
+            'profile': args.profile,
+            'platform': platform.platform(),
+            'ledger': size.to_dict() if is_new_database else None,
+            'seed': args.seed if is_new_database else None,
+            'generate_seconds': generate_seconds,
+            'results': run_benchmarks(engine, repeat=args.repeat, names=args.filter),
+        }
+        close_database()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if regressions := compare(results, baseline, threshold=args.threshold):
+            print(f"Regressions: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+    Measure the cold start of the application, each run in a new interpreter:
+
+    - import: The time to import `main` (and, through it, the menu).
+    - first_frame: The time from the start of the import until the main window is drawn for the first time.
+      It is None without a display.
+
+    The database must not be opened (nor `sqlalchemy` imported) before the first view is opened, see `AppMenu.open_view`.
+
+    Usage (from `src`):
+
+        python -m benchmarks.startup --repeat 10 --target 0.5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def measure() -> dict:
+    """ Import and show the application in this interpreter. It is run in a child process by `main`. """
+    start = time.perf_counter()
+    import main
+    import_seconds = time.perf_counter() - start
+
+    first_frame_seconds = None
+    try:
+        app = main.App()
+    except main.tk.TclError:
+        # No display
+        app = None
+    if app is not None:
+        app.update()
+        first_frame_seconds = time.perf_counter() - start
+        app.destroy()
+
+    return {
+        'import': import_seconds,
+        'first_frame': first_frame_seconds,
+        'modules': len(sys.modules),
+        'sqlalchemy_imported': 'sqlalchemy' in sys.modules,
+    }
+
+
+def run(repeat: int) -> list[dict]:
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.startup', '--child'], capture_output=True, text=True, check=True,
+        ).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    return runs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure the cold start of the application.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--target', type=float, help="The exit code is 1 if the median start time (in seconds) is above it")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure()))
+        return 0
+
+    runs = run(args.repeat)
+    results = {'repeat': args.repeat, 'modules': runs[-1]['modules'], 'sqlalchemy_imported': runs[-1]['sqlalchemy_imported']}
+    for key in ('import', 'first_frame'):
+        timings = [result[key] for result in runs if result[key] is not None]
+        results[key] = {'min': min(timings), 'median': statistics.median(timings), 'max': max(timings)} if timings else None
+    print(json.dumps(results, indent=2))
+
+    start_time = results['first_frame'] or results['import']
+    if args.target is not None and start_time['median'] > args.target:
+        print(f"The median start time ({start_time['median']:.3f} s) is above the target ({args.target} s)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+    The benchmarks. Each one is a function that receives an open session on the synthetic ledger,
+    registered with `@benchmark`. Their return value is ignored, but it should be the data that the view would show
+    (so the whole result is fetched).
+"""
+from functools import partial
+from sqlalchemy.orm import Session
+from benchmarks.synthetic_ledger import LEDGER_END, LEDGER_SECONDS
+from utils import get_local_date_key
+from database import cache, common_queries
+from database.balances import get_account_balances
+from database.checkpoints import get_account_balances_as_of
+from database.financial_statements import get_balance_sheet_rows, get_income_statement, get_income_statement_rows
+from database.view_queries import (
+    get_account_overdraft_rows, get_chart_of_accounts_rows, get_transaction_page, get_transaction_rows,
+)
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str) -> callable:
+    """ Register the decorated function as a benchmark with the given name. """
+    def register(func: callable) -> callable:
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+# List views
+
+@benchmark("transaction_list.get_data")
+def transaction_rows(session: Session):
+    """ `TransactionListView.get_data`: All the transactions. """
+    return get_transaction_rows(session)
+
+
+@benchmark("transaction_list.get_page")
+def transaction_first_page(session: Session):
+    """ `TransactionListView.get_page`: The first page, newest first. """
+    return get_transaction_page(session)
+
+
+@benchmark("transaction_list.get_page.sorted_by_account")
+def transaction_first_page_by_account(session: Session):
+    """ `TransactionListView.get_page`: The first page sorted by the debit account (not indexed). """
+    return get_transaction_page(session, sort_column='debit_account', descending=False)
+
+
+@benchmark("account_overdraft_list.get_data")
+def account_overdraft_rows(session: Session):
+    return get_account_overdraft_rows(session)
+
+
+@benchmark("chart_of_accounts._get_data")
+def chart_of_accounts_rows(session: Session):
+    """ `ChartOfAccountTable`: The data inserted by `_insert_data` (the treeview itself is not measured). """
+    return get_chart_of_accounts_rows(session)
+
+
+# Reference data (`database.common_queries`, they open their own session and are cached, see `database.cache`)
+
+def _lookup_cold(lookup: callable, session: Session):
+    """ The query of the lookup: the cache is cleared first, as after a change of the data it reads. """
+    cache.clear()
+    return lookup()
+
+
+def _lookup_cached(lookup: callable, session: Session):
+    """ A cache hit (the value is stored by the warm up run). """
+    return lookup()
+
+
+for _lookup in (
+    common_queries.get_account_groups_values,
+    common_queries.get_accounts_values,
+    common_queries.get_account_types_values,
+    common_queries.get_currencies_values,
+):
+    benchmark(f"common_queries.{_lookup.__name__}")(partial(_lookup_cold, _lookup))
+    benchmark(f"common_queries.{_lookup.__name__}.cached")(partial(_lookup_cached, _lookup))
+
+
+# Balances
+
+@benchmark("balances.get_account_balances")
+def account_balances(session: Session):
+    return get_account_balances(session)
+
+
+@benchmark("checkpoints.get_account_balances_as_of")
+def account_balances_as_of(session: Session):
+    """ The balances in the middle of the ledger (the checkpoints are created and stored by the warm up run). """
+    balances = get_account_balances_as_of(session, LEDGER_END - LEDGER_SECONDS // 2)
+    session.commit()
+    return balances
+
+
+# Reports
+
+@benchmark("financial_statements.get_balance_sheet_rows")
+def balance_sheet_rows(session: Session):
+    """ The balance sheet in the middle of the ledger (as `checkpoints.get_account_balances_as_of`). """
+    rows = get_balance_sheet_rows(session, LEDGER_END - LEDGER_SECONDS // 2)
+    session.commit()
+    return rows
+
+
+@benchmark("financial_statements.get_income_statement_rows")
+def income_statement_rows(session: Session):
+    """ The income statement of the whole ledger, one column per month. """
+    statement = get_income_statement(
+        session, get_local_date_key(LEDGER_END - LEDGER_SECONDS), get_local_date_key(LEDGER_END),
+    )
+    return get_income_statement_rows(statement)
@@ -0,0 +1,176 @@
+"""
+    A reproducible synthetic ledger: currencies, a nested tree of account groups, accounts, overdrafts and transactions.
+    The same `LedgerSize` and seed always generate the same data.
+"""
+import random
+from dataclasses import dataclass, asdict
+from sqlalchemy import Connection, Engine, insert, text
+from database.models import Account, AccountGroup, AccountOverdraft, AccountType, Currency, Transaction
+from database.balances import BALANCE_TRIGGERS, create_balance_triggers, rebuild_account_balances
+from database.column_types import from_cents
+from database.migrations import upgrade_database
+from config import MAP_ACCOUNT_TYPE_TO_SIDE, logger
+
+
+CURRENCY_CODES = ['ARS', 'USD', 'EUR', 'BRL', 'GBP', 'JPY', 'CHF', 'CLP', 'UYU', 'MXN']
+
+# The ledger covers the 3 years before 2024-01-01 00:00 UTC
+LEDGER_END = 1704067200
+LEDGER_SECONDS = 3 * 365 * 24 * 3600
+
+CHUNK_SIZE = 20_000
+
+
+@dataclass(frozen=True)
+class LedgerSize:
+    """
+        currencies: The number of currencies.
+        group_depth: The depth of the account groups tree (the roots are at depth 1).
+        group_fanout: The number of children of each group (and the number of root groups).
+        accounts: The number of accounts, spread over the leaf groups.
+        overdraft_ratio: The share of the accounts with an overdraft.
+        transactions: The number of transactions, between random accounts.
+    """
+    currencies: int = 5
+    group_depth: int = 3
+    group_fanout: int = 4
+    accounts: int = 2_000
+    overdraft_ratio: float = 0.2
+    transactions: int = 10_000
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _insert_chunks(connection: Connection, table, rows) -> None:
+    """ Insert the rows (an iterable of dictionaries) with one `executemany` per chunk. """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            connection.execute(insert(table), chunk)
+            chunk = []
+    if chunk:
+        connection.execute(insert(table), chunk)
+
+
+def _get_currencies(size: LedgerSize) -> list[dict]:
+    codes = CURRENCY_CODES[:size.currencies] + [f"C{i:02d}" for i in range(size.currencies - len(CURRENCY_CODES))]
+    return [{'id': id, 'code': code, 'description': f"Currency {code}"} for id, code in enumerate(codes, start=1)]
+
+
+def _get_account_groups(size: LedgerSize) -> tuple[list[dict], list[int]]:
+    """ Returns the groups (parents first, as the hierarchy triggers need them) and the ids of the leaf groups. """
+    groups, leaf_ids = [], []
+
+    def add_children(parent: dict | None, depth: int) -> None:
+        for index in range(1, size.group_fanout + 1):
+            id = len(groups) + 1
+            name = f"{parent['name']}.{index}" if parent else f"Group {index}"
+            group = {'id': id, 'name': name, 'description': '', 'parent_id': parent['id'] if parent else None}
+            groups.append(group)
+            if depth < size.group_depth:
+                add_children(group, depth + 1)
+            else:
+                leaf_ids.append(id)
+
+    add_children(parent=None, depth=1)
+    return groups, leaf_ids
+
+
+def _get_transactions(size: LedgerSize, rng: random.Random):
+    """ Yields the transactions, ordered by timestamp (as they are usually entered). """
+    step = LEDGER_SECONDS / max(size.transactions, 1)
+    start = LEDGER_END - LEDGER_SECONDS
+    for index in range(size.transactions):
+        debit_account_id, credit_account_id = rng.sample(range(1, size.accounts + 1), 2)
+        amount = from_cents(rng.randint(100, 10_000_000))
+        yield {
+            'timestamp': int(start + index * step + rng.random() * step),
+            'description': f"Transaction {index + 1}",
+            'installment_number': 1,
+            'installment_total': 1,
+            'debit_reference': '',
+            'debit_account_id': debit_account_id,
+            'debit_amount': amount,
+            'credit_reference': '',
+            'credit_account_id': credit_account_id,
+            'credit_amount': amount,
+            'is_reconciled': rng.random() < 0.5,
+        }
+
+
+def generate_ledger(engine: Engine, size: LedgerSize = LedgerSize(), seed: int = 0) -> None:
+    """
+        Create the schema in an empty database and fill it with a synthetic ledger.
+        The balance triggers are dropped during the bulk insert of the transactions, and the balances are rebuilt at the end.
+    """
+    assert size.accounts >= 2, "At least two accounts are needed to create transactions"
+    rng = random.Random(seed)
+    upgrade_database(engine)
+
+    with engine.begin() as connection:
+        currencies = _get_currencies(size)
+        connection.execute(insert(Currency), currencies)
+        account_types = [
+            {'id': id, 'name': name, 'normal_side': normal_side}
+            for id, (name, normal_side) in enumerate(sorted(MAP_ACCOUNT_TYPE_TO_SIDE.items()), start=1)
+        ]
+        connection.execute(insert(AccountType), account_types)
+
+        # The groups are inserted one by one (parents first), so the hierarchy triggers find the parent of each one
+        groups, leaf_ids = _get_account_groups(size)
+        for group in groups:
+            connection.execute(insert(AccountGroup), group)
+
+        _insert_chunks(connection, Account, (
+            {
+                'id': id,
+                'name': f"Account {id}",
+                'description': '',
+                'account_number': f"{rng.randrange(10**9):09d}",
+                'currency_id': rng.randint(1, len(currencies)),
+                'opened_at': LEDGER_END - LEDGER_SECONDS - rng.randrange(LEDGER_SECONDS),
+                'closed_at': None,
+                'account_group_id': rng.choice(leaf_ids),
+                'account_type_id': rng.randint(1, len(account_types)),
+            }
+            for id in range(1, size.accounts + 1)
+        ))
+        _insert_chunks(connection, AccountOverdraft, (
+            {
+                'account_id': id,
+                'limit': from_cents(rng.randrange(10_000, 100_000_000, 10_000)),
+                'started_at': LEDGER_END - LEDGER_SECONDS,
+                'ended_at': None,
+            }
+            for id in range(1, size.accounts + 1) if rng.random() < size.overdraft_ratio
+        ))
+
+        for name in BALANCE_TRIGGERS:
+            connection.execute(text(f"DROP TRIGGER {name}"))
+        _insert_chunks(connection, Transaction, _get_transactions(size, rng))
+        rebuild_account_balances(connection)
+        create_balance_triggers(connection)
+
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+    logger.info(f"Generated a synthetic ledger: {size}")
+
+
+if __name__ == '__main__':
+    import argparse
+    from sqlalchemy import create_engine
+
+    parser = argparse.ArgumentParser(description="Create a database with a synthetic ledger.")
+    parser.add_argument('path', help="The path of the new database")
+    parser.add_argument('--transactions', type=int, default=LedgerSize.transactions)
+    parser.add_argument('--accounts', type=int, default=LedgerSize.accounts)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generate_ledger(
+        create_engine(f"sqlite+pysqlite:///{args.path}"),
+        size=LedgerSize(transactions=args.transactions, accounts=args.accounts),
+        seed=args.seed,
+    )
@@ -13,6 +13,24 @@ else:
 
 SQLALQUEMY_ECHO = os.environ.get('SQLALQUEMY_ECHO', 'False') == 'True'
 
+# The ledger opened on startup (another one can be opened from the File menu), or ':memory:'
+DATABASE_PATH = os.environ.get(
+    'DATABASE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'the_vault.db')
+)
+
+# The PRAGMA statements run on each connection: 'performance' or 'safe' (see `database.pragmas`)
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'performance')
+SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', '65536'))
+SQLITE_MMAP_SIZE_MB = int(os.environ.get('SQLITE_MMAP_SIZE_MB', '256'))
+
+# The statements slower than the threshold are written to the slow query log (see `database.instrumentation`)
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '100'))
+SLOW_QUERY_LOG = os.environ.get(
+    'SLOW_QUERY_LOG',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'slow_queries.log')
+)
+
 
 class NormalSideEnum(Enum):
     CREDIT = 'CREDIT'
@@ -60,5 +78,21 @@ MAP_ACCOUNT_TYPE_TO_SIDE = {
     AccountTypeEnum.AMORTIZATION_EXPENSE.name: NormalSideEnum.DEBIT.name,
 }
 
+# The sections of the balance sheet. The accounts of any other type (revenues, expenses and the types added by the user)
+# are shown in the equity, as the result of the period.
+ASSET_ACCOUNT_TYPES = (
+    AccountTypeEnum.CASH.name,
+    AccountTypeEnum.ACCOUNT_RECEIVABLE.name,
+    AccountTypeEnum.SALARY_RECEIVABLE.name,
+)
+LIABILITY_ACCOUNT_TYPES = (
+    AccountTypeEnum.CASH_OVERDRAFT.name,
+    AccountTypeEnum.SALARY_DEFERRED_REVENUE.name,
+    AccountTypeEnum.ACCOUNT_PAYABLE.name,
+    AccountTypeEnum.LOAN.name,
+    AccountTypeEnum.CREDIT_CARD.name,
+    AccountTypeEnum.DEFERRED_REVENUE.name,
+)
+
 # TODO: Expose the LOCAL_TIME_ZONE as a setting, and in a bottom bar (to the right corner)
 LOCAL_TIME_ZONE = os.environ.get('LOCAL_TIME_ZONE', 'America/Argentina/Buenos_Aires')
@@ -1,8 +1,13 @@
 from functools import partial
+from tkinter import messagebox
+from database.executor import run_in_background
 import tkinter as tk
 import tkinter.ttk as ttk
 
 
+LOADING_ITEM = '__loading__'
+
+
 class CustomTable(tk.Frame):
     """ A custom table widget.
         Usage:
@@ -10,6 +15,22 @@ class CustomTable(tk.Frame):
         1. Create an instance of the widget: 
         2. Set the columns that will be shown using the method `add_column`. (See more in the docstring of the method).
         3. Call the `refresh` method to load/update the data. (See more in the docstring of the method).
+
+        Row model:
+            The table keeps the typed values of each item (the treeview only stores their text), and the sort key of
+            each value is computed once and cached. Sorting reorders the items from the model, without reading the treeview.
+
+        Loading:
+            The data functions (`func_get_data`, `func_get_page`) run in the database worker (see `database.executor`),
+            so they must not use Tk. While the first data is loading, the table shows a "Loading…" item.
+
+        Refresh:
+            With a `key_column` (the record `id` by default), the items are identified by the key, and a refresh only
+            inserts, updates, moves or deletes the items whose rows changed, keeping the selection, scroll and sort.
+
+        Paged mode (`func_get_page`):
+            The rows are fetched one page at a time as the user scrolls, and only `max_rows` are kept in the treeview.
+            The sorting is done by `func_get_page` (e.g. in SQL), instead of sorting the items of the treeview.
     """
     
     def __init__(self,
@@ -18,6 +39,10 @@ class CustomTable(tk.Frame):
         tree_root_col_width : int = 0,
         tree_expanded: bool = False,
         func_get_data: callable = lambda: [],
+        key_column: str | None = 'id',
+        func_get_page: callable = None,
+        page_size: int = 200,
+        max_rows: int = 1000,
     ) -> None:
         """
             Args:
@@ -30,6 +55,16 @@ class CustomTable(tk.Frame):
                 func_get_data: The function that will be called to get the data to be shown in the table. 
                     - It must return a list of dictionaries.
                     - The keys must be the same as the `column` parameter of the `add_column` method.
+                key_column: The column that identifies each row, it is used as the item id of the treeview.
+                    If None, the refresh deletes and re-inserts all the items (e.g. for trees, where the ids are not unique).
+                func_get_page: If set, the table works in paged mode and `func_get_data` is not used. It is called as
+                    `func_get_page(sort_column, descending, after, before, limit)` and must return a list of dictionaries like
+                    `func_get_data`, plus a `_key` entry with the position of the row (passed back as `after` or `before`).
+                    - after: Return the rows that follow this key.
+                    - before: Return the rows that precede this key, in the display order.
+                    - sort_column: The column sorted by the user, or None for the default order.
+                page_size: The number of rows fetched by each call to `func_get_page`.
+                max_rows: The maximum number of rows kept in the treeview in paged mode.
         """
         super().__init__(parent)
 
@@ -38,6 +73,20 @@ class CustomTable(tk.Frame):
         self._func_get_data = func_get_data
         self._col_config = {}  # Stores the configuration of the columns
         self._first_update = True # Flag to determine if the table has been updated for the first time (workaround).
+        self._key_column = key_column
+        self._values = {}  # The typed values of each item in the treeview (the row model)
+        self._sort_keys = {}  # The cached sort keys of each column, as {column: {item: sort_key}}
+
+        # Paged mode
+        self._func_get_page = func_get_page
+        self._page_size = page_size
+        self._max_rows = max(max_rows, 2 * page_size)
+        self._keys = {}  # The `_key` of each item in the treeview
+        self._window_start = None  # The `_key` of the row before the first item, None if the first item is the first row
+        self._has_previous = False  # There are rows before the first item (they were dropped from the treeview)
+        self._has_next = False  # There are rows after the last item
+        self._is_loading = False  # A load is running in the database worker
+        self._request_id = 0  # Incremented on each refresh, so the results of an outdated load are discarded
         
         # Create the table
         self._table = ttk.Treeview(self, selectmode=selectmode)
@@ -45,7 +94,7 @@ class CustomTable(tk.Frame):
         
         # Create the scrollbar
         self._scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._table.yview)
-        self._table.configure(yscrollcommand=self._scrollbar.set)
+        self._table.configure(yscrollcommand=self._on_scroll)
         self._scrollbar.grid(column=1, row=0, sticky="ns")
         
         # Make the treeview stretch to fill the window
@@ -86,14 +135,17 @@ class CustomTable(tk.Frame):
                    minwidth: int = 20,
                    width: int = 200,
                    stretch: bool = True,
-                   is_sorted_asc: bool|None = None
+                   is_sorted_asc: bool|None = None,
+                   formatter: callable = None,
+                   sortable: bool = True,
                ) -> None:
         """Add a column and configuration to the table.
         
         Args:
             column (str): The internal name of the column. This is the key of the dictionary in the `data` argument.
             text (str, optional): The display text to be shown in the heading. Defaults to the "Title Case" of the `column` parameter.
-            dtype (int|str|float, optional): The data type of the column. Defaults to str. It is used to sort the column.
+            dtype (int|str|float|Decimal, optional): The data type of the column. Defaults to str. It is used to sort the column:
+                the values are converted with `dtype(value)` once, and the strings are compared case insensitive.
             anchor (str, optional): The aligment of the values in the column. Defaults to tk.CENTER.
                 - tk.W: Left
                 - tk.CENTER: Center
@@ -105,12 +157,17 @@ class CustomTable(tk.Frame):
                 - ascending order (True),
                 - descending order (False),
                 - or neither (None)
+            formatter (callable, optional): A function that returns the text shown for a value (e.g. `lambda x: f"$ {x:.2f}"`).
+                Defaults to the value itself. The sorting uses the value, not the text.
+            sortable (bool, optional): Whether clicking the heading sorts the table by the column. Defaults to True
+                (in paged mode, set it to False on the columns that `func_get_page` can not sort by).
         """
         
         # Store the column configuration
         self._col_config[column] = {
             'dtype': dtype,
             'is_sorted_asc': is_sorted_asc,
+            'formatter': formatter,
             'column_config': {
                 'anchor': anchor,
                 'minwidth': minwidth,
@@ -119,19 +176,49 @@ class CustomTable(tk.Frame):
             },
             'heading_config': {
                 'text': text or column.replace('_',' ').title(),
-                'command': lambda: self._sort_table(column=column),
             }
         }
+        if sortable:
+            self._col_config[column]['heading_config']['command'] = lambda: self._on_heading_click(column=column)
         
 
+    def _on_heading_click(self, column: str) -> None:
+        """Sort the table by the given column, in the treeview or through `func_get_page` in paged mode."""
+
+        if self._func_get_page:
+            is_sorted_asc = self._col_config[column]['is_sorted_asc']
+            for col in self._col_config.keys():
+                self._col_config[col]['is_sorted_asc'] = None
+            self._col_config[column]['is_sorted_asc'] = not is_sorted_asc
+            self._request_id += 1
+            self._delete_all()
+            self._insert_first_page()
+        else:
+            self._sort_table(column=column)
+
+    @staticmethod
+    def _get_sort_key(value, dtype: str | int | float) -> tuple:
+        """ The empty values are sorted last (in ascending order), after the typed ones. """
+        if value is None or value == '':
+            return (True, '')
+        return (False, dtype(value).lower() if dtype is str else dtype(value))
+
+    def _get_sort_keys(self, column: str) -> dict:
+        """Return the sort key of every item in the given column, computing only the ones that are not cached."""
+
+        index, dtype = self.get_columns().index(column), self._col_config[column]['dtype']
+        sort_keys = self._sort_keys.setdefault(column, {})
+        for item, values in self._values.items():
+            if item not in sort_keys:
+                sort_keys[item] = self._get_sort_key(values[index] if index < len(values) else None, dtype)
+        return sort_keys
+
+    def _sort_items(self, items: list[str], column: str, descending: bool) -> list[str]:
+        sort_keys = self._get_sort_keys(column)
+        return sorted(items, key=sort_keys.__getitem__, reverse=descending)
+
     def _sort_table(self, column: str) -> None:
         """Sort the table by the given column."""
-        
-        # Get all tuples of values and items' indexes
-        items = []
-        for index in self._table.get_children(''):
-            value = self._table.set(index, column)
-            items.append((value, index))
 
         # Determine if the sorting should be ascending or descending
         sort_descending = bool(self._col_config[column]['is_sorted_asc'])
@@ -143,23 +230,18 @@ class CustomTable(tk.Frame):
             else:
                 self._col_config[column]['is_sorted_asc'] = not sort_descending
 
-        # Sort the data
-        def get_sort_key(item, dtype: str | int | float) -> str | int | float:
-            value, _ = item
-            return dtype(value).lower() if isinstance(dtype, str) else dtype(value)
-
-        dtype = self._col_config[column]['dtype']
-        items.sort(reverse=sort_descending, key=partial(get_sort_key, dtype=dtype))
+        # Reorder the items from the row model
+        items = self._sort_items(self._table.get_children(''), column=column, descending=sort_descending)
+        self._table.set_children('', *items)
 
-        # Reassign the values to the table
-        for index, (val, k) in enumerate(items):
-            self._table.move(k, '', index)
-        
     def _delete_all(self) -> None:
         """Delete all items in the table."""
         
-        for item in self._table.get_children():
-            self._table.delete(item)
+        self._table.delete(*self._table.get_children())
+        self._values.clear()
+        self._sort_keys.clear()
+        self._keys.clear()
+        self._window_start = None
 
     def _configure_columns(self) -> None:
         """ 
@@ -182,22 +264,232 @@ class CustomTable(tk.Frame):
                 self._table.heading(column, **self._col_config[column]['heading_config'])
             self._first_update = False
 
-    def _insert_data(self) -> None:
-        """ Extracts the data from the `func_get_data` and inserts it into the table."""
+    def _get_display_values(self, values: tuple) -> tuple:
+        """Return the text shown for the values, using the `formatter` of each column."""
+
+        return tuple(
+            '' if value is None else config['formatter'](value) if config['formatter'] else value
+            for value, config in zip(values, self._col_config.values())
+        )
+
+    def _insert_item(self, parent: str, index: int | str, values: tuple, iid: str = None, **kwargs) -> str:
+        """Insert an item in the treeview, and its values in the row model. Returns the item id."""
+
+        item = self._table.insert(parent, index, iid=iid, values=self._get_display_values(values), **kwargs)
+        self._values[item] = values
+        return item
+
+    def _update_item(self, item: str, values: tuple) -> None:
+        """Update the values of an item, in the treeview and in the row model."""
+
+        self._table.item(item, values=self._get_display_values(values))
+        self._values[item] = values
+        for sort_keys in self._sort_keys.values():
+            sort_keys.pop(item, None)
+
+    def _get_data(self) -> list[dict]:
+        """ Returns the data to be inserted by `_insert_data`. It runs in the database worker. """
+
+        return self._func_get_data()
+
+    def _insert_data(self, data: list[dict]) -> None:
+        """ Inserts the data extracted by `_get_data` into the table."""
         
-        for item in self._func_get_data():
+        for item in data:
             values = tuple(item[column] for column in self.get_columns())
-            self._table.insert('', 'end', values=values)
-            
+            self._insert_item('', 'end', values=values)
+
+    def _merge_data(self, rows: list[dict], sort_rows: bool = True) -> None:
+        """
+            Make the items of the table match the rows, using the `key_column` as the item id:
+                - Only the new rows are inserted, and only the changed rows are updated.
+                - The items that are not in the rows are deleted.
+                - The items are moved only if the order changed.
+            If `sort_rows` and a column is sorted, the rows are sorted by it (as `_sort_table`), otherwise their order is kept.
+        """
+
+        columns = self.get_columns()
+        old_items = set(self._table.get_children())
+        items = []
+        for row in rows:
+            item = str(row[self._key_column])
+            values = tuple(row[column] for column in columns)
+            if item not in old_items:
+                self._insert_item('', 'end', values=values, iid=item)
+            elif self._values[item] != values:
+                self._update_item(item, values=values)
+            if '_key' in row:
+                self._keys[item] = row['_key']
+            items.append(item)
+
+        if deleted_items := old_items.difference(items):
+            self._drop_items(deleted_items)
+
+        sort_column, sort_descending = self._get_sort()
+        if sort_rows and sort_column:
+            items = self._sort_items(items, column=sort_column, descending=sort_descending)
+        if tuple(items) != self._table.get_children():
+            self._table.set_children('', *items)
+
+    def _get_sort(self) -> tuple[str | None, bool]:
+        """Return the sorted column and whether it is sorted in descending order, or (None, True) if no column is sorted."""
+
+        for column, config in self._col_config.items():
+            if config['is_sorted_asc'] is not None:
+                return column, not config['is_sorted_asc']
+        return None, True
+
+    def _show_loading(self) -> None:
+        """Show the "Loading…" item, if the table is empty."""
+
+        if not self._table.get_children():
+            self._table.insert('', 'end', iid=LOADING_ITEM, text="Loading…", values=("Loading…",))
+
+    def _hide_loading(self) -> None:
+        if self._table.exists(LOADING_ITEM):
+            self._table.delete(LOADING_ITEM)
+
+    def _load(self, func: callable, on_done: callable, action: str = "get_data") -> None:
+        """
+            Run `func` in the database worker, and then `on_done(result)` in the Tk thread.
+            The result is discarded if the table was refreshed in the meantime.
+            The statements are attributed to `<window>.<action>` (see `database.instrumentation`).
+        """
+        request_id = self._request_id
+
+        def done(result):
+            self._is_loading = False
+            if request_id == self._request_id:
+                self._hide_loading()
+                on_done(result)
+
+        def error(exception: Exception):
+            self._is_loading = False
+            self._hide_loading()
+            messagebox.showerror("Error", str(exception))
+
+        self._is_loading = True
+        action = f"{type(self.winfo_toplevel()).__name__}.{action}"
+        run_in_background(self, func, on_done=done, on_error=error, action=action)
+
+    def _fetch_page(self, on_done: callable, after: tuple = None, before: tuple = None, limit: int = None) -> None:
+        """Load a page with `func_get_page` and pass its rows to `on_done`."""
+
+        sort_column, descending = self._get_sort()
+        func = partial(self._func_get_page, sort_column, descending, after, before, limit or self._page_size)
+        self._load(func, on_done=on_done, action="get_page")
+
+    def _insert_page(self, rows: list[dict], index: int | str) -> None:
+        """Insert the rows of a page at the given index of the treeview."""
+
+        columns = self.get_columns()
+        for row in rows:
+            item = str(row[self._key_column])
+            if self._table.exists(item):
+                # The row moved (it was edited) after the current window was loaded
+                continue
+            self._insert_item('', index, values=tuple(row[column] for column in columns), iid=item)
+            self._keys[item] = row['_key']
+            if index != 'end':
+                index += 1
+
+    def _drop_items(self, items: tuple) -> None:
+        self._table.delete(*items)
+        for item in items:
+            del self._values[item]
+            self._keys.pop(item, None)
+            for sort_keys in self._sort_keys.values():
+                sort_keys.pop(item, None)
+
+    def _insert_first_page(self) -> None:
+        def on_rows(rows: list[dict]) -> None:
+            self._insert_page(rows, index='end')
+            self._window_start = None
+            self._has_previous = False
+            self._has_next = len(rows) == self._page_size
+
+        self._show_loading()
+        self._fetch_page(on_rows)
+
+    def _load_next_page(self) -> None:
+        """Append the next page, and drop the rows over `max_rows` from the top, keeping the visible rows in place."""
+
+        def on_rows(rows: list[dict]) -> None:
+            items = self._table.get_children()
+            self._insert_page(rows, index='end')
+            self._has_next = len(rows) == self._page_size
+
+            overflow = len(items) + len(rows) - self._max_rows
+            if overflow > 0:
+                self._window_start = self._keys[items[overflow - 1]]
+                self._drop_items(items[:overflow])
+                self._table.yview_scroll(-overflow, 'units')
+                self._has_previous = True
+
+        self._fetch_page(on_rows, after=self._keys[self._table.get_children()[-1]])
+
+    def _load_previous_page(self) -> None:
+        """Prepend the previous page, and drop the rows over `max_rows` from the bottom, keeping the visible rows in place."""
+
+        def on_rows(rows: list[dict]) -> None:
+            items = self._table.get_children()
+            self._has_previous = len(rows) > self._page_size
+            if self._has_previous:
+                self._window_start = rows.pop(0)['_key']
+            else:
+                self._window_start = None
+            self._insert_page(rows, index=0)
+            self._table.yview_scroll(len(rows), 'units')
+
+            overflow = len(items) + len(rows) - self._max_rows
+            if overflow > 0:
+                self._drop_items(items[-overflow:])
+                self._has_next = True
+
+        # One more row is fetched, to know where the window starts
+        self._fetch_page(on_rows, before=self._keys[self._table.get_children()[0]], limit=self._page_size + 1)
+
+    def _refresh_page(self) -> None:
+        """Fetch again the rows of the current window, and merge them into the table."""
+
+        limit = max(len(self._keys), self._page_size)
+
+        def on_rows(rows: list[dict]) -> None:
+            self._merge_data(rows, sort_rows=False)
+            self._has_next = len(rows) == limit
+
+        self._fetch_page(on_rows, after=self._window_start, limit=limit)
+
+    def _on_scroll(self, first: str, last: str) -> None:
+        """Update the scrollbar and, in paged mode, load the adjacent page when the view gets close to an end."""
+
+        self._scrollbar.set(first, last)
+        if not self._func_get_page or self._is_loading or not self._keys:
+            return
+        if float(last) > 0.9 and self._has_next:
+            self._load_next_page()
+        elif float(first) < 0.1 and self._has_previous:
+            self._load_previous_page()
 
     def refresh(self, event=None) -> None:
         """
-            Update the table's data.
+            Update the table's data. The data is loaded in the database worker, and inserted when it is ready.
             Do not remove the `event` argument, it is used to bind the function to events.
         """
-        self._delete_all()
-        self._insert_data()
+        self._request_id += 1
         self._configure_columns()
+        self._show_loading()
+
+        if self._func_get_page:
+            self._refresh_page()
+        elif self._key_column:
+            self._load(self._get_data, on_done=self._merge_data)
+        else:
+            self._load(self._get_data, on_done=self._replace_data)
+
+    def _replace_data(self, data: list[dict]) -> None:
+        self._delete_all()
+        self._insert_data(data)
         if self._tree_expanded:
             self._expand_items()
 
@@ -207,8 +499,11 @@ class CustomTable(tk.Frame):
         columns = self.get_columns()
         data = []
         for item_id in self._table.selection() if selected_only else self._table.get_children():
-            # get the item's data as a tuple
-            item_values = self._table.item(item_id)['values']
+            if item_id not in self._values:
+                # The "Loading…" item
+                continue
+            # get the item's typed values from the row model
+            item_values = self._values[item_id]
             # Map tuple's values with the column names
             item_data = {
                 # `len(item_values)` It is used over `len(columns)` because the item's values may be less than the columns, but never greater
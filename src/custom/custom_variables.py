@@ -1,5 +1,6 @@
 import tkinter as tk
 import pendulum
+from decimal import Decimal, InvalidOperation
 from tkinter import messagebox
 from config import LOCAL_TIME_ZONE
 
@@ -44,18 +45,22 @@ class DecimalVar(tk.StringVar):
         else:
             super().__init__(master)
 
-    def get(self) -> float | None:
+    def get(self) -> Decimal | None:
         """ 
-            Returns the value of the variable in the format specified in the constructor,
+            Returns the value of the variable as an exact `Decimal` rounded to the decimals specified in the constructor,
             or None if the value couldn't be parsed
         """
         
-        str_value = super().get()
+        str_value = super().get().strip()
         if str_value != '':
             try:
-                return f"{float(str_value):.{self._decimals}f}"
-            except Exception as e:
-                messagebox.showerror("Error", f"Decimal `{str_value}` could not be parsed to float")
+                value = Decimal(str_value)
+            except InvalidOperation:
+                value = None
+            # `quantize` returns a NaN as it is, instead of raising `InvalidOperation`
+            if value is not None and value.is_finite():
+                return value.quantize(Decimal(1).scaleb(-self._decimals))
+            messagebox.showerror("Error", f"Decimal `{str_value}` could not be parsed to decimal")
         return None
 
    
\ No newline at end of file
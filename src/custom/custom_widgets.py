@@ -1,7 +1,9 @@
 from tkinter import ttk
 import tkinter as tk
 import pendulum
+from decimal import Decimal
 from tkinter import messagebox
+from database.executor import run_in_background
 
 
 # TODO: Move default_now to the tk.Variable 
@@ -111,11 +113,12 @@ class DecimalEntry(ttk.Entry):
         try:
             
             # check limits
-            assert self._min is None or float(input_str) >= self._min, f"Value must be equal or greater than {self._min}"
-            assert self._max is None or float(input_str) <= self._max, f"Value must be equal or less than {self._max}"
+            value = Decimal(input_str)
+            assert self._min is None or value >= self._min, f"Value must be equal or greater than {self._min}"
+            assert self._max is None or value <= self._max, f"Value must be equal or less than {self._max}"
             
             if self._decimals > 0:
-                self._parsed_value = f"{float(input_str):{self._digits or ''}.{self._decimals}f}"
+                self._parsed_value = f"{value:{self._digits or ''}.{self._decimals}f}"
             else:
                 str_val = str(int(input_str))
                 zeros = '0'*(self._digits - len(str_val)) if self._digits else ''
@@ -139,6 +142,9 @@ class DecimalEntry(ttk.Entry):
         return self._parsed_value
 
 
+LOADING_TEXT = "Loading…"
+
+
 class KeyValueCombobox(ttk.Combobox):
     """ A combobox that stores the values in a dictionary.
         The values are displayed in the combobox and the keys are stored.
@@ -155,40 +161,59 @@ class KeyValueCombobox(ttk.Combobox):
             :func_get_values: 
                 A function that returns a dictionary with the values {'key': value}, 
                 the combobox will use it to update its values when the dropdown is opened.
+                It runs in the database worker (see `database.executor`), so it must not use Tk.
+                While the values are loading the combobox shows "Loading…", and then it generates `<<ComboboxLoaded>>`.
             :enable_empty_option:
                 If True, an empty option `<Empty>` will be added at the begining of the combobox.
         """
         
         self._key_value_dict = {}
         self._enable_empty_option = enable_empty_option
+        self._is_loaded = False
+        self.is_loading = False
         super().__init__(master=parent, state=state, **kwargs)
         
         self._func_get_values = func_get_values
         
-        self.bind("<<ComboboxSelected>>", self._update)
+        # The values are reloaded when the dropdown opens (they are cached, see `database.cache`), not on each selection
+        self.configure(postcommand=self._update)
             
+        self.set(LOADING_TEXT)
         self._update()
-        self.current(0)
 
     def _update(self, event=None) -> None:
         """
-            Use the function `func_get_values` to update the values of the combobox.
+            Use the function `func_get_values` to update the values of the combobox, in the background.
         """
 
-        old_key = self.current_key()
-        old_value = super().get()
+        def on_values(key_values: dict) -> None:
+            old_key = self.current_key()
+            old_value = super(KeyValueCombobox, self).get()
+
+            self._key_value_dict = {None: '<Empty>', **key_values} if self._enable_empty_option else key_values
+            self['values'] = list(self._key_value_dict.values())
+            self.is_loading = False
+
+            if not self._is_loaded:
+                # Select the first value, unless a value was set while loading (e.g. by an edit view)
+                self._is_loaded = True
+                if old_value == LOADING_TEXT and self._key_value_dict:
+                    self.current(0)
+                elif old_value == LOADING_TEXT:
+                    self.set('')
+            # If the old key is still in the new values, but its value changed, select the first value.
+            elif old_key in self._key_value_dict and old_value != self._key_value_dict[old_key]:
+                self.current(0)
+            self.event_generate("<<ComboboxLoaded>>")
 
-        # Get the new values and update the combobox.
-        key_values = self._func_get_values()
-        self._key_value_dict = {None: '<Empty>', **key_values} if self._enable_empty_option else key_values
-        self['values'] = list(self._key_value_dict.values())
+        def on_error(error: Exception) -> None:
+            self.is_loading = False
+            if super(KeyValueCombobox, self).get() == LOADING_TEXT:
+                self.set('')
+            messagebox.showerror("Error", f"Could not load the values: {error}")
 
-        # If the old key is still in the new values, set the combobox to the old value.
-        if old_key in self._key_value_dict:
-            if old_value == self._key_value_dict[old_key]:
-                self.current(self['values'].index(old_value))
-            else:
-                self.current(0)
+        self.is_loading = True
+        run_in_background(self, self._func_get_values, on_done=on_values, on_error=on_error)
         
     def current_key(self):
         """ Return the key of the current value. """
@@ -1,5 +1,6 @@
 from utils import center_window
 from database.sqlite_handler import get_session
+from database.instrumentation import track
 from tkinter import messagebox
 from custom.custom_table import CustomTable
 from config import logger
@@ -117,11 +118,14 @@ class TemplateListView(CustomTopLevel, ABC):
                 - __new_view__: The new view
                 - `get_data`: A function that returns the data to be displayed on the table
                 - `add_columns`: A function that defines which columns are shown in the table
+                - `get_page` (optional): A function that returns a page of data, to load the table in paged mode
+                    (See `func_get_page` in `CustomTable`)
     """
     
     __model__: Base = None
     __edit_view__: CustomTopLevel = None
     __new_view__: CustomTopLevel = None
+    get_page: callable = None
     
     def __init__(self, parent: tk.Toplevel | tk.Tk, title: str):
         
@@ -129,11 +133,7 @@ class TemplateListView(CustomTopLevel, ABC):
             parent=parent,
             title=title,
             resizable=True,
-            top_buttons_config={
-                'Add': self._on_add,
-                'Edit': self._on_edit,
-                'Delete': self._on_delete,
-            },
+            top_buttons_config=self.get_top_buttons_config(),
             footer_buttons_config={
                 'Close': self.destroy,
             },
@@ -149,6 +149,14 @@ class TemplateListView(CustomTopLevel, ABC):
         self.bind('<Double-1>', self._on_edit)
         self.bind('<Return>', self._on_edit)
 
+    def get_top_buttons_config(self) -> dict:
+        """ The buttons on the top, it can be extended by the subclasses (see `CustomTopLevel`). """
+        return {
+            'Add': self._on_add,
+            'Edit': self._on_edit,
+            'Delete': self._on_delete,
+        }
+
     @abstractmethod
     def get_data(self):
         """ 
@@ -180,7 +188,8 @@ class TemplateListView(CustomTopLevel, ABC):
         if (selected_items:=self.table.get_items_data(selected_only=True)) \
             and messagebox.askyesno("Delete confirmation","Are you sure you want to delete the selected items?"):
             try:
-                self._db_delete_item(ids=[item['id'] for item in selected_items])
+                with track(f"{type(self).__name__}.delete"):
+                    self._db_delete_item(ids=[item['id'] for item in selected_items])
             except Exception as e:
                 messagebox.showerror("Error", str(e))
    
@@ -193,7 +202,7 @@ class TemplateListView(CustomTopLevel, ABC):
    
     def _set_table(self):
         """Create the Table"""
-        self.table = CustomTable(parent=self.body_frame, func_get_data=self.get_data)
+        self.table = CustomTable(parent=self.body_frame, func_get_data=self.get_data, func_get_page=self.get_page)
         self.add_columns(table=self.table)
         self.table.refresh()
         self.table.grid(column=0, row=0, sticky="ew")
@@ -219,6 +228,10 @@ class FrameInput(ttk.Frame):
                 self.parent.focus()
                 self.destroy()
 
+    def is_loading(self) -> bool:
+        """ Whether any combobox is still loading its values in the background. """
+        return any(isinstance(widget, KeyValueCombobox) and widget.is_loading for widget in self._input_widgets.values())
+
     def get_input_widgets(self) -> list[dict[str: tk.Widget]]:
         """
             Get the input widgets. 
@@ -454,11 +467,18 @@ class TemplateNewEdit(CustomTopLevel, ABC):
             Wrapper for the `on_accept` method.
             - It will call `get_validated_values`, and `on_accept` if the values are valid.
             - It will show an error message if the values are not valid.
+            - It does nothing while the comboboxes are still loading their values.
             - It generates the event "<<EventUpdateTable>>" used by TemplateListView to update the table.
         """
+        if self.input_frame.is_loading():
+            messagebox.showinfo("Loading", "The values are still loading, please try again.")
+            self.focus()
+            return None
+
         try:
             values = self.get_validated_values(input_values=self.input_frame.get_values())
-            self.on_accept(values=values)
+            with track(f"{type(self).__name__}.on_accept"):
+                self.on_accept(values=values)
             self.parent.event_generate("<<EventUpdateTable>>")
             self.parent.focus()
             self.destroy()
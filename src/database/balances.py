@@ -0,0 +1,99 @@
+from decimal import Decimal
+from sqlalchemy import DDL, Connection, case, event, select, text
+from sqlalchemy.orm import Session
+from database.models import Account, AccountBalance, AccountType, Transaction
+
+
+# The triggers keep `account_balance` in sync with every insert, update and delete of a `transaction`,
+# including the bulk deletes issued by `TemplateListView._db_delete_item`.
+_UPSERT_DEBIT = """
+    INSERT INTO account_balance (account_id, debit_total, credit_total) VALUES ({account_id}, {amount}, 0)
+        ON CONFLICT(account_id) DO UPDATE SET debit_total = debit_total + excluded.debit_total;
+"""
+
+_UPSERT_CREDIT = """
+    INSERT INTO account_balance (account_id, debit_total, credit_total) VALUES ({account_id}, 0, {amount})
+        ON CONFLICT(account_id) DO UPDATE SET credit_total = credit_total + excluded.credit_total;
+"""
+
+BALANCE_TRIGGERS = {
+    "trg_transaction_balance_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transaction_balance_insert AFTER INSERT ON "transaction"
+        BEGIN
+            {_UPSERT_DEBIT.format(account_id='NEW.debit_account_id', amount='NEW.debit_amount')}
+            {_UPSERT_CREDIT.format(account_id='NEW.credit_account_id', amount='NEW.credit_amount')}
+        END
+    """,
+    "trg_transaction_balance_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transaction_balance_delete AFTER DELETE ON "transaction"
+        BEGIN
+            {_UPSERT_DEBIT.format(account_id='OLD.debit_account_id', amount='-OLD.debit_amount')}
+            {_UPSERT_CREDIT.format(account_id='OLD.credit_account_id', amount='-OLD.credit_amount')}
+        END
+    """,
+    "trg_transaction_balance_update": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transaction_balance_update
+            AFTER UPDATE OF debit_account_id, debit_amount, credit_account_id, credit_amount ON "transaction"
+        BEGIN
+            {_UPSERT_DEBIT.format(account_id='OLD.debit_account_id', amount='-OLD.debit_amount')}
+            {_UPSERT_CREDIT.format(account_id='OLD.credit_account_id', amount='-OLD.credit_amount')}
+            {_UPSERT_DEBIT.format(account_id='NEW.debit_account_id', amount='NEW.debit_amount')}
+            {_UPSERT_CREDIT.format(account_id='NEW.credit_account_id', amount='NEW.credit_amount')}
+        END
+    """,
+}
+
+
+# New databases get the triggers along with the `transaction` table, existing ones through `database.migrations`.
+for _ddl in BALANCE_TRIGGERS.values():
+    event.listen(Transaction.__table__, "after_create", DDL(_ddl))
+
+
+def create_balance_triggers(connection: Connection) -> None:
+    """ Create the triggers that maintain the `account_balance` table, if they do not exist. """
+    for ddl in BALANCE_TRIGGERS.values():
+        connection.execute(text(ddl))
+
+
+def rebuild_account_balances(connection: Connection) -> None:
+    """
+        Recalculate the `account_balance` table from scratch, using a single aggregate over the `transaction` table.
+        The caller is responsible for committing.
+    """
+    connection.execute(text("DELETE FROM account_balance"))
+    connection.execute(text("""
+        INSERT INTO account_balance (account_id, debit_total, credit_total)
+        SELECT account_id, SUM(debit_amount), SUM(credit_amount)
+        FROM (
+            SELECT debit_account_id AS account_id, debit_amount, 0 AS credit_amount FROM "transaction"
+            UNION ALL
+            SELECT credit_account_id AS account_id, 0 AS debit_amount, credit_amount FROM "transaction"
+        )
+        GROUP BY account_id
+    """))
+
+
+def get_account_balances(session: Session) -> dict[int, Decimal]:
+    """
+        Returns the current balance of every account as a dictionary of {account_id: balance} pairs.
+        The balance is positive when it is on the normal side of the account type.
+    """
+    balance = case(
+        (AccountType.normal_side == 'DEBIT', AccountBalance.debit_total - AccountBalance.credit_total),
+        else_=AccountBalance.credit_total - AccountBalance.debit_total,
+    )
+    rows = session.execute(
+        select(AccountBalance.account_id, balance)
+        .join(Account, Account.id == AccountBalance.account_id)
+        .join(AccountType, AccountType.id == Account.account_type_id)
+    )
+    return {account_id: value for account_id, value in rows}
+
+
+if __name__ == '__main__':
+    from database.sqlite_handler import get_engine
+    from config import logger
+
+    with get_engine().begin() as connection:
+        rebuild_account_balances(connection)
+    logger.info("Account balances rebuilt")
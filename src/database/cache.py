@@ -0,0 +1,95 @@
+"""
+    An in-process cache of the reference data lookups (e.g. the values of the comboboxes, see `database.common_queries`).
+
+    - `cached_lookup(*models)`: Decorator that caches the result of a function without arguments, until one of the
+      models it reads is changed.
+    - The ORM changes are tracked with the session events: the models flushed (or changed by an ORM enabled
+      INSERT/UPDATE/DELETE statement) are recorded in the session, and their lookups are invalidated on `after_commit`
+      (a rollback discards them).
+    - `invalidate(*models)` / `clear()`: For the changes made outside the ORM session (e.g. Core inserts),
+      and when another database is opened.
+"""
+from collections import defaultdict
+from functools import wraps
+from threading import Lock
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+_values = {}  # {lookup: value}
+_generations = defaultdict(int)  # {lookup: number of invalidations}, a value read before an invalidation is not stored
+_lookups_by_table = defaultdict(set)  # {table name: lookups that read it}
+_lock = Lock()
+
+CHANGED_TABLES = 'cache_changed_tables'
+
+
+def cached_lookup(*models) -> callable:
+    """ Cache the result of the decorated function (without arguments) until one of `models` changes. """
+    def decorator(func: callable) -> callable:
+        for model in models:
+            _lookups_by_table[model.__tablename__].add(func.__qualname__)
+
+        @wraps(func)
+        def wrapper():
+            name = func.__qualname__
+            with _lock:
+                if name in _values:
+                    return dict(_values[name])
+                generation = _generations[name]
+
+            value = func()
+            with _lock:
+                if _generations[name] == generation:
+                    _values[name] = value
+            return dict(value)
+
+        return wrapper
+    return decorator
+
+
+def _invalidate_tables(tables: set[str]) -> None:
+    with _lock:
+        for table in tables:
+            for name in _lookups_by_table.get(table, ()):
+                _values.pop(name, None)
+                _generations[name] += 1
+
+
+def invalidate(*models) -> None:
+    """ Invalidate the lookups that read any of the models. """
+    _invalidate_tables({model.__tablename__ for model in models})
+
+
+def clear() -> None:
+    """ Invalidate every lookup. """
+    _invalidate_tables(set(_lookups_by_table))
+
+
+def _record_tables(session: Session, tables) -> None:
+    session.info.setdefault(CHANGED_TABLES, set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    _record_tables(session, {
+        instance.__table__.name for instance in (*session.new, *session.dirty, *session.deleted)
+    })
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    # The ORM enabled INSERT, UPDATE and DELETE statements (e.g. `session.query(Model).delete()`) are not flushed
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _record_tables(orm_execute_state.session, {orm_execute_state.statement.table.name})
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    if tables := session.info.pop(CHANGED_TABLES, None):
+        _invalidate_tables(tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(CHANGED_TABLES, None)
@@ -0,0 +1,224 @@
+"""
+    The balance of the accounts at any time, from monthly checkpoints (see `AccountBalanceCheckpoint`).
+
+    - The balance at a time is the last checkpoint of the account before its month, plus the transactions since then
+      (read with the `(account, local_date)` indexes), instead of every transaction before that time.
+    - The triggers delete the checkpoints of an account from the month of a transaction that is inserted, updated
+      or deleted, so the checkpoints before it are still used.
+    - `refresh_balance_checkpoints` creates the missing checkpoints, reading only the transactions after the last
+      checkpoint of each account. `select_account_totals_as_of` calls it first, up to the last month it needs
+      (skipping it while another connection is writing, so the reads do not wait for a long import).
+"""
+import time
+from config import logger
+from decimal import Decimal
+from sqlalchemy import DDL, Connection, Select, and_, case, event, func, literal, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, aliased
+from database.models import Account, AccountBalanceCheckpoint, AccountType, Transaction
+from utils import get_local_date_key
+
+
+_DELETE_CHECKPOINTS = """
+    DELETE FROM account_balance_checkpoint
+        WHERE account_id IN ({row}.debit_account_id, {row}.credit_account_id) AND month >= {row}.local_date / 100;
+"""
+
+CHECKPOINT_TRIGGERS = {
+    "trg_transaction_checkpoint_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transaction_checkpoint_insert AFTER INSERT ON "transaction"
+        BEGIN
+            {_DELETE_CHECKPOINTS.format(row='NEW')}
+        END
+    """,
+    "trg_transaction_checkpoint_delete": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transaction_checkpoint_delete AFTER DELETE ON "transaction"
+        BEGIN
+            {_DELETE_CHECKPOINTS.format(row='OLD')}
+        END
+    """,
+    "trg_transaction_checkpoint_update": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_transaction_checkpoint_update
+            AFTER UPDATE OF local_date, debit_account_id, debit_amount, credit_account_id, credit_amount ON "transaction"
+        BEGIN
+            {_DELETE_CHECKPOINTS.format(row='OLD')}
+            {_DELETE_CHECKPOINTS.format(row='NEW')}
+        END
+    """,
+}
+
+
+# New databases get the triggers along with the `transaction` table, existing ones through `database.migrations`.
+for _ddl in CHECKPOINT_TRIGGERS.values():
+    event.listen(Transaction.__table__, "after_create", DDL(_ddl))
+
+
+def create_checkpoint_triggers(connection: Connection) -> None:
+    """ Create the triggers that invalidate the `account_balance_checkpoint` table, if they do not exist. """
+    for ddl in CHECKPOINT_TRIGGERS.values():
+        connection.execute(text(ddl))
+
+
+def get_previous_month(month: int) -> int:
+    """ The month before a `YYYYMM` month. """
+    return month - 89 if month % 100 == 1 else month - 1
+
+
+# The checkpoints of the accounts with transactions (`account_balance`) that are before `until_month`
+# are added: one for each month with transactions after the last checkpoint, and one for `until_month`
+# (so the next refresh starts there). The totals are the last checkpoint plus the running sums of the months.
+_REFRESH_CHECKPOINTS = """
+    WITH last_checkpoint AS (
+        SELECT account_id, MAX(month) AS month FROM account_balance_checkpoint GROUP BY account_id
+    ),
+    pending AS (
+        SELECT account_balance.account_id, COALESCE(last_checkpoint.month, 0) AS last_month
+        FROM account_balance LEFT JOIN last_checkpoint ON last_checkpoint.account_id = account_balance.account_id
+        WHERE COALESCE(last_checkpoint.month, 0) < :until_month
+    ),
+    movements AS (
+        SELECT debit_account_id AS account_id, local_date / 100 AS month, debit_amount AS debit, 0 AS credit
+        FROM "transaction" WHERE local_date >= :start_date AND local_date < :end_date
+        UNION ALL
+        SELECT credit_account_id AS account_id, local_date / 100 AS month, 0 AS debit, credit_amount AS credit
+        FROM "transaction" WHERE local_date >= :start_date AND local_date < :end_date
+        UNION ALL
+        SELECT account_id, :until_month AS month, 0 AS debit, 0 AS credit FROM pending
+    ),
+    monthly AS (
+        SELECT movements.account_id, movements.month, SUM(movements.debit) AS debit, SUM(movements.credit) AS credit
+        FROM movements JOIN pending ON pending.account_id = movements.account_id
+        WHERE movements.month > pending.last_month
+        GROUP BY movements.account_id, movements.month
+    )
+    INSERT INTO account_balance_checkpoint (account_id, month, debit_total, credit_total)
+    SELECT
+        monthly.account_id,
+        monthly.month,
+        COALESCE(checkpoint.debit_total, 0) + SUM(monthly.debit) OVER running,
+        COALESCE(checkpoint.credit_total, 0) + SUM(monthly.credit) OVER running
+    FROM monthly
+    JOIN pending ON pending.account_id = monthly.account_id
+    LEFT JOIN account_balance_checkpoint AS checkpoint
+        ON checkpoint.account_id = pending.account_id AND checkpoint.month = pending.last_month
+    WINDOW running AS (PARTITION BY monthly.account_id ORDER BY monthly.month)
+"""
+
+
+def refresh_balance_checkpoints(connection: Connection, until_month: int = None, if_unlocked: bool = False) -> bool:
+    """
+        Create the missing checkpoints up to `until_month` (`YYYYMM`), by default the last complete month
+        (later months are not stored, the next transactions would delete them).
+        The caller is responsible for committing.
+
+        With `if_unlocked`, they are not created when another connection is writing (e.g. an import job), instead of
+        waiting for it: the reads still get the right totals, from the checkpoints that exist.
+        Returns False if the checkpoints were not created for that reason.
+    """
+    last_complete_month = get_previous_month(get_local_date_key(int(time.time())) // 100)
+    until_month = min(until_month or last_complete_month, last_complete_month)
+
+    start_month = connection.execute(text("""
+        SELECT MIN(COALESCE(last_checkpoint.month, 0))
+        FROM account_balance
+        LEFT JOIN (
+            SELECT account_id, MAX(month) AS month FROM account_balance_checkpoint GROUP BY account_id
+        ) AS last_checkpoint ON last_checkpoint.account_id = account_balance.account_id
+    """)).scalar()
+    if start_month is None or start_month >= until_month:
+        return True
+
+    # `(month + 1) * 100` is after every date of the month, also in December (e.g. 20241300)
+    parameters = {'until_month': until_month, 'start_date': (start_month + 1) * 100, 'end_date': (until_month + 1) * 100}
+    if not if_unlocked:
+        connection.execute(text(_REFRESH_CHECKPOINTS), parameters)
+        return True
+
+    busy_timeout = connection.exec_driver_sql("PRAGMA busy_timeout").scalar()
+    connection.exec_driver_sql("PRAGMA busy_timeout = 0")
+    try:
+        connection.execute(text(_REFRESH_CHECKPOINTS), parameters)
+    except OperationalError as e:
+        if 'locked' not in str(e.orig):
+            raise
+        logger.debug(f"The balance checkpoints were not created, the database is locked: {e.orig}")
+        return False
+    finally:
+        connection.exec_driver_sql(f"PRAGMA busy_timeout = {busy_timeout}")
+    return True
+
+
+def rebuild_balance_checkpoints(connection: Connection) -> None:
+    """ Delete every checkpoint and create them again. The caller is responsible for committing. """
+    connection.execute(text("DELETE FROM account_balance_checkpoint"))
+    refresh_balance_checkpoints(connection)
+
+
+def select_account_totals_as_of(session: Session, timestamp: int) -> Select:
+    """
+        Returns a query of the debit and credit totals of every account including the transactions until `timestamp`
+        (a UTC epoch timestamp), with the columns `account_id`, `debit_total` and `credit_total`.
+
+        The missing checkpoints are created first, in the session's transaction (commit it to keep them),
+        unless another connection is writing (see `refresh_balance_checkpoints`).
+    """
+    date = get_local_date_key(timestamp)
+    month = date // 100
+    refresh_balance_checkpoints(session.connection(), until_month=get_previous_month(month), if_unlocked=True)
+
+    checkpoint = aliased(AccountBalanceCheckpoint)
+    last_month = (
+        select(func.max(AccountBalanceCheckpoint.month))
+        .where(AccountBalanceCheckpoint.account_id == Account.id, AccountBalanceCheckpoint.month < month)
+        .correlate(Account)
+        .scalar_subquery()
+    )
+
+    def get_total_since_checkpoint(account_id, amount):
+        """ The sum of the `amount` of the transactions of the account after its checkpoint and until `timestamp`. """
+        return (
+            select(func.coalesce(func.sum(amount), literal(0, amount.type)))
+            .where(
+                account_id == Account.id,
+                Transaction.local_date >= (func.coalesce(checkpoint.month, 0) + 1) * 100,
+                Transaction.local_date <= date,
+                Transaction.timestamp <= timestamp,
+            )
+            .correlate(Account, checkpoint)
+            .scalar_subquery()
+        )
+
+    zero = literal(0, AccountBalanceCheckpoint.debit_total.type)
+    debit_total = func.coalesce(checkpoint.debit_total, zero) \
+        + get_total_since_checkpoint(Transaction.debit_account_id, Transaction.debit_amount)
+    credit_total = func.coalesce(checkpoint.credit_total, zero) \
+        + get_total_since_checkpoint(Transaction.credit_account_id, Transaction.credit_amount)
+    return (
+        select(Account.id.label('account_id'), debit_total.label('debit_total'), credit_total.label('credit_total'))
+        .outerjoin(checkpoint, and_(checkpoint.account_id == Account.id, checkpoint.month == last_month))
+    )
+
+
+def get_account_balances_as_of(session: Session, timestamp: int, account_ids: list[int] = None) -> dict[int, Decimal]:
+    """
+        Returns the balance of the accounts (every one by default) including the transactions until `timestamp`
+        (a UTC epoch timestamp), as a dictionary of {account_id: balance} pairs.
+        The balance is positive when it is on the normal side of the account type (as in `get_account_balances`).
+
+        The missing checkpoints are created first, in the session's transaction (commit it to keep them).
+    """
+    query = select_account_totals_as_of(session, timestamp)
+    if account_ids is not None:
+        query = query.where(Account.id.in_(account_ids))
+    totals = query.subquery()
+
+    balance = case(
+        (AccountType.normal_side == 'DEBIT', totals.c.debit_total - totals.c.credit_total),
+        else_=totals.c.credit_total - totals.c.debit_total,
+    )
+    query = (
+        select(totals.c.account_id, balance)
+        .join(Account, Account.id == totals.c.account_id)
+        .join(AccountType, AccountType.id == Account.account_type_id)
+    )
+    return {account_id: value for account_id, value in session.execute(query)}
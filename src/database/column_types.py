@@ -0,0 +1,36 @@
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+
+MONEY_DECIMALS = 2
+_MONEY_QUANTUM = Decimal(1).scaleb(-MONEY_DECIMALS)
+
+
+def to_cents(value: Decimal | str | int | float) -> int:
+    """ Convert an amount in units to an exact integer number of minor units (cents), rounding half up. """
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return int(value.quantize(_MONEY_QUANTUM, rounding=ROUND_HALF_UP).scaleb(MONEY_DECIMALS))
+
+
+def from_cents(value: int) -> Decimal:
+    """ Convert an integer number of minor units (cents) to an exact `Decimal` with two decimals. """
+    return Decimal(int(value)).scaleb(-MONEY_DECIMALS)
+
+
+class Money(TypeDecorator):
+    """
+        Stores an amount of money as an integer number of cents, and loads it back as a `Decimal` with two decimals.
+
+        The aggregates (`SUM`, `TOTAL`, etc.) are computed by SQLite using exact integer math,
+        and loading a row only costs an `int` to `Decimal` conversion (no float parsing nor quantize).
+    """
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect) -> int | None:
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value, dialect) -> Decimal | None:
+        return None if value is None else from_cents(value)
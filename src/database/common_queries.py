@@ -1,28 +1,35 @@
-
-from sqlalchemy import func
+"""
+    The reference data shown in the comboboxes. The lookups are cached until the models they read are changed
+    (see `database.cache`), so opening a form does not query the database again.
+"""
+from sqlalchemy import func, select
 from database.sqlite_handler import get_session, AccountGroup, Currency, AccountType, Account
+from database.cache import cached_lookup
 from config import AccountTypeEnum
+from typing import NamedTuple
 
 
+@cached_lookup(AccountGroup)
 def get_account_groups_values() -> list[dict[int: str]]:
     """ 
         Returns the list of account groups as a dictionary of {id: alias} pairs.
     """
     with get_session() as session:
-        account_groups = session.query(AccountGroup).order_by(func.lower(AccountGroup.name)).all()
-        return {group.id: group.alias for group in account_groups}
+        return dict(session.execute(
+            select(AccountGroup.id, AccountGroup.alias).order_by(func.lower(AccountGroup.name))
+        ).all())
 
 
+@cached_lookup(Account, AccountGroup)
 def get_accounts_values() -> list[dict[int: str]]:
     """ 
         Returns the list of accounts as a dictionary of {id: alias} pairs.
     """
     with get_session() as session:
-        # accounts = session.query(AccountGroup).order_by(func.lower(AccountGroup.alias)).all()
-        accounts = session.query(Account).all()
-        return {account.id: account.alias for account in accounts}
+        return dict(session.execute(select(Account.id, Account.alias)).all())
 
 
+@cached_lookup(AccountType)
 def get_account_types_values() -> list[dict[str: str]]:
     """ 
         Returns the list of account_types as a dictionary of {id: value} pairs.
@@ -32,6 +39,7 @@ def get_account_types_values() -> list[dict[str: str]]:
         return {account_type.id: account_type.name for account_type in account_types}
     
 
+@cached_lookup(Currency)
 def get_currencies_values() -> list[dict[int: str]]:
     """
         Returns the list of currencies as a dictionary of {id: code} pairs.
@@ -40,3 +48,24 @@ def get_currencies_values() -> list[dict[int: str]]:
         currencies = session.query(Currency).order_by(func.lower(Currency.code)).all()
         return {currency.id: currency.code for currency in currencies}
 
+
+
+class AccountEntry(NamedTuple):
+    """ The data of an account used by the transaction form. """
+    id: int
+    currency_code: str
+    normal_side: str
+
+
+@cached_lookup(Account, AccountGroup, Currency, AccountType)
+def get_account_index() -> dict[str, AccountEntry]:
+    """
+        Returns the accounts as a dictionary of {alias: AccountEntry} pairs, with a single query.
+    """
+    with get_session() as session:
+        rows = session.execute(
+            select(Account.alias, Account.id, Currency.code, AccountType.normal_side)
+            .join(Currency, Currency.id == Account.currency_id)
+            .join(AccountType, AccountType.id == Account.account_type_id)
+        )
+        return {alias: AccountEntry(id, code, normal_side) for alias, id, code, normal_side in rows}
@@ -0,0 +1,141 @@
+"""
+    Runs the database work in a background thread, so the Tk mainloop does not wait for the queries.
+
+    - `submit`: Run a function in the worker thread, and return its `Future`.
+    - `run_in_background`: Also hand the result to a callback in the Tk thread, polling the future with `after()`
+      (the Tk widgets must only be used from the thread running the mainloop).
+    - `run_job`: Like `run_in_background`, for the long jobs (e.g. an import), in a worker of their own
+      so the queries of the views do not wait for them. The jobs can be cancelled (see `check_cancelled`).
+
+    The functions run in the worker must open their own session (e.g. `with get_session() as session:`),
+    and must not touch any Tk widget or variable.
+
+    The statements issued by the background work are attributed to an action (see `database.instrumentation`),
+    named after the window that requested it by default (e.g. `TransactionEditView.get_transaction`).
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+import threading
+from tkinter import messagebox
+from config import logger
+from database.instrumentation import track
+import tkinter as tk
+
+
+# A single worker: SQLite serializes the writes anyway, and the results are delivered in the order they were requested
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-worker")
+_jobs_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-jobs")
+_jobs = set()  # The cancel events of the submitted jobs
+
+POLL_INTERVAL_MS = 20
+
+
+def submit(func: callable, *args, **kwargs) -> Future:
+    """ Run `func(*args, **kwargs)` in the database worker. """
+    return _executor.submit(func, *args, **kwargs)
+
+
+def _run_tracked(action: str, func: callable):
+    with track(action):
+        return func()
+
+
+def _get_action_name(widget: tk.Misc, func: callable) -> str:
+    while isinstance(func, partial):
+        func = func.func
+    return f"{type(widget.winfo_toplevel()).__name__}.{getattr(func, '__name__', 'run')}"
+
+
+def _show_error(error: Exception) -> None:
+    messagebox.showerror("Error", str(error))
+
+
+class JobCancelled(Exception):
+    """ Raised by a job that was cancelled (see `check_cancelled`). """
+
+
+def check_cancelled(cancel: threading.Event) -> None:
+    """ Raise `JobCancelled` if the job was cancelled. The jobs call it regularly (e.g. after each chunk). """
+    if cancel.is_set():
+        raise JobCancelled("The job was cancelled")
+
+
+def _deliver(widget: tk.Misc, future: Future, on_done: callable, on_error: callable) -> None:
+    """ Call `on_done(result)` (or `on_error(exception)`) in the Tk thread when the future is done. """
+    def poll():
+        try:
+            if not widget.winfo_exists():
+                return
+        except tk.TclError:
+            return
+        if not future.done():
+            widget.after(POLL_INTERVAL_MS, poll)
+            return
+
+        try:
+            result = future.result()
+        except Exception as error:
+            if not isinstance(error, JobCancelled):
+                logger.exception(error)
+            on_error(error)
+        else:
+            on_done(result)
+
+    widget.after(POLL_INTERVAL_MS, poll)
+
+
+def run_in_background(
+    widget: tk.Misc,
+    func: callable,
+    on_done: callable,
+    on_error: callable = _show_error,
+    action: str = None,
+) -> Future:
+    """
+        Run `func()` in the database worker, and then call `on_done(result)` (or `on_error(exception)`) in the Tk thread.
+        The callbacks are not called if the widget was destroyed in the meantime (e.g. the window was closed).
+        The statements issued by `func` are attributed to `action` (by default, the window and the function names).
+    """
+    future = submit(_run_tracked, action or _get_action_name(widget, func), func)
+    _deliver(widget, future, on_done, on_error)
+    return future
+
+
+def run_job(
+    widget: tk.Misc,
+    func: callable,
+    on_done: callable,
+    on_error: callable = _show_error,
+    action: str = None,
+) -> threading.Event:
+    """
+        Run the long job `func(cancel)` in the jobs worker, with the callbacks of `run_in_background`.
+        It returns the `cancel` event: set it to cancel the job, which must call `check_cancelled(cancel)` regularly
+        (then `on_error` receives a `JobCancelled`). The jobs are also cancelled when the application is closed.
+    """
+    cancel = threading.Event()
+
+    def run():
+        try:
+            check_cancelled(cancel)
+            return func(cancel)
+        finally:
+            _jobs.discard(cancel)
+
+    _jobs.add(cancel)
+    future = _jobs_executor.submit(_run_tracked, action or _get_action_name(widget, func), run)
+    _deliver(widget, future, on_done, on_error)
+    return cancel
+
+
+def has_jobs() -> bool:
+    """ Whether a job is waiting or running (e.g. the ledger must not be changed in the meantime). """
+    return bool(_jobs)
+
+
+def shutdown() -> None:
+    """ Cancel the pending work and the jobs, it is called when the application is closed. """
+    for cancel in list(_jobs):
+        cancel.set()
+    _executor.shutdown(wait=False, cancel_futures=True)
+    _jobs_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,231 @@
+"""
+    The financial statements, computed with aggregate queries instead of one query per account or group.
+
+    - Balance sheet: the balances as of a time (see `select_account_totals_as_of`) summed by currency, account type
+      and group in SQL, and rolled up to the ancestors of each group in a single pass over those sums.
+    - Income statement: the revenues and expenses of each account per month, from a single `GROUP BY` of the
+      `(account, local_date)` indexed transactions by month, pivoted to one column per month with pandas.
+"""
+from collections import defaultdict
+from decimal import Decimal
+import pandas as pd
+from sqlalchemy import Integer, func, select, type_coerce, union_all
+from sqlalchemy.orm import Session
+from config import ASSET_ACCOUNT_TYPES, LIABILITY_ACCOUNT_TYPES
+from database.checkpoints import select_account_totals_as_of
+from database.column_types import from_cents
+from database.models import Account, AccountGroup, AccountGroupClosure, AccountType, Currency, Transaction
+
+
+BALANCE_SHEET_SECTIONS = ('Assets', 'Liabilities', 'Equity')
+INCOME_STATEMENT_SECTIONS = ('Revenue', 'Expenses')
+INCOME_STATEMENT_INDEX = ['currency', 'section', 'account_type', 'account']
+
+
+def get_balance_sheet_section(account_type: str) -> str:
+    """ The section of the balance sheet of the accounts of a type (see `ASSET_ACCOUNT_TYPES`). """
+    if account_type in ASSET_ACCOUNT_TYPES:
+        return 'Assets'
+    if account_type in LIABILITY_ACCOUNT_TYPES:
+        return 'Liabilities'
+    return 'Equity'
+
+
+def _get_group_tree(session: Session) -> tuple[dict[int | None, list[dict]], dict[int, list[int]]]:
+    """
+        Returns the account groups as a tuple of (children, ancestors):
+            - children: The groups of each parent (None for the root groups) as {id, name}, sorted by name.
+            - ancestors: The ids of the ancestors of each group, including itself (from the closure table).
+    """
+    children = defaultdict(list)
+    for id, name, parent_id in session.execute(
+        select(AccountGroup.id, AccountGroup.name, AccountGroup.parent_id).order_by(func.lower(AccountGroup.name))
+    ):
+        children[parent_id].append({'id': id, 'name': name})
+
+    ancestors = defaultdict(list)
+    for ancestor_id, descendant_id in session.execute(
+        select(AccountGroupClosure.ancestor_id, AccountGroupClosure.descendant_id)
+    ):
+        ancestors[descendant_id].append(ancestor_id)
+    return children, ancestors
+
+
+def get_balance_sheet_rows(session: Session, timestamp: int) -> list[dict]:
+    """
+        Returns the rows of the balance sheet as of `timestamp` (a UTC epoch timestamp), in the order of the tree:
+        each currency, its sections, the account types of each section, and the account groups with accounts of the type.
+            - {key, parent_key, type, name, balance}: `type` is 'C' (currency, without balance), 'S' (section),
+              'T' (account type) or 'G' (group).
+        The amounts of different currencies are never added together. The balance of a group includes its subgroups.
+        The assets are positive on the debit side, the liabilities and the equity on the credit side,
+        so the assets are the liabilities plus the equity (unless there are exchanges between currencies).
+
+        The missing balance checkpoints are created in the session's transaction (commit it to keep them).
+    """
+    totals = select_account_totals_as_of(session, timestamp).subquery()
+    currency_type_group_totals = session.execute(
+        select(
+            Currency.code, AccountType.name, Account.account_group_id,
+            func.sum(totals.c.debit_total - totals.c.credit_total),
+        )
+        .join(Account, Account.id == totals.c.account_id)
+        .join(AccountType, AccountType.id == Account.account_type_id)
+        .join(Currency, Currency.id == Account.currency_id)
+        .group_by(Currency.code, AccountType.name, Account.account_group_id)
+    ).all()
+    children, ancestors = _get_group_tree(session)
+
+    section_balances = {}  # {currency: {section: balance}}
+    types_by_section = defaultdict(dict)  # {(currency, section): {account_type: balance}}
+    group_balances = defaultdict(dict)  # {(currency, account_type): {group_id: balance}}, including the subgroups
+    for currency, account_type, group_id, total in currency_type_group_totals:
+        section = get_balance_sheet_section(account_type)
+        balance = total if section == 'Assets' else -total
+        balances = section_balances.setdefault(currency, dict.fromkeys(BALANCE_SHEET_SECTIONS, Decimal('0.00')))
+        balances[section] += balance
+        type_balances = types_by_section[(currency, section)]
+        type_balances[account_type] = type_balances.get(account_type, 0) + balance
+        for ancestor_id in ancestors[group_id]:
+            group_balances[(currency, account_type)][ancestor_id] = \
+                group_balances[(currency, account_type)].get(ancestor_id, 0) + balance
+
+    rows = []
+
+    def add_groups(balances: dict[int, Decimal], parent_key: str, parent_id: int | None) -> None:
+        for group in children[parent_id]:
+            if group['id'] in balances:
+                key = f"{parent_key}/{group['id']}"
+                rows.append({'key': key, 'parent_key': parent_key, 'type': 'G', 'name': group['name'], 'balance': balances[group['id']]})
+                add_groups(balances, key, group['id'])
+
+    for currency in sorted(section_balances):
+        rows.append({'key': currency, 'parent_key': None, 'type': 'C', 'name': currency, 'balance': None})
+        for section in BALANCE_SHEET_SECTIONS:
+            section_key = f"{currency}/{section}"
+            rows.append({
+                'key': section_key, 'parent_key': currency, 'type': 'S', 'name': section,
+                'balance': section_balances[currency][section],
+            })
+            for account_type, balance in sorted(types_by_section[(currency, section)].items()):
+                key = f"{section_key}/{account_type}"
+                rows.append({'key': key, 'parent_key': section_key, 'type': 'T', 'name': account_type, 'balance': balance})
+                add_groups(group_balances[(currency, account_type)], key, None)
+    return rows
+
+
+def get_income_statement_months(start_date: int, end_date: int) -> list[str]:
+    """ The months (`YYYY-MM`) between two `YYYYMMDD` dates, both included. """
+    return list(pd.period_range(
+        start=f"{start_date // 10000}-{start_date // 100 % 100:02d}",
+        end=f"{end_date // 10000}-{end_date // 100 % 100:02d}",
+        freq='M',
+    ).strftime('%Y-%m'))
+
+
+def get_income_statement(session: Session, start_date: int, end_date: int) -> pd.DataFrame:
+    """
+        Returns the revenues and expenses between two `YYYYMMDD` dates (both included) as a DataFrame with the
+        (currency, section, account_type, account) index, one column per month (`YYYY-MM`, see
+        `get_income_statement_months`) and a `Total` column, sorted by currency, section, account type and account.
+        The amounts are integer cents (see `from_cents`), so the totals are computed by pandas with integer math.
+
+        Every account type that is not in the balance sheet (see `get_balance_sheet_section`) is included:
+        the credit ones are revenues and the debit ones expenses, both positive on their normal side.
+    """
+    income_accounts = (
+        select(Account.id)
+        .join(AccountType, AccountType.id == Account.account_type_id)
+        .where(AccountType.name.not_in(ASSET_ACCOUNT_TYPES + LIABILITY_ACCOUNT_TYPES))
+    )
+    accounts = pd.DataFrame(
+        session.execute(
+            income_accounts
+            .join(Currency, Currency.id == Account.currency_id)
+            .add_columns(Currency.code, Account.alias, AccountType.name, AccountType.normal_side)
+        ).all(),
+        columns=['account_id', 'currency', 'account', 'account_type', 'normal_side'],
+    )
+
+    # The amounts are summed as integer cents, so the pivot and the totals use integer columns instead of Decimal objects
+    entries = union_all(*(
+        select(
+            account_id.label('account_id'),
+            (Transaction.local_date // 100).label('month'),
+            (sign * type_coerce(amount, Integer)).label('change'),
+        )
+        .where(account_id.in_(income_accounts), Transaction.local_date.between(start_date, end_date))
+        for account_id, amount, sign in (
+            (Transaction.debit_account_id, Transaction.debit_amount, 1),
+            (Transaction.credit_account_id, Transaction.credit_amount, -1),
+        )
+    )).subquery()
+    movements = pd.DataFrame(
+        session.execute(
+            select(entries.c.account_id, entries.c.month, func.sum(entries.c.change))
+            .group_by(entries.c.account_id, entries.c.month)
+        ).all(),
+        columns=['account_id', 'month', 'change'],
+    )
+
+    months = get_income_statement_months(start_date, end_date)
+    movements = movements.merge(accounts, on='account_id')
+    movements['section'] = movements['normal_side'].map({'CREDIT': 'Revenue', 'DEBIT': 'Expenses'})
+    movements['amount'] = movements['change'].where(movements['normal_side'] == 'DEBIT', -movements['change'])
+
+    statement = (
+        movements.pivot_table(index=INCOME_STATEMENT_INDEX, columns='month', values='amount', aggfunc='sum', fill_value=0)
+        .reindex(columns=[int(month.replace('-', '')) for month in months], fill_value=0)
+    )
+    statement.columns = months
+    statement['Total'] = statement.sum(axis=1)
+    return statement.reindex(
+        sorted(statement.index, key=lambda index: (index[0], INCOME_STATEMENT_SECTIONS.index(index[1]), index[2], index[3].lower())),
+    )
+
+
+def get_income_statement_rows(statement: pd.DataFrame) -> list[dict]:
+    """
+        Returns the rows of an income statement (see `get_income_statement`) in the order of the tree: each currency,
+        its sections, their account types and accounts, and the net income of the currency (the revenues minus the expenses).
+            - {key, parent_key, type, name} and the columns of the statement as `Decimal`: `type` is 'C' (currency,
+              without amounts), 'S' (section), 'T' (account type), 'A' (account) or 'N' (net income).
+        The amounts of different currencies are never added together.
+    """
+    columns = list(statement.columns)
+    zero = [0] * len(columns)
+
+    def get_row(key: str, parent_key: str | None, type: str, name: str, cents: list[int]) -> dict:
+        return {'key': key, 'parent_key': parent_key, 'type': type, 'name': name, **dict(zip(columns, map(from_cents, cents)))}
+
+    def get_totals(levels: list[str]) -> dict[tuple, list[int]]:
+        totals = statement.groupby(level=levels).sum()
+        return dict(zip(totals.index, totals.to_numpy().tolist()))
+
+    section_totals = get_totals(['currency', 'section'])
+    type_totals = get_totals(['currency', 'section', 'account_type'])
+    accounts_by_type = defaultdict(list)
+    for (currency, section, account_type, account), cents in zip(statement.index, statement.to_numpy().tolist()):
+        accounts_by_type[(currency, section, account_type)].append((account, cents))
+
+    rows = []
+    for currency in sorted(statement.index.unique(level='currency')):
+        rows.append({'key': currency, 'parent_key': None, 'type': 'C', 'name': currency, **dict.fromkeys(columns)})
+        for section in INCOME_STATEMENT_SECTIONS:
+            section_key = f"{currency}/{section}"
+            rows.append(get_row(section_key, currency, 'S', section, section_totals.get((currency, section), zero)))
+            for (type_currency, type_section, account_type), type_cents in type_totals.items():
+                if (type_currency, type_section) == (currency, section):
+                    type_key = f"{section_key}/{account_type}"
+                    rows.append(get_row(type_key, section_key, 'T', account_type, type_cents))
+                    rows.extend(
+                        get_row(f"{type_key}/{account}", type_key, 'A', account, cents)
+                        for account, cents in accounts_by_type[(currency, section, account_type)]
+                    )
+
+        net_income = [
+            revenue - expenses for revenue, expenses
+            in zip(section_totals.get((currency, 'Revenue'), zero), section_totals.get((currency, 'Expenses'), zero))
+        ]
+        rows.append(get_row(f"{currency}/Net Income", currency, 'N', 'Net Income', net_income))
+    return rows
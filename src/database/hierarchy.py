@@ -0,0 +1,95 @@
+from sqlalchemy import DDL, Connection, event, select, text
+from sqlalchemy.orm import Session
+from database.models import Account, AccountGroup, AccountGroupClosure
+
+
+# The triggers keep `account_group.alias` and the `account_group_closure` table consistent
+# when a group is created, renamed or re-parented. The closure rows of a deleted group are removed by the foreign keys.
+_NEW_ALIAS = "COALESCE((SELECT alias FROM account_group WHERE id = NEW.parent_id) || '>', '') || NEW.name"
+
+HIERARCHY_TRIGGERS = {
+    "trg_account_group_hierarchy_insert": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_account_group_hierarchy_insert AFTER INSERT ON account_group
+        BEGIN
+            INSERT INTO account_group_closure (ancestor_id, descendant_id, depth)
+                SELECT ancestor_id, NEW.id, depth + 1 FROM account_group_closure WHERE descendant_id = NEW.parent_id
+                UNION ALL
+                SELECT NEW.id, NEW.id, 0;
+            UPDATE account_group SET alias = {_NEW_ALIAS} WHERE id = NEW.id;
+        END
+    """,
+    "trg_account_group_hierarchy_move": """
+        CREATE TRIGGER IF NOT EXISTS trg_account_group_hierarchy_move AFTER UPDATE OF parent_id ON account_group
+            WHEN OLD.parent_id IS NOT NEW.parent_id
+        BEGIN
+            -- Detach the subtree from its old ancestors, and attach it to the new ones
+            DELETE FROM account_group_closure
+                WHERE descendant_id IN (SELECT descendant_id FROM account_group_closure WHERE ancestor_id = NEW.id)
+                AND ancestor_id NOT IN (SELECT descendant_id FROM account_group_closure WHERE ancestor_id = NEW.id);
+            INSERT INTO account_group_closure (ancestor_id, descendant_id, depth)
+                SELECT supertree.ancestor_id, subtree.descendant_id, supertree.depth + subtree.depth + 1
+                FROM account_group_closure AS supertree, account_group_closure AS subtree
+                WHERE supertree.descendant_id = NEW.parent_id AND subtree.ancestor_id = NEW.id;
+        END
+    """,
+    "trg_account_group_hierarchy_alias": f"""
+        CREATE TRIGGER IF NOT EXISTS trg_account_group_hierarchy_alias AFTER UPDATE OF name, parent_id ON account_group
+        BEGIN
+            -- Replace the old alias prefix of the group and all its descendants
+            UPDATE account_group SET alias = {_NEW_ALIAS} || substr(alias, length(OLD.alias) + 1)
+                WHERE id IN (SELECT descendant_id FROM account_group_closure WHERE ancestor_id = NEW.id);
+        END
+    """,
+}
+
+# New databases get the triggers along with the `account_group` table, existing ones through `database.migrations`.
+for _ddl in HIERARCHY_TRIGGERS.values():
+    event.listen(AccountGroup.__table__, "after_create", DDL(_ddl))
+
+
+def create_hierarchy_triggers(connection: Connection) -> None:
+    """ Create the triggers that maintain the account group hierarchy, if they do not exist. """
+    for ddl in HIERARCHY_TRIGGERS.values():
+        connection.execute(text(ddl))
+
+
+def rebuild_account_group_hierarchy(connection: Connection) -> None:
+    """
+        Recalculate the aliases of the account groups and the `account_group_closure` table from the `parent_id` column.
+        The caller is responsible for committing.
+    """
+    connection.execute(text("DELETE FROM account_group_closure"))
+    connection.execute(text("""
+        WITH RECURSIVE tree (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM account_group
+            UNION ALL
+            SELECT tree.ancestor_id, child.id, tree.depth + 1
+            FROM tree JOIN account_group AS child ON child.parent_id = tree.descendant_id
+        )
+        INSERT INTO account_group_closure (ancestor_id, descendant_id, depth) SELECT * FROM tree
+    """))
+    connection.execute(text("""
+        WITH RECURSIVE path (id, alias) AS (
+            SELECT id, name FROM account_group WHERE parent_id IS NULL
+            UNION ALL
+            SELECT child.id, path.alias || '>' || child.name
+            FROM path JOIN account_group AS child ON child.parent_id = path.id
+        )
+        UPDATE account_group SET alias = (SELECT alias FROM path WHERE path.id = account_group.id)
+    """))
+
+
+def get_descendant_group_ids(session: Session, account_group_id: int) -> list[int]:
+    """ Returns the ids of the account group and all its descendants, using the closure table. """
+    return session.scalars(
+        select(AccountGroupClosure.descendant_id).where(AccountGroupClosure.ancestor_id == account_group_id)
+    ).all()
+
+
+def get_account_ids_under_group(session: Session, account_group_id: int) -> list[int]:
+    """ Returns the ids of all the accounts under the account group, at any depth. """
+    return session.scalars(
+        select(Account.id)
+        .join(AccountGroupClosure, AccountGroupClosure.descendant_id == Account.account_group_id)
+        .where(AccountGroupClosure.ancestor_id == account_group_id)
+    ).all()
@@ -0,0 +1,133 @@
+"""
+    Records the statements issued through the engine, grouped by the view or action that issued them.
+
+    - `instrument_engine`: Listen to the cursor events of an engine, to time every statement.
+    - `track`: Context manager that attributes the statements issued inside it to an action (e.g. `TransactionListView.get_data`).
+      The action is kept per thread, so the work done by the database worker is attributed as well (see `database.executor`).
+      Nested actions are not added up: the statements are attributed to the innermost one.
+    - `get_stats` / `reset_stats`: The statistics of every action, shown in the "Diagnostics" window.
+
+    The statements slower than `SLOW_QUERY_THRESHOLD_MS` are also written to a rotating log (`SLOW_QUERY_LOG`).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from logging.handlers import RotatingFileHandler
+from threading import Lock
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config import SLOW_QUERY_LOG, SLOW_QUERY_THRESHOLD_MS
+import heapq
+import logging
+import time
+
+
+UNTRACKED = "(untracked)"
+SLOWEST_STATEMENTS = 5
+SLOW_QUERY_LOG_MAX_BYTES = 1_000_000
+SLOW_QUERY_LOG_BACKUPS = 3
+
+slow_query_logger = logging.getLogger("the_vault.slow_queries")
+slow_query_logger.propagate = False
+
+_current_action: ContextVar[str] = ContextVar("current_action", default=UNTRACKED)
+
+
+@dataclass
+class ActionStats:
+    """ The statements issued by an action. The times are in seconds. """
+    name: str
+    calls: int = 0
+    statements: int = 0
+    total_time: float = 0.0
+    slowest: list[tuple[float, str]] = field(default_factory=list)
+
+    def add_statement(self, statement: str, duration: float) -> None:
+        self.statements += 1
+        self.total_time += duration
+        if len(self.slowest) < SLOWEST_STATEMENTS:
+            heapq.heappush(self.slowest, (duration, statement))
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (duration, statement))
+
+    @property
+    def statements_per_call(self) -> float:
+        return self.statements / self.calls if self.calls else float(self.statements)
+
+
+_stats: dict[str, ActionStats] = {}
+_stats_lock = Lock()
+
+
+def _get_action_stats(name: str) -> ActionStats:
+    if name not in _stats:
+        _stats[name] = ActionStats(name=name)
+    return _stats[name]
+
+
+@contextmanager
+def track(name: str):
+    """ Attribute the statements issued inside the block (in this thread) to the action `name`. """
+    with _stats_lock:
+        _get_action_stats(name).calls += 1
+    token = _current_action.set(name)
+    try:
+        yield
+    finally:
+        _current_action.reset(token)
+
+
+def get_current_action() -> str:
+    return _current_action.get()
+
+
+def get_stats() -> list[ActionStats]:
+    """ Returns a copy of the statistics of every action, the ones with the most statements first. """
+    with _stats_lock:
+        stats = [replace(action, slowest=sorted(action.slowest, reverse=True)) for action in _stats.values()]
+    return sorted(stats, key=lambda action: (-action.statements, action.name))
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def _set_slow_query_handler() -> None:
+    if not slow_query_logger.handlers:
+        handler = RotatingFileHandler(
+            SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS, delay=True
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.setLevel(logging.INFO)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    action = _current_action.get()
+    with _stats_lock:
+        _get_action_stats(action).add_statement(statement, duration)
+
+    if duration * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        slow_query_logger.info("%.1f ms [%s] %s %.200r", duration * 1000, action, " ".join(statement.split()), parameters)
+
+
+def _handle_error(exception_context):
+    # The failed statement has no `after_cursor_execute`
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """ Time the statements issued through `engine`. """
+    _set_slow_query_handler()
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
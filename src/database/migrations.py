@@ -0,0 +1,183 @@
+from sqlalchemy import Connection, Engine, inspect, text
+from database.models import Base, Transaction
+from database.balances import create_balance_triggers, rebuild_account_balances
+from database.hierarchy import create_hierarchy_triggers, rebuild_account_group_hierarchy
+from database.checkpoints import create_checkpoint_triggers
+from utils import get_local_date_key
+from config import logger
+
+
+def _migrate_amounts_to_cents(connection: Connection) -> None:
+    """ The amounts were stored as floating point `NUMERIC` values, now they are stored as integer cents. """
+    connection.execute(text("""
+        UPDATE "transaction" SET
+            debit_amount = CAST(ROUND(debit_amount * 100) AS INTEGER),
+            credit_amount = CAST(ROUND(credit_amount * 100) AS INTEGER)
+    """))
+    connection.execute(text('UPDATE account_overdraft SET "limit" = CAST(ROUND("limit" * 100) AS INTEGER)'))
+    rebuild_account_balances(connection)
+    create_balance_triggers(connection)
+
+
+def _replace_column(connection: Connection, table: str, column: str, definition: str, expression: str) -> None:
+    """
+        Replace a column with a new definition (e.g. to change its type affinity). The column is moved to the end of the table.
+        SQLite can not alter the type of a column, so a new column is added, filled using `expression`
+        (which can reference the old column), and then renamed over the old one.
+    """
+    connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column}__new {definition}'))
+    connection.execute(text(f'UPDATE {table} SET {column}__new = {expression}'))
+    connection.execute(text(f'ALTER TABLE {table} DROP COLUMN {column}'))
+    connection.execute(text(f'ALTER TABLE {table} RENAME COLUMN {column}__new TO {column}'))
+
+
+def _migrate_timestamps_to_epoch(connection: Connection) -> None:
+    """
+        The timestamps were stored as UTC datetime strings, now they are stored as UTC epoch integers.
+        The `transaction` table also gets the indexed `local_date` column.
+    """
+    for table, column, definition in (
+        ('"transaction"', 'timestamp', 'INTEGER NOT NULL DEFAULT 0'),
+        ('account', 'opened_at', 'INTEGER NOT NULL DEFAULT 0'),
+        ('account', 'closed_at', 'INTEGER'),
+        ('account_overdraft', 'started_at', 'INTEGER NOT NULL DEFAULT 0'),
+        ('account_overdraft', 'ended_at', 'INTEGER'),
+    ):
+        _replace_column(connection, table, column, definition, expression=f"CAST(strftime('%s', {column}) AS INTEGER)")
+
+    connection.execute(text('ALTER TABLE "transaction" ADD COLUMN local_date INTEGER NOT NULL DEFAULT 0'))
+    rows = connection.execute(text('SELECT id, timestamp FROM "transaction"')).all()
+    if rows:
+        connection.execute(
+            text('UPDATE "transaction" SET local_date = :local_date WHERE id = :id'),
+            [{'id': id, 'local_date': get_local_date_key(timestamp)} for id, timestamp in rows],
+        )
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_transaction_timestamp ON "transaction" (timestamp)'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS ix_transaction_local_date ON "transaction" (local_date)'))
+
+
+def _migrate_hot_path_indexes(connection: Connection) -> None:
+    """ Index the foreign keys used to join and filter the transactions, accounts and groups. """
+    for table, column in (
+        ('transaction', 'debit_account_id'),
+        ('transaction', 'credit_account_id'),
+        ('account', 'account_group_id'),
+        ('account_group', 'parent_id'),
+        ('account_overdraft', 'account_id'),
+    ):
+        connection.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON "{table}" ({column})'))
+    connection.execute(text('ANALYZE'))
+
+
+def _migrate_account_group_hierarchy(connection: Connection) -> None:
+    """ Store the alias of the account groups, and fill the `account_group_closure` table (created from the models). """
+    connection.execute(text("ALTER TABLE account_group ADD COLUMN alias VARCHAR NOT NULL DEFAULT ''"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_account_group_alias ON account_group (alias)"))
+    rebuild_account_group_hierarchy(connection)
+    create_hierarchy_triggers(connection)
+
+
+def _migrate_import_fingerprint(connection: Connection) -> None:
+    """ Add the unique fingerprint of the imported transactions (the existing transactions have none). """
+    connection.execute(text('ALTER TABLE "transaction" ADD COLUMN import_fingerprint VARCHAR'))
+    connection.execute(text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS ix_transaction_import_fingerprint ON "transaction" (import_fingerprint)'
+    ))
+
+
+def _migrate_balance_checkpoints(connection: Connection) -> None:
+    """
+        Index the transactions of each account by date, and invalidate the balance checkpoints with triggers
+        (the `account_balance_checkpoint` table is created from the models, and filled on demand).
+    """
+    for column in ('debit_account_id', 'credit_account_id'):
+        connection.execute(text(
+            f'CREATE INDEX IF NOT EXISTS ix_transaction_{column}_local_date ON "transaction" ({column}, local_date)'
+        ))
+    create_checkpoint_triggers(connection)
+    connection.execute(text('ANALYZE'))
+
+
+# The version of the schema is the position of the migration in the list (starting at 1).
+# Append new migrations at the end, never reorder nor remove them.
+MIGRATIONS = [
+    _migrate_amounts_to_cents,
+    _migrate_timestamps_to_epoch,
+    _migrate_hot_path_indexes,
+    _migrate_account_group_hierarchy,
+    _migrate_import_fingerprint,
+    _migrate_balance_checkpoints,
+]
+
+LATEST_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(connection: Connection) -> int:
+    return connection.execute(text("PRAGMA user_version")).scalar()
+
+
+def set_schema_version(connection: Connection, version: int) -> None:
+    connection.execute(text(f"PRAGMA user_version = {int(version)}"))
+
+
+def _run_in_transaction(connection: Connection, func: callable) -> None:
+    """
+        Run `func(connection)` in a single SQLite transaction.
+        The `BEGIN` is explicit because `pysqlite` does not open a transaction before DDL statements.
+    """
+    connection.exec_driver_sql("BEGIN IMMEDIATE")
+    try:
+        func(connection)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+
+def run_migrations(connection: Connection) -> None:
+    """
+        Apply the pending migrations to the database, each one in its own transaction,
+        and store the new version in `PRAGMA user_version`.
+    """
+    for version in range(get_schema_version(connection) + 1, LATEST_VERSION + 1):
+        migration = MIGRATIONS[version - 1]
+        logger.info(f"Applying migration {version}: {migration.__name__}")
+
+        def apply(connection: Connection) -> None:
+            migration(connection)
+            set_schema_version(connection, version)
+
+        _run_in_transaction(connection, apply)
+
+
+def upgrade_database(engine: Engine) -> None:
+    """
+        Bring the database to the latest schema version. It is called once on startup.
+
+        - If the stored version is the latest, nothing else is done (the metadata is not reflected).
+        - A new database is created from the models, and stamped with the latest version.
+        - An existing database gets the new tables from the models, and then the pending migrations.
+    """
+    with engine.connect() as connection:
+        version = get_schema_version(connection)
+        if version == LATEST_VERSION:
+            return
+        if version > LATEST_VERSION:
+            raise RuntimeError(f"The database version ({version}) is newer than the application ({LATEST_VERSION})")
+
+        is_new_database = not inspect(connection).has_table(Transaction.__tablename__)
+
+        def create_tables(connection: Connection) -> None:
+            Base.metadata.create_all(connection)
+            if is_new_database:
+                set_schema_version(connection, LATEST_VERSION)
+
+        _run_in_transaction(connection, create_tables)
+        run_migrations(connection)
+
+
+if __name__ == '__main__':
+    from database.sqlite_handler import get_engine
+
+    with get_engine().connect() as connection:
+        logger.info(f"Database schema version: {get_schema_version(connection)} (latest: {LATEST_VERSION})")
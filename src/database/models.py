@@ -1,9 +1,11 @@
-from sqlalchemy import DateTime, String, ForeignKey, func
+from sqlalchemy import DateTime, FetchedValue, Index, String, ForeignKey, func, select
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from datetime import datetime
 from typing_extensions import Annotated
 from decimal import Decimal
-from sqlalchemy.orm import foreign, remote
+from sqlalchemy.orm import column_property, foreign, remote, validates
+from database.column_types import Money
+from utils import get_local_date_key
 
 # type_timestamp = Annotated[datetime, mapped_column(nullable=False, server_default=func.CURRENT_TIMESTAMP()),]
 # str_30 = Annotated[str, 30]
@@ -29,21 +31,31 @@ class Currency(Base):
 
 
 class AccountGroup(Base):
+    """
+        alias: The path of the group (`Parent>Child>Name`).
+            It is maintained by the database triggers defined in `database.hierarchy`, do not write to it directly.
+    """
     __tablename__ = "account_group"
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(nullable=False, unique=True)
     description: Mapped[str|None] = mapped_column(nullable=False, default="")
-    parent_id : Mapped[int|None] = mapped_column(ForeignKey("account_group.id"))
+    parent_id : Mapped[int|None] = mapped_column(ForeignKey("account_group.id"), index=True)
+    alias: Mapped[str] = mapped_column(nullable=False, index=True, server_default="", server_onupdate=FetchedValue())
 
     parent: Mapped["AccountGroup"] = relationship("AccountGroup", remote_side="AccountGroup.id", back_populates="children")
     children: Mapped[list["AccountGroup"]] = relationship("AccountGroup", back_populates="parent")
     accounts: Mapped[list["Account"]] = relationship(back_populates="account_group")
 
-    @property
-    def alias(self):
-        if self.parent_id is not None:
-            return f"{self.parent.alias}>{self.name}"
-        return self.name
+
+class AccountGroupClosure(Base):
+    """
+        Every (ancestor, descendant) pair of the account groups hierarchy, including each group with itself at depth 0.
+        It is maintained by the database triggers defined in `database.hierarchy`, do not write to it directly.
+    """
+    __tablename__ = "account_group_closure"
+    ancestor_id: Mapped[int] = mapped_column(ForeignKey("account_group.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(ForeignKey("account_group.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth: Mapped[int] = mapped_column(nullable=False)
 
 
 class AccountType(Base):
@@ -61,8 +73,8 @@ class AccountType(Base):
 class Account(Base):
     """
     Account model
-        opened_at: The date the account was opened in UTC
-        closed_at: The date the account was closed in UTC
+        opened_at: The date the account was opened as a UTC epoch timestamp
+        closed_at: The date the account was closed as a UTC epoch timestamp
         account_type: The formal accounting type of the account
     """
     __tablename__ = "account"
@@ -71,19 +83,24 @@ class Account(Base):
     description: Mapped[str|None] = mapped_column(nullable=False, default="")
     account_number: Mapped[str|None] = mapped_column(nullable=False, default="")
     currency_id: Mapped[int] = mapped_column(ForeignKey("currency.id"))
-    opened_at: Mapped[str]
-    closed_at: Mapped[str|None]
-    account_group_id: Mapped[int] = mapped_column(ForeignKey("account_group.id"))
+    opened_at: Mapped[int]
+    closed_at: Mapped[int|None]
+    account_group_id: Mapped[int] = mapped_column(ForeignKey("account_group.id"), index=True)
     account_type_id: Mapped[int] = mapped_column(ForeignKey("account_type.id"))
     
     currency: Mapped["Currency"] = relationship("Currency")
     account_group: Mapped["AccountGroup"] = relationship(back_populates="accounts")
     account_type: Mapped["AccountType"] = relationship("AccountType", back_populates="accounts")
     account_overdrafts: Mapped[list["AccountOverdraft"]] = relationship("AccountOverdraft", back_populates="account")
-    
-    @property
-    def alias(self):
-        return f"{self.account_group.alias}>{self.name}"
+    balance: Mapped["AccountBalance"] = relationship("AccountBalance", back_populates="account", uselist=False)
+
+    # The alias (`Group>Name`) is loaded with the account, reading the stored alias of its group
+    alias: Mapped[str] = column_property(
+        select(AccountGroup.alias + ">" + name)
+        .where(AccountGroup.id == account_group_id)
+        .correlate_except(AccountGroup)
+        .scalar_subquery()
+    )
 
     @property
     def overdraft_limit(self):
@@ -92,34 +109,88 @@ class Account(Base):
 class AccountOverdraft(Base):
     __tablename__ = "account_overdraft"
     id: Mapped[int] = mapped_column(primary_key=True)
-    account_id: Mapped[int] = mapped_column(ForeignKey("account.id"))
-    limit: Mapped[Decimal]
-    started_at : Mapped[str]
-    ended_at : Mapped[str|None]
+    account_id: Mapped[int] = mapped_column(ForeignKey("account.id"), index=True)
+    limit: Mapped[Decimal] = mapped_column(Money)
+    started_at : Mapped[int]
+    ended_at : Mapped[int|None]
     
     account = relationship("Account", back_populates="account_overdrafts")
 
 
+def _default_local_date(context) -> int:
+    """ Default of `Transaction.local_date` for the inserts that do not go through the ORM (e.g. bulk inserts). """
+    return get_local_date_key(context.get_current_parameters()['timestamp'])
+
+
 class Transaction(Base):
     """
        Transaction model 
+        timestamp: UTC epoch timestamp
+        local_date: The local date of the timestamp as an integer `YYYYMMDD`, used to group by day or month.
+            It is set automatically from the timestamp.
+        debit_amount, credit_amount: Stored as integer cents (see `database.column_types.Money`)
+        import_fingerprint: The fingerprint of the statement line it was imported from (see `database.statement_import`),
+            unique to skip the lines already imported. It is NULL for the transactions entered by hand.
     """
     __tablename__ = "transaction"
+    __table_args__ = (
+        # The movements of an account since a date, see `database.checkpoints`
+        Index("ix_transaction_debit_account_id_local_date", "debit_account_id", "local_date"),
+        Index("ix_transaction_credit_account_id_local_date", "credit_account_id", "local_date"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True)
-    timestamp: Mapped[str]
+    timestamp: Mapped[int] = mapped_column(index=True)
+    local_date: Mapped[int] = mapped_column(index=True, default=_default_local_date)
     description: Mapped[str|None] = mapped_column(nullable=False, default="")
     installment_number: Mapped[int|None] = mapped_column(nullable=False, default=1)
     installment_total: Mapped[int|None] = mapped_column(nullable=False, default=1)
     debit_reference: Mapped[str|None] = mapped_column(nullable=False, default="")
-    debit_account_id: Mapped[int] = mapped_column(ForeignKey("account.id"))
-    debit_amount: Mapped[Decimal]
+    debit_account_id: Mapped[int] = mapped_column(ForeignKey("account.id"), index=True)
+    debit_amount: Mapped[Decimal] = mapped_column(Money)
     credit_reference: Mapped[str|None] = mapped_column(nullable=False, default="")
-    credit_account_id: Mapped[int] = mapped_column(ForeignKey("account.id"))
-    credit_amount: Mapped[Decimal]
+    credit_account_id: Mapped[int] = mapped_column(ForeignKey("account.id"), index=True)
+    credit_amount: Mapped[Decimal] = mapped_column(Money)
     is_reconciled: Mapped[bool] = mapped_column(nullable=False, default=False)
+    import_fingerprint: Mapped[str|None] = mapped_column(unique=True, index=True)
     
     debit_account = relationship("Account", foreign_keys=[debit_account_id])
     credit_account = relationship("Account", foreign_keys=[credit_account_id])
+
+    @validates("timestamp")
+    def _validate_timestamp(self, key: str, value: int) -> int:
+        self.local_date = get_local_date_key(value)
+        return value
+
+
+class AccountBalance(Base):
+    """
+        Running totals of the transactions of an account.
+        It is maintained by the database triggers defined in `database.balances`, do not write to it directly.
+            debit_total: The sum of the amounts where the account is debited
+            credit_total: The sum of the amounts where the account is credited
+    """
+    __tablename__ = "account_balance"
+    account_id: Mapped[int] = mapped_column(ForeignKey("account.id", ondelete="CASCADE"), primary_key=True)
+    debit_total: Mapped[Decimal] = mapped_column(Money, nullable=False, default=0)
+    credit_total: Mapped[Decimal] = mapped_column(Money, nullable=False, default=0)
+
+    account = relationship("Account", back_populates="balance")
+
+
+class AccountBalanceCheckpoint(Base):
+    """
+        The totals of the transactions of an account up to the end of a month (of the local dates), to get the balance
+        at any time without reading every transaction before it (see `database.checkpoints`).
+        The triggers defined there delete the checkpoints of the month of a changed transaction and after it,
+        and `refresh_balance_checkpoints` creates them again. Do not write to it directly.
+            month: The month as an integer `YYYYMM`
+            debit_total, credit_total: As in `AccountBalance`, for the transactions until the end of the month
+    """
+    __tablename__ = "account_balance_checkpoint"
+    account_id: Mapped[int] = mapped_column(ForeignKey("account.id", ondelete="CASCADE"), primary_key=True)
+    month: Mapped[int] = mapped_column(primary_key=True)
+    debit_total: Mapped[Decimal] = mapped_column(Money, nullable=False, default=0)
+    credit_total: Mapped[Decimal] = mapped_column(Money, nullable=False, default=0)
     
 
 
@@ -0,0 +1,47 @@
+"""
+    The PRAGMA statements run on every new SQLite connection, grouped in profiles (selected with `SQLITE_PROFILE`).
+
+    - `safe`: Only the foreign key constraints, with the SQLite defaults (rollback journal, synchronous FULL).
+    - `performance`: WAL journaling with synchronous NORMAL (a commit does not wait for the disk, but the database
+      can not be corrupted; a power loss may only lose the last commits), a busy timeout, and larger memory caches.
+
+    The `journal_mode` is stored in the database file, so a database opened once with `performance` stays in WAL mode
+    (with its `-wal` and `-shm` files next to it). It has no effect on in-memory databases.
+"""
+from sqlalchemy import Engine, event
+from config import SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE_MB
+
+
+PRAGMA_PROFILES = {
+    'safe': {
+        'foreign_keys': 'ON',
+    },
+    'performance': {
+        'foreign_keys': 'ON',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        # A negative cache size is in KiB, instead of pages
+        'cache_size': -SQLITE_CACHE_SIZE_KB,
+        'mmap_size': SQLITE_MMAP_SIZE_MB * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+def apply_pragmas(dbapi_connection, profile: str) -> None:
+    """ Run the PRAGMA statements of the profile on a DBAPI (`sqlite3`) connection. """
+    cursor = dbapi_connection.cursor()
+    for name, value in PRAGMA_PROFILES[profile].items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def set_pragma_profile(engine: Engine, profile: str) -> None:
+    """ Apply the profile to every new connection of the engine. """
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown SQLite profile {profile!r}, it must be one of: {', '.join(PRAGMA_PROFILES)}")
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, profile)
@@ -1,35 +1,97 @@
+"""
+    The application's database. The engine is created on first use (`get_engine`, `get_session`), from `DATABASE_PATH`,
+    so importing the views does not open or create any database.
+
+    - `open_database`: Use another ledger file (File > Open / New), or `:memory:` for tests and benchmarks.
+    - `close_database`: Dispose the engine; the next `get_engine` opens `DATABASE_PATH` again.
+"""
 from config import logger
-from sqlalchemy import create_engine, event
+from sqlalchemy import Engine, create_engine
 from sqlalchemy.orm import Session
-from datetime import datetime
-from config import SQLALQUEMY_ECHO
+from sqlalchemy.pool import StaticPool
+from threading import RLock
+from config import DATABASE_PATH, SQLALQUEMY_ECHO, SQLITE_PROFILE
 from database.models import *
-import os
+from database.migrations import upgrade_database
+from database.instrumentation import instrument_engine
+from database.pragmas import set_pragma_profile
+from database import cache
+
+
+MEMORY_DATABASE = ':memory:'
+
+_engine: Engine | None = None
+_database_path: str | None = None
+# The engine is also requested from the database worker (see `database.executor`)
+_engine_lock = RLock()
+
+
+def create_database_engine(path: str, profile: str = SQLITE_PROFILE) -> Engine:
+    """ Create an engine for the SQLite file (or `:memory:`), with the pragma profile and the instrumentation. """
+    if path == MEMORY_DATABASE:
+        # A single connection shared by the threads, otherwise each connection would be a new empty database
+        engine = create_engine(
+            "sqlite+pysqlite://",
+            echo=SQLALQUEMY_ECHO,
+            logging_name=logger.name,
+            connect_args={'check_same_thread': False},
+            poolclass=StaticPool,
+        )
+    else:
+        engine = create_engine(f"sqlite+pysqlite:///{path}", echo=SQLALQUEMY_ECHO, logging_name=logger.name)
 
+    # Enables the foreign key constraints, and the performance settings of the profile
+    set_pragma_profile(engine, profile)
+    instrument_engine(engine)
+    return engine
 
-engine = create_engine(
-    f"sqlite+pysqlite:///{os.path.join(os.path.dirname(os.path.abspath(__file__)), 'the_vault.db')}",
-    echo=SQLALQUEMY_ECHO,
-    logging_name=logger.name
-)
 
-@event.listens_for(engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
+def open_database(path: str, profile: str = SQLITE_PROFILE) -> Engine:
     """
-        This is used to enable foreign key constraints in SQLite.
+        Use the database in `path` from now on, creating it (or upgrading its schema) if needed.
+        The engine of the previous database is disposed.
     """
-    cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON")
-    cursor.close()
+    global _engine, _database_path
 
+    engine = create_database_engine(path, profile=profile)
+    try:
+        upgrade_database(engine)
+    except Exception:
+        engine.dispose()
+        raise
 
-Base.metadata.create_all(engine)
+    with _engine_lock:
+        previous_engine, _engine, _database_path = _engine, engine, path
+    # The cached lookups are the ones of the previous database
+    cache.clear()
+    if previous_engine is not None:
+        previous_engine.dispose()
+    logger.info(f"Opened the database {path}")
+    return engine
 
-def get_session() -> Session:
-    return Session(engine)
+
+def close_database() -> None:
+    global _engine, _database_path
+
+    with _engine_lock:
+        engine, _engine, _database_path = _engine, None, None
+    cache.clear()
+    if engine is not None:
+        engine.dispose()
 
 
+def get_engine() -> Engine:
+    """ Returns the engine of the open database, opening `DATABASE_PATH` on first use. """
+    with _engine_lock:
+        if _engine is None:
+            open_database(DATABASE_PATH)
+        return _engine
 
 
-    
+def get_database_path() -> str | None:
+    """ Returns the path of the open database, or None if it was not opened yet. """
+    return _database_path
 
+
+def get_session() -> Session:
+    return Session(get_engine())
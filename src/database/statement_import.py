@@ -0,0 +1,353 @@
+"""
+    Import the statements exported by Santander (the CSV, or the XLSX saved as text) as transactions.
+
+    The pipeline is streamed, so the memory used does not depend on the size of the file:
+
+    1. `read_statement`: Yields a `StatementLine` for each row of the file, as it is read.
+    2. `MappingRules.get_transaction`: Maps each line to the values of a `Transaction`, between the account of the
+       statement and the counterpart account of the first rule that matches its description.
+    3. `import_statement`: Inserts the transactions in chunks (one `executemany` each), all in one database transaction,
+       and reports the progress after each chunk.
+
+    Each imported transaction stores the fingerprint of its line (see `get_fingerprint`) in the unique
+    `Transaction.import_fingerprint` column. The lines of a chunk whose fingerprint is already stored are skipped
+    (one indexed lookup per chunk), so importing a statement again, or one whose period overlaps, is idempotent.
+"""
+import csv
+import hashlib
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Iterable, Iterator, NamedTuple, TextIO
+from sqlalchemy import Engine, insert, select
+from database.models import Transaction
+from utils import get_datetime_to_db, get_local_date_key
+
+
+IMPORT_CHUNK_SIZE = 5_000
+HEADER_SEARCH_ROWS = 50  # The exports start with a few rows about the account, before the header
+DELIMITERS = (',', ';', '\t')
+
+
+class StatementLine(NamedTuple):
+    """
+        A movement of the statement. The amount is positive when it increases the balance of the statement's account
+        as the bank shows it (a deposit in an account, a payment of a credit card), and negative otherwise.
+    """
+    line_number: int
+    timestamp: int
+    description: str
+    reference: str
+    amount: Decimal
+    installment_number: int = 1
+    installment_total: int = 1
+
+
+@dataclass(frozen=True)
+class StatementFormat:
+    """
+        The columns of a statement export (the names are compared without case and accents).
+            - amount_columns: The first one that has a value is used.
+            - negate: The amounts are negated (e.g. the charges of a credit card are positive in the summary).
+    """
+    name: str
+    date_column: str
+    description_column: str
+    reference_column: str | None
+    amount_columns: tuple[str, ...]
+    installments_column: str | None = None
+    negate: bool = False
+
+
+STATEMENT_FORMATS = {
+    'santander_account': StatementFormat(
+        name="Santander Account Summary",
+        date_column='fecha',
+        description_column='descripcion',
+        reference_column='referencia',
+        amount_columns=('importe', 'caja de ahorro', 'cuenta corriente'),
+    ),
+    'santander_credit_card': StatementFormat(
+        name="Santander CreditCard Summary",
+        date_column='fecha',
+        description_column='descripcion',
+        reference_column='comprobante',
+        amount_columns=('pesos', 'importe'),
+        installments_column='cuotas',
+        negate=True,
+    ),
+}
+
+_ACCENTS = str.maketrans('áéíóúü', 'aeiouu')
+_INSTALLMENTS = re.compile(r'(\d+)\s*/\s*(\d+)')
+
+
+def _normalize_header(value: str) -> str:
+    return value.strip().lower().translate(_ACCENTS)
+
+
+def parse_amount(value: str) -> Decimal | None:
+    """ Parse an amount as shown in the exports (`-1.234,56`, `$ 1234.56`), or None if it is empty. """
+    value = value.strip().replace('$', '').replace(' ', '')
+    if not value:
+        return None
+    if ',' in value:
+        # Spanish format: dots for the thousands and a comma for the decimals
+        value = value.replace('.', '').replace(',', '.')
+    try:
+        return Decimal(value).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ValueError(f"Could not parse the amount '{value}'")
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str) -> int:
+    """ Parse a date of the exports (`DD/MM/YYYY`, or ISO) to a UTC epoch timestamp, at noon of the local day. """
+    value = value.strip()
+    for format in ('%d/%m/%Y', '%d/%m/%y', '%d-%m-%Y', '%Y-%m-%d'):
+        try:
+            date = datetime.strptime(value, format)
+        except ValueError:
+            continue
+        return get_datetime_to_db(date.strftime('%Y-%m-%d 12:00:00'))
+    raise ValueError(f"Could not parse the date '{value}'")
+
+
+class ProgressReader:
+    """ Iterates over the lines of a text file, keeping the position (in bytes) read, to report the progress. """
+
+    def __init__(self, file: TextIO):
+        self._file = file
+        self.position = 0
+
+    def __iter__(self) -> Iterator[str]:
+        for line in self._file:
+            # The text is decoded in blocks, so the position advances by blocks
+            self.position = self._file.buffer.tell()
+            yield line
+
+
+def _get_delimiter(sample: str) -> str:
+    """ The most frequent of the delimiters used by the exports (`csv.Sniffer` fails with the rows before the header). """
+    return max(DELIMITERS, key=sample.count)
+
+
+def read_statement(lines: Iterable[str], statement_format: StatementFormat) -> Iterator[StatementLine]:
+    """
+        Yields the lines of a statement export (e.g. an open file), one row at a time.
+        The rows before the header, and the rows without date or amount (e.g. the totals), are skipped.
+        It raises a `ValueError` with the line number if a row can not be parsed.
+    """
+    lines = iter(lines)
+    head = list(islice(lines, HEADER_SEARCH_ROWS))
+    rows = csv.reader(chain(head, lines), delimiter=_get_delimiter(''.join(head)))
+
+    columns = None
+    for line_number, row in enumerate(islice(rows, HEADER_SEARCH_ROWS), start=1):
+        headers = [_normalize_header(value) for value in row]
+        if statement_format.date_column in headers and statement_format.description_column in headers:
+            columns = {header: index for index, header in enumerate(headers) if header}
+            break
+    if columns is None:
+        raise ValueError(f"The header of the {statement_format.name} was not found (a '{statement_format.date_column}' column)")
+    amount_indexes = [columns[name] for name in statement_format.amount_columns if name in columns]
+    if not amount_indexes:
+        raise ValueError(f"The {statement_format.name} has none of the amount columns: {', '.join(statement_format.amount_columns)}")
+
+    def get(row: list[str], column: str | None) -> str:
+        index = columns.get(column)
+        return row[index].strip() if index is not None and index < len(row) else ''
+
+    def get_amount(row: list[str]) -> Decimal | None:
+        for index in amount_indexes:
+            if index < len(row) and (amount := parse_amount(row[index])) is not None:
+                return amount
+        return None
+
+    for line_number, row in enumerate(rows, start=line_number + 1):
+        try:
+            # The lines without date (e.g. the balances and totals) and the zero amounts are not transactions,
+            # the amount columns of the lines without date may have any text
+            if not get(row, statement_format.date_column):
+                continue
+            amount = get_amount(row)
+            if not amount:
+                continue
+            installments = _INSTALLMENTS.search(get(row, statement_format.installments_column))
+            yield StatementLine(
+                line_number=line_number,
+                timestamp=parse_date(get(row, statement_format.date_column)),
+                description=get(row, statement_format.description_column),
+                reference=get(row, statement_format.reference_column),
+                amount=-amount if statement_format.negate else amount,
+                installment_number=int(installments.group(1)) if installments else 1,
+                installment_total=int(installments.group(2)) if installments else 1,
+            )
+        except ValueError as e:
+            raise ValueError(f"Line {line_number}: {e}") from e
+
+
+@dataclass
+class MappingRules:
+    """
+        Maps the lines of a statement to transactions.
+            - statement_account_id: The account of the statement (e.g. the bank account, or the credit card).
+            - rules: (pattern, account_id) pairs; the counterpart is the account of the first pattern (a regular
+              expression, without case) found in the description.
+            - default_account_id: The counterpart when no rule matches.
+        The counterparts must be different from the statement account (as in `validate_transaction_values`),
+        otherwise it raises a `ValueError`.
+    """
+    statement_account_id: int
+    default_account_id: int
+    rules: list[tuple[str, int]] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.default_account_id == self.statement_account_id:
+            raise ValueError("The default counterpart must be different from the statement account")
+        for pattern, account_id in self.rules:
+            if account_id == self.statement_account_id:
+                raise ValueError(f"The rule '{pattern}' must map to an account different from the statement account")
+        self._compiled_rules = [(re.compile(pattern, re.IGNORECASE), account_id) for pattern, account_id in self.rules]
+
+    def get_counterpart_account_id(self, description: str) -> int:
+        for pattern, account_id in self._compiled_rules:
+            if pattern.search(description):
+                return account_id
+        return self.default_account_id
+
+    def get_transaction(self, line: StatementLine) -> dict:
+        """ The values of the `Transaction` of a line: the side of the statement's account follows the amount sign. """
+        counterpart_id = self.get_counterpart_account_id(line.description)
+        amount = abs(line.amount)
+        if line.amount >= 0:
+            debit_account_id, credit_account_id = self.statement_account_id, counterpart_id
+        else:
+            debit_account_id, credit_account_id = counterpart_id, self.statement_account_id
+        return {
+            'timestamp': line.timestamp,
+            'description': line.description,
+            'installment_number': line.installment_number,
+            'installment_total': line.installment_total,
+            'debit_reference': line.reference,
+            'debit_account_id': debit_account_id,
+            'debit_amount': amount,
+            'credit_reference': line.reference,
+            'credit_account_id': credit_account_id,
+            'credit_amount': amount,
+            'is_reconciled': False,
+        }
+
+
+class ImportResult(NamedTuple):
+    read: int
+    imported: int
+
+    @property
+    def duplicates(self) -> int:
+        """ The lines skipped because they were already imported. """
+        return self.read - self.imported
+
+
+def get_fingerprint(account_id: int, line: StatementLine, occurrence: int = 1) -> str:
+    """
+        The fingerprint of a statement line: a hash of its account, local date, amount and reference, normalized
+        (the spreadsheets drop the leading zeros of the references).
+        The lines with the same values (e.g. two equal purchases on the same day, without reference) are told apart by
+        their `occurrence` in the lines of their day, so a statement must include every line of its first and last days.
+    """
+    date, cents, reference = _get_fingerprint_values(line)
+    key = f"{account_id}|{date}|{cents}|{reference}|{occurrence}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def _get_fingerprint_values(line: StatementLine) -> tuple[int, int, str]:
+    return get_local_date_key(line.timestamp), int(line.amount * 100), line.reference.strip().upper().lstrip('0')
+
+
+def _with_fingerprints(lines: Iterable[StatementLine], account_id: int) -> Iterator[tuple[StatementLine, str]]:
+    """
+        The occurrences only tell apart the equal lines of the same day, so they are counted for the current day
+        and the lines of each day must be together (the statements are sorted by date, in either order),
+        otherwise it raises a `ValueError`.
+    """
+    occurrences = Counter()
+    current_date = None
+    finished_dates = set()
+    for line in lines:
+        values = _get_fingerprint_values(line)
+        if values[0] != current_date:
+            if values[0] in finished_dates:
+                raise ValueError(f"Line {line.line_number}: The statement must be sorted by date")
+            if current_date is not None:
+                finished_dates.add(current_date)
+            current_date = values[0]
+            occurrences.clear()
+        occurrences[values] += 1
+        yield line, get_fingerprint(account_id, line, occurrences[values])
+
+
+def _chunks(values: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(values)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_statement(
+    engine: Engine,
+    lines: Iterable[StatementLine],
+    rules: MappingRules,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_progress: callable = None,
+) -> ImportResult:
+    """
+        Insert the transactions of the lines that were not imported before, in chunks of `chunk_size`,
+        in a single database transaction (nothing is imported if any line fails).
+        `on_progress(read)` is called after each chunk, with the number of lines read.
+    """
+    read = imported = 0
+    with engine.begin() as connection:
+        for chunk in _chunks(_with_fingerprints(lines, rules.statement_account_id), chunk_size):
+            existing = set(connection.scalars(
+                select(Transaction.import_fingerprint)
+                .where(Transaction.import_fingerprint.in_([fingerprint for _, fingerprint in chunk]))
+            ))
+            rows = [
+                {**rules.get_transaction(line), 'import_fingerprint': fingerprint}
+                for line, fingerprint in chunk if fingerprint not in existing
+            ]
+            if rows:
+                connection.execute(insert(Transaction), rows)
+            read += len(chunk)
+            imported += len(rows)
+            if on_progress:
+                on_progress(read)
+    return ImportResult(read=read, imported=imported)
+
+
+def import_statement_file(
+    engine: Engine,
+    path: str,
+    statement_format: StatementFormat,
+    rules: MappingRules,
+    encoding: str = 'utf-8-sig',
+    on_progress: callable = None,
+) -> ImportResult:
+    """
+        Import a statement file (see `import_statement`). `on_progress(read, fraction)` is called after each chunk,
+        with the fraction of the file read.
+    """
+    size = os.path.getsize(path) or 1
+    with open(path, newline='', encoding=encoding, errors='replace') as file:
+        reader = ProgressReader(file)
+        return import_statement(
+            engine,
+            read_statement(reader, statement_format),
+            rules,
+            on_progress=on_progress and (lambda read: on_progress(read, min(reader.position / size, 1.0))),
+        )
@@ -0,0 +1,152 @@
+"""
+    Export the transactions to a CSV or JSON Lines file (see `EXPORT_FORMATS`), streaming them:
+    the rows are fetched from the cursor in batches of `EXPORT_CHUNK_SIZE` (`yield_per`) and written as they arrive,
+    so the memory used is the same for any number of transactions.
+
+    The file is written next to the destination and renamed over it at the end, so a failed export leaves no partial file.
+"""
+import csv
+import json
+import os
+from typing import Callable, TextIO
+from sqlalchemy import Engine, Select, func, or_, select
+from sqlalchemy.orm import aliased
+from database.models import Account, Currency, Transaction
+from utils import get_datetime_from_db
+
+
+EXPORT_CHUNK_SIZE = 5_000
+EXPORT_COLUMNS = (
+    'id',
+    'timestamp',
+    'description',
+    'installment_number',
+    'installment_total',
+    'debit_account',
+    'debit_currency',
+    'debit_reference',
+    'debit_amount',
+    'credit_account',
+    'credit_currency',
+    'credit_reference',
+    'credit_amount',
+    'is_reconciled',
+)
+
+
+def select_export_rows(start_date: int = None, end_date: int = None, account_id: int = None) -> Select:
+    """
+        The transactions to export, ordered by date, with the aliases and currencies of their accounts.
+            - start_date, end_date: Local dates as `YYYYMMDD` (see `Transaction.local_date`), both included.
+            - account_id: Only the transactions that debit or credit this account.
+    """
+    debit_account = aliased(Account)
+    credit_account = aliased(Account)
+    debit_currency = aliased(Currency)
+    credit_currency = aliased(Currency)
+
+    query = (
+        select(
+            Transaction.id,
+            Transaction.timestamp,
+            Transaction.description,
+            Transaction.installment_number,
+            Transaction.installment_total,
+            debit_account.alias.label('debit_account'),
+            debit_currency.code.label('debit_currency'),
+            Transaction.debit_reference,
+            Transaction.debit_amount,
+            credit_account.alias.label('credit_account'),
+            credit_currency.code.label('credit_currency'),
+            Transaction.credit_reference,
+            Transaction.credit_amount,
+            Transaction.is_reconciled,
+        )
+        .join(debit_account, debit_account.id == Transaction.debit_account_id)
+        .join(debit_currency, debit_currency.id == debit_account.currency_id)
+        .join(credit_account, credit_account.id == Transaction.credit_account_id)
+        .join(credit_currency, credit_currency.id == credit_account.currency_id)
+        # The index of `local_date` gives the order, only the transactions of the same day are sorted
+        .order_by(Transaction.local_date, Transaction.timestamp, Transaction.id)
+    )
+    return _filter(query, start_date, end_date, account_id)
+
+
+def _filter(query: Select, start_date: int | None, end_date: int | None, account_id: int | None) -> Select:
+    if start_date is not None:
+        query = query.where(Transaction.local_date >= start_date)
+    if end_date is not None:
+        query = query.where(Transaction.local_date <= end_date)
+    if account_id is not None:
+        query = query.where(or_(Transaction.debit_account_id == account_id, Transaction.credit_account_id == account_id))
+    return query
+
+
+def _get_export_values(row) -> tuple:
+    """ The values of a row, in the order of `EXPORT_COLUMNS` (`Row._asdict` is too slow for millions of rows). """
+    return (row[0], get_datetime_from_db(row[1]), *row[2:])
+
+
+def _csv_writer(file: TextIO) -> Callable[[list], None]:
+    writer = csv.writer(file)
+    writer.writerow(EXPORT_COLUMNS)
+
+    def write_rows(rows: list) -> None:
+        writer.writerows(map(_get_export_values, rows))
+    return write_rows
+
+
+def _jsonl_writer(file: TextIO) -> Callable[[list], None]:
+    def write_rows(rows: list) -> None:
+        # The amounts are written as strings, to keep them exact
+        file.writelines(
+            json.dumps(dict(zip(EXPORT_COLUMNS, _get_export_values(row))), default=str, ensure_ascii=False) + '\n'
+            for row in rows
+        )
+    return write_rows
+
+
+# {file extension: function that writes the header (if any) and returns the function that writes the rows}
+EXPORT_FORMATS = {
+    '.csv': _csv_writer,
+    '.jsonl': _jsonl_writer,
+}
+
+
+def export_transactions(
+    engine: Engine,
+    path: str,
+    start_date: int = None,
+    end_date: int = None,
+    account_id: int = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    on_progress: callable = None,
+) -> int:
+    """
+        Write the transactions (see `select_export_rows` for the filters) to `path`, in the format of its extension.
+        `on_progress(exported, total)` is called after each chunk. Returns the number of transactions exported.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"The file must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    exported = 0
+    temporary_path = f"{path}.part"
+    try:
+        with engine.connect() as connection, open(temporary_path, 'w', newline='', encoding='utf-8') as file:
+            total = connection.scalar(_filter(select(func.count(Transaction.id)), start_date, end_date, account_id))
+            write_rows = EXPORT_FORMATS[extension](file)
+            result = connection.execution_options(yield_per=chunk_size).execute(
+                select_export_rows(start_date, end_date, account_id)
+            )
+            for rows in result.partitions():
+                write_rows(rows)
+                exported += len(rows)
+                if on_progress:
+                    on_progress(exported, max(total, exported))
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return exported
@@ -0,0 +1,342 @@
+"""
+    Queries that build the rows of the list views.
+
+    Each function issues a fixed number of statements, regardless of the size of the ledger:
+    the related data is fetched with joins or with one query per table, and it is combined in memory,
+    instead of relying on the lazy loads of the relationships (one SELECT per row).
+    The aliases are read from the column stored in `account_group` (see `database.hierarchy`).
+"""
+from decimal import Decimal
+from sqlalchemy import Select, func, literal, select, tuple_, union_all
+from sqlalchemy.orm import Session, aliased
+from database.models import Account, AccountGroup, AccountOverdraft, AccountType, Currency, Transaction
+from database.balances import get_account_balances
+from database.checkpoints import get_account_balances_as_of
+from utils import get_datetime_from_db, get_local_date_key
+
+
+def get_account_group_aliases(session: Session) -> dict[int, str]:
+    """ Returns the alias (`Parent>Child>Name`) of every account group as a dictionary of {id: alias} pairs. """
+    return dict(session.execute(select(AccountGroup.id, AccountGroup.alias)).all())
+
+
+def get_account_aliases(session: Session) -> dict[int, str]:
+    """ Returns the alias (`Group>Name`) of every account as a dictionary of {id: alias} pairs. """
+    return dict(session.execute(select(Account.id, Account.alias)).all())
+
+
+TRANSACTION_PAGE_SIZE = 200
+
+
+def _select_transaction_rows():
+    """ Returns the select of the rows of `TransactionListView`, and the SQL expression of each sortable column. """
+    debit_account = aliased(Account)
+    credit_account = aliased(Account)
+    debit_currency = aliased(Currency)
+    credit_currency = aliased(Currency)
+
+    sort_columns = {
+        'id': Transaction.id,
+        'timestamp': Transaction.timestamp,
+        'description': func.lower(Transaction.description),
+        'cuotas': Transaction.installment_number,
+        'debit_account': func.lower(debit_account.alias),
+        'debit_currency': debit_currency.code,
+        'debit_amount': Transaction.debit_amount,
+        'credit_account': func.lower(credit_account.alias),
+        'credit_currency': credit_currency.code,
+        'credit_amount': Transaction.credit_amount,
+    }
+    query = (
+        select(
+            Transaction.id,
+            Transaction.timestamp,
+            Transaction.description,
+            Transaction.installment_number,
+            Transaction.installment_total,
+            debit_account.alias.label('debit_account'),
+            debit_currency.code.label('debit_currency'),
+            Transaction.debit_amount,
+            credit_account.alias.label('credit_account'),
+            credit_currency.code.label('credit_currency'),
+            Transaction.credit_amount,
+        )
+        .join(debit_account, debit_account.id == Transaction.debit_account_id)
+        .join(debit_currency, debit_currency.id == debit_account.currency_id)
+        .join(credit_account, credit_account.id == Transaction.credit_account_id)
+        .join(credit_currency, credit_currency.id == credit_account.currency_id)
+    )
+    return query, sort_columns
+
+
+def _get_transaction_row(row) -> dict:
+    return {
+        'id': row.id,
+        'timestamp': get_datetime_from_db(row.timestamp),
+        'description': row.description,
+        'cuotas': f"{row.installment_number:02d}/{row.installment_total:02d}",
+        'debit_account': row.debit_account,
+        'debit_currency': row.debit_currency,
+        'debit_amount': row.debit_amount,
+        'credit_account': row.credit_account,
+        'credit_currency': row.credit_currency,
+        'credit_amount': row.credit_amount,
+    }
+
+
+def get_transaction_rows(session: Session) -> list[dict]:
+    """ Returns the rows of `TransactionListView`, ordered by the newest timestamp first. """
+    query, _ = _select_transaction_rows()
+    rows = session.execute(query.order_by(Transaction.timestamp.desc(), Transaction.id.desc()))
+    return [_get_transaction_row(row) for row in rows]
+
+
+def get_transaction_page(
+    session: Session,
+    sort_column: str = 'timestamp',
+    descending: bool = True,
+    after: tuple | None = None,
+    before: tuple | None = None,
+    limit: int = TRANSACTION_PAGE_SIZE,
+) -> list[dict]:
+    """
+        Returns a page of the rows of `TransactionListView`, using keyset pagination on `(sort_column, id)`.
+        Every row has a `_key` entry, its position in the order, to be passed as `after` or `before` to get the adjacent page.
+            - after: Returns the rows that follow this key.
+            - before: Returns the rows that precede this key (still in the display order).
+            - Neither: Returns the first page.
+    """
+    query, sort_columns = _select_transaction_rows()
+    sort_expression = sort_columns[sort_column]
+    position = tuple_(sort_expression, Transaction.id)
+
+    # Going backwards is going forwards in the opposite order, and then reversing the page
+    backwards = before is not None
+    reverse = descending != backwards
+    if after is not None or before is not None:
+        sort_value, id = before if backwards else after
+        key = tuple_(literal(sort_value, sort_expression.type), literal(id, Transaction.id.type))
+        query = query.where(position < key if reverse else position > key)
+    query = query.add_columns(sort_expression.label('_sort_value'))
+    if reverse:
+        query = query.order_by(sort_expression.desc(), Transaction.id.desc())
+    else:
+        query = query.order_by(sort_expression.asc(), Transaction.id.asc())
+
+    rows = session.execute(query.limit(limit)).all()
+    if backwards:
+        rows.reverse()
+    return [{**_get_transaction_row(row), '_key': (row._sort_value, row.id)} for row in rows]
+
+
+ACCOUNT_LEDGER_PAGE_SIZE = 200
+
+
+def _select_account_entries(account_id: int, normal_side: str, *conditions, order_by: tuple = (), limit: int = None):
+    """
+        The entries of an account: the transactions where it is debited, and where it is credited (each side is read with
+        its `(account, local_date)` index, filtered by `conditions`, sorted and limited on its own).
+        `change` is the amount signed by the `normal_side` of the account (positive when it increases the balance).
+    """
+    sides = []
+    for side, account_column, counterpart_column, amount_column, reference_column in (
+        ('DEBIT', Transaction.debit_account_id, Transaction.credit_account_id, Transaction.debit_amount, Transaction.debit_reference),
+        ('CREDIT', Transaction.credit_account_id, Transaction.debit_account_id, Transaction.credit_amount, Transaction.credit_reference),
+    ):
+        entries = (
+            select(
+                Transaction.id,
+                Transaction.timestamp,
+                Transaction.description,
+                reference_column.label('reference'),
+                counterpart_column.label('counterpart_id'),
+                literal(side).label('side'),
+                amount_column.label('amount'),
+                (amount_column if side == normal_side else -amount_column).label('change'),
+            )
+            .where(account_column == account_id, *conditions)
+            .order_by(*order_by)
+            .limit(limit)
+        )
+        sides.append(select(entries.subquery()))
+    return union_all(*sides).subquery()
+
+
+def _get_balance_before(session: Session, account_id: int, normal_side: str, timestamp: int, id: int, side: str) -> Decimal:
+    """ The balance of the account before the entry `(timestamp, id, side)`, from the balance checkpoints. """
+    balance = get_account_balances_as_of(session, timestamp - 1, [account_id])[account_id]
+    same_second = _select_account_entries(account_id, normal_side, Transaction.timestamp == timestamp, Transaction.id <= id)
+    return balance + session.scalar(
+        select(func.coalesce(func.sum(same_second.c.change), 0))
+        .where(tuple_(same_second.c.id, same_second.c.side) < tuple_(literal(id, Transaction.id.type), literal(side)))
+    )
+
+
+def get_account_ledger_page(
+    session: Session,
+    account_id: int,
+    descending: bool = True,
+    after: tuple | None = None,
+    before: tuple | None = None,
+    limit: int = ACCOUNT_LEDGER_PAGE_SIZE,
+) -> list[dict]:
+    """
+        Returns a page of the entries of an account in timestamp order, with the balance after each one,
+        using keyset pagination on `(timestamp, id, side)` (see `get_transaction_page` for `after` and `before`).
+        A transaction that debits and credits the account has an entry for each side, so the rows are identified
+        by their `entry` (the id and the side), not by the id.
+
+        The page is read from the `(account, local_date)` indexes (only `limit` entries of each side), and the balance
+        is a running sum (window function) over the page, plus the balance before its oldest entry
+        (see `get_account_balances_as_of`), so it does not depend on the number of entries of the account.
+    """
+    normal_side = session.scalar(
+        select(AccountType.normal_side)
+        .join(Account, Account.account_type_id == AccountType.id)
+        .where(Account.id == account_id)
+    )
+
+    backwards = before is not None
+    reverse = descending != backwards
+    conditions = []
+    key = None
+    if after is not None or before is not None:
+        timestamp, id, side = before if backwards else after
+        key = (literal(timestamp, Transaction.timestamp.type), literal(id, Transaction.id.type), literal(side))
+        position = tuple_(Transaction.timestamp, Transaction.id)
+        # The condition on `local_date` (redundant with the timestamp) is the range of the index. Each side includes
+        # the transaction of the key (its other side may be the next entry), so it reads one more entry
+        if reverse:
+            conditions = [Transaction.local_date <= get_local_date_key(timestamp), position <= tuple_(*key[:2])]
+        else:
+            conditions = [Transaction.local_date >= get_local_date_key(timestamp), position >= tuple_(*key[:2])]
+    order_columns = (Transaction.local_date, Transaction.timestamp, Transaction.id)
+    entries = _select_account_entries(
+        account_id, normal_side, *conditions,
+        order_by=tuple(column.desc() if reverse else column.asc() for column in order_columns),
+        limit=limit if key is None else limit + 1,
+    )
+
+    page_order = (entries.c.timestamp, entries.c.id, entries.c.side)
+    page_conditions = []
+    if key is not None:
+        page_conditions = [tuple_(*page_order) < tuple_(*key) if reverse else tuple_(*page_order) > tuple_(*key)]
+    page = (
+        select(entries)
+        .where(*page_conditions)
+        .order_by(*(column.desc() if reverse else column.asc() for column in page_order))
+        .limit(limit)
+        .subquery()
+    )
+    counterpart = aliased(Account)
+    rows = session.execute(
+        select(
+            page,
+            counterpart.alias.label('counterpart'),
+            func.sum(page.c.change).over(order_by=(page.c.timestamp, page.c.id, page.c.side)).label('running_change'),
+        )
+        .join(counterpart, counterpart.id == page.c.counterpart_id)
+        .order_by(*(column.desc() if descending else column.asc() for column in (page.c.timestamp, page.c.id, page.c.side)))
+    ).all()
+    if not rows:
+        return []
+
+    oldest = rows[-1] if descending else rows[0]
+    opening_balance = _get_balance_before(session, account_id, normal_side, oldest.timestamp, oldest.id, oldest.side)
+    return [
+        {
+            'entry': f"{row.id}-{row.side}",
+            'id': row.id,
+            'timestamp': get_datetime_from_db(row.timestamp),
+            'description': row.description,
+            'counterpart': row.counterpart,
+            'reference': row.reference,
+            'debit': row.amount if row.side == 'DEBIT' else None,
+            'credit': row.amount if row.side == 'CREDIT' else None,
+            'balance': opening_balance + row.running_change,
+            '_key': (row.timestamp, row.id, row.side),
+        }
+        for row in rows
+    ]
+
+
+def get_account_overdraft_rows(session: Session) -> list[dict]:
+    """ Returns the rows of `AccountOverdraftListView`, ordered by account alias and start date. """
+    account_aliases = get_account_aliases(session)
+    rows = session.execute(select(
+        AccountOverdraft.id,
+        AccountOverdraft.account_id,
+        AccountOverdraft.limit,
+        AccountOverdraft.started_at,
+        AccountOverdraft.ended_at,
+    ))
+    data = [{
+            "id": row.id,
+            "account": account_aliases[row.account_id],
+            "limit": row.limit,
+            "started_at": get_datetime_from_db(row.started_at),
+            "ended_at": get_datetime_from_db(row.ended_at) if row.ended_at else '',
+        } for row in rows]
+
+    return sorted(data, key=lambda x: (x['account'].lower(), x['started_at']))
+
+
+def get_chart_of_accounts_rows(session: Session) -> tuple[list[dict], list[dict]]:
+    """
+        Returns the rows of `ChartOfAccountTable` as a tuple of (groups, accounts), both sorted by name.
+            - groups: {id, name, description, parent_id}
+            - accounts: The columns of the table, plus `name` and `account_group_id`.
+    """
+    groups = [
+        row._asdict() for row in session.execute(
+            select(AccountGroup.id, AccountGroup.name, AccountGroup.description, AccountGroup.parent_id)
+            .order_by(func.lower(AccountGroup.name))
+        )
+    ]
+
+    # The overdraft limit of an account is the one of its last overdraft
+    last_overdraft_id = (
+        select(func.max(AccountOverdraft.id))
+        .where(AccountOverdraft.account_id == Account.id)
+        .correlate(Account)
+        .scalar_subquery()
+    )
+    rows = session.execute(
+        select(
+            Account.id,
+            Account.name,
+            Account.account_group_id,
+            Account.description,
+            Account.account_number,
+            Currency.code.label('currency'),
+            Account.opened_at,
+            Account.closed_at,
+            AccountType.name.label('account_type'),
+            AccountType.normal_side,
+            AccountOverdraft.limit.label('overdraft'),
+        )
+        .join(Currency, Currency.id == Account.currency_id)
+        .join(AccountType, AccountType.id == Account.account_type_id)
+        .outerjoin(AccountOverdraft, AccountOverdraft.id == last_overdraft_id)
+        .order_by(func.lower(Account.name))
+    )
+    balances = get_account_balances(session)
+    accounts = [
+        {
+            'type': 'A',
+            'id': row.id,
+            'name': row.name,
+            'account_group_id': row.account_group_id,
+            'description': row.description,
+            'account_number': row.account_number,
+            'currency': row.currency,
+            'opened_at': get_datetime_from_db(row.opened_at),
+            'closed_at': get_datetime_from_db(row.closed_at) if row.closed_at else '',
+            'account_type': row.account_type,
+            'normal_side': row.normal_side,
+            'overdraft': row.overdraft,
+            'balance': balances.get(row.id, Decimal('0.00')),
+        }
+        for row in rows
+    ]
+    return groups, accounts
@@ -7,7 +7,6 @@ import tkinter as tk
 # import pathlib; 
 # PROJECT_PATH = pathlib.Path(__file__).parent
 
-# TODO: Change Float to Decimal everywhere
 class App(tk.Tk):
     """A financial accounting application."""
 
@@ -29,6 +28,10 @@ class App(tk.Tk):
         center_window(window=self, context_window=None)
         self.mainloop()
 
+        # Imported here, so the database modules are only loaded with the first view (see `AppMenu.open_view`)
+        from database.executor import shutdown as shutdown_db_executor
+        shutdown_db_executor()
+
 if __name__ == '__main__':
     try:
         app = App()
@@ -1,16 +1,15 @@
 from config import logger
 from functools import partial
+from tkinter import filedialog, messagebox
 
-from views.about import AboutDialog
-from views.currencies import CurrencyListView
-from views.chart_of_accounts import ChartOfAccountView
-from views.providers import ProviderListView
-from views.account_type import AccountTypeListView
-from views.transaction import TransactionListView
-
+import importlib
+import os
 import tkinter as tk
 
 
+LEDGER_FILE_TYPES = [("Ledger", "*.db"), ("All files", "*.*")]
+
+
 class AppMenu(tk.Menu):
     def __init__(self, parent: tk.Tk) -> None:
         super().__init__(parent)
@@ -23,25 +22,39 @@ class AppMenu(tk.Menu):
         self.add_cascade(label="Reports", menu=self.get_reports_menu())
         self.add_cascade(label="Investments", menu=self.get_investments_menu())
         self.add_cascade(label="Tools", menu=self.get_tools_menu())
-        self.add_command(label="About", command=partial(AboutDialog, parent=self.parent))
+        self.add_command(label="About", command=self.view_command("views.about.AboutDialog"))
+
+
+    def open_view(self, view_path: str, **kwargs) -> None:
+        """ Open the view in `view_path` (`module.Class`), its module is imported on first use. """
+        module_name, class_name = view_path.rsplit('.', 1)
+        view = getattr(importlib.import_module(module_name), class_name)
+        view(parent=self.parent, **kwargs)
+
+    def view_command(self, view_path: str, **kwargs) -> callable:
+        """ The menu command that opens the view in `view_path` with `kwargs` (see `open_view`). """
+        return partial(self.open_view, view_path, **kwargs)
 
 
     def get_file_menu(self) -> tk.Menu:
         def get_import_menu(self) -> tk.Menu:
             import_menu = tk.Menu(self)
-            import_menu.add_command(label="Import Santander CreditCard Summary", command=lambda: logger.debug("Selected Menu Import Santander CreditCard Summary"))
-            import_menu.add_command(label="Import Santander Account Summary", command=lambda: logger.debug("Selected Menu Import Santander Account Summary"))
+            import_menu.add_command(label="Import Santander CreditCard Summary", command=self.view_command("views.statement_import.StatementImportView", statement_format='santander_credit_card'))
+            import_menu.add_command(label="Import Santander Account Summary", command=self.view_command("views.statement_import.StatementImportView", statement_format='santander_account'))
             
             return import_menu
 
 
         def get_export_menu(self) -> tk.Menu:
             export_menu = tk.Menu(self)
-            export_menu.add_command(label="Export Transactions", command=lambda: logger.debug("Selected Menu Export Transactions"))
+            export_menu.add_command(label="Export Transactions", command=self.view_command("views.transaction_export.TransactionExportView"))
             return export_menu
 
 
         file_menu = tk.Menu(self)
+        file_menu.add_command(label="New Ledger…", command=self.on_new_database)
+        file_menu.add_command(label="Open Ledger…", command=self.on_open_database)
+        file_menu.add_separator()
         file_menu.add_cascade(label="Import", menu=get_import_menu(self))
         file_menu.add_cascade(label="Export", menu=get_export_menu(self))
         file_menu.add_separator()
@@ -72,8 +85,8 @@ class AppMenu(tk.Menu):
     def get_reports_menu(self) -> tk.Menu:
         def get_financial_statements_menu(self) -> tk.Menu:
             financial_statements_menu = tk.Menu(self)
-            financial_statements_menu.add_cascade(label="Balance Sheet", command=lambda: logger.debug("Selected Menu Balance Sheet"))
-            financial_statements_menu.add_cascade(label="Income Statement", command=lambda: logger.debug("Selected Menu Income Statement"))
+            financial_statements_menu.add_cascade(label="Balance Sheet", command=self.view_command("views.balance_sheet.BalanceSheetView"))
+            financial_statements_menu.add_cascade(label="Income Statement", command=self.view_command("views.income_statement.IncomeStatementView"))
             financial_statements_menu.add_cascade(label="Cash Flow", command=lambda: logger.debug("Selected Menu Cash Flow"))
             financial_statements_menu.add_cascade(label="Net Worth", command=lambda: logger.debug("Selected Menu Net Worth"))
             
@@ -113,11 +126,11 @@ class AppMenu(tk.Menu):
 
     def get_tables_menu(self) -> tk.Menu:
         tables_menu = tk.Menu(self)
-        tables_menu.add_cascade(label="Chart of Accounts", command=partial(ChartOfAccountView, parent=self.parent))
-        tables_menu.add_cascade(label="Account Types", command=partial(AccountTypeListView, parent=self.parent))
-        tables_menu.add_cascade(label="Providers", command=partial(ProviderListView, parent=self.parent))
-        tables_menu.add_cascade(label="Currencies", command=partial(CurrencyListView, parent=self.parent))
-        tables_menu.add_cascade(label="Transactions", command=partial(TransactionListView, parent=self.parent))
+        tables_menu.add_cascade(label="Chart of Accounts", command=self.view_command("views.chart_of_accounts.ChartOfAccountView"))
+        tables_menu.add_cascade(label="Account Types", command=self.view_command("views.account_type.AccountTypeListView"))
+        tables_menu.add_cascade(label="Providers", command=self.view_command("views.providers.ProviderListView"))
+        tables_menu.add_cascade(label="Currencies", command=self.view_command("views.currencies.CurrencyListView"))
+        tables_menu.add_cascade(label="Transactions", command=self.view_command("views.transaction.TransactionListView"))
         tables_menu.add_cascade(label="Credit Cards", command=lambda: logger.debug("Selected Menu Credit Cards"))
         tables_menu.add_cascade(label="Credit Cards Summaries", command=lambda: logger.debug("Selected Menu Credit Cards Summaries"))
 
@@ -129,7 +142,64 @@ class AppMenu(tk.Menu):
         tools_menu.add_cascade(label="Budgets", command=lambda: logger.debug("Selected Menu Budgets"))
         tools_menu.add_cascade(label="Currency Exchange", command=lambda: logger.debug("Selected Menu Currency Exchange"))
         tools_menu.add_cascade(label="Loan Calculator", command=lambda: logger.debug("Selected Menu Loan Calculator"))
+        tools_menu.add_separator()
+        tools_menu.add_cascade(label="Rebuild Account Balances", command=self.on_rebuild_account_balances)
+        tools_menu.add_cascade(label="Diagnostics", command=self.view_command("views.diagnostics.DiagnosticsView"))
 
         return tools_menu
 
 
+    def on_new_database(self) -> None:
+        """ Create a new ledger file and open it. """
+        path = filedialog.asksaveasfilename(
+            parent=self.parent, title="New Ledger", defaultextension=".db", filetypes=LEDGER_FILE_TYPES, confirmoverwrite=False
+        )
+        if not path:
+            return
+        if os.path.exists(path):
+            messagebox.showerror("New Ledger", f"The file {path} already exists, use File > Open Ledger to open it")
+            return
+        self._open_database(path)
+
+    def on_open_database(self) -> None:
+        """ Open an existing ledger file. """
+        path = filedialog.askopenfilename(parent=self.parent, title="Open Ledger", filetypes=LEDGER_FILE_TYPES)
+        if path:
+            self._open_database(path)
+
+    def _open_database(self, path: str) -> None:
+        """ Close the windows of the current ledger, and open the one in `path` (not while a job is running). """
+        from database.executor import has_jobs
+        from database.sqlite_handler import open_database
+
+        if has_jobs():
+            messagebox.showerror("Error", "An import or export is running, wait for it to finish or cancel it before changing the ledger")
+            return
+
+        try:
+            open_database(path)
+        except Exception as e:
+            logger.exception(e)
+            messagebox.showerror("Error", f"Could not open {path}: {e}")
+            return
+
+        for window in self.parent.winfo_children():
+            if isinstance(window, tk.Toplevel):
+                window.destroy()
+        self.parent.title(f"The Vault - {os.path.basename(path)}")
+
+    def on_rebuild_account_balances(self) -> None:
+        """ Recalculate the `account_balance` and `account_balance_checkpoint` tables from the transactions. """
+        from database.sqlite_handler import get_engine
+        from database.balances import rebuild_account_balances
+        from database.checkpoints import rebuild_balance_checkpoints
+        from database.instrumentation import track
+
+        try:
+            with track("AppMenu.rebuild_account_balances"), get_engine().begin() as connection:
+                rebuild_account_balances(connection)
+                rebuild_balance_checkpoints(connection)
+            messagebox.showinfo("Rebuild Account Balances", "The account balances were rebuilt successfully")
+        except Exception as e:
+            logger.exception(e)
+            messagebox.showerror("Error", str(e))
@@ -0,0 +1,94 @@
+import unittest
+from sqlalchemy import delete, event
+from database.common_queries import AccountEntry, get_account_index, get_accounts_values, get_currencies_values
+from database.models import Account, AccountGroup, AccountType, Currency
+from database.sqlite_handler import MEMORY_DATABASE, close_database, get_engine, get_session, open_database
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        open_database(MEMORY_DATABASE)
+        self.statements = []
+        event.listen(get_engine(), "before_cursor_execute", lambda *args: self.statements.append(args[2]))
+
+    def add_currency(self, code: str) -> None:
+        with get_session() as session:
+            session.add(Currency(code=code, description=''))
+            session.commit()
+
+    def count_statements(self, func: callable) -> int:
+        self.statements.clear()
+        func()
+        return len(self.statements)
+
+    def test_lookup_is_cached(self):
+        self.assertEqual(self.count_statements(get_currencies_values), 1)
+        self.assertEqual(self.count_statements(get_currencies_values), 0)
+
+    def test_commit_invalidates_the_lookups_of_the_model(self):
+        get_currencies_values()
+        get_accounts_values()
+
+        self.add_currency('ARS')
+
+        self.assertEqual(list(get_currencies_values().values()), ['ARS'])
+        self.assertEqual(self.count_statements(get_accounts_values), 0)
+
+    def test_rollback_does_not_invalidate(self):
+        get_currencies_values()
+        with get_session() as session:
+            session.add(Currency(code='ARS', description=''))
+            session.flush()
+            session.rollback()
+
+        self.assertEqual(self.count_statements(get_currencies_values), 0)
+
+    def test_bulk_delete_invalidates(self):
+        self.add_currency('ARS')
+        self.assertEqual(len(get_currencies_values()), 1)
+
+        with get_session() as session:
+            session.execute(delete(Currency))
+            session.commit()
+
+        self.assertEqual(get_currencies_values(), {})
+
+        self.add_currency('USD')
+        get_currencies_values()
+        with get_session() as session:
+            session.query(Currency).filter(Currency.code == 'USD').delete(synchronize_session=False)
+            session.commit()
+
+        self.assertEqual(get_currencies_values(), {})
+
+    def test_account_index(self):
+        with get_session() as session:
+            session.add_all([
+                Currency(id=1, code='ARS', description=''),
+                AccountGroup(id=1, name='Assets', description=''),
+                AccountType(id=1, name='CASH', normal_side='DEBIT'),
+                Account(
+                    name='Wallet', description='', account_number='', currency_id=1, opened_at=0,
+                    account_group_id=1, account_type_id=1,
+                ),
+            ])
+            session.commit()
+
+        self.statements.clear()
+        self.assertEqual(get_account_index(), {'Assets>Wallet': AccountEntry(1, 'ARS', 'DEBIT')})
+        self.assertEqual(len(self.statements), 1)
+
+    def test_open_database_clears_the_cache(self):
+        self.add_currency('ARS')
+        get_currencies_values()
+
+        open_database(MEMORY_DATABASE)
+
+        self.assertEqual(get_currencies_values(), {})
+
+    def tearDown(self):
+        close_database()
+
+
+if __name__ == '__main__':
+    unittest.main()
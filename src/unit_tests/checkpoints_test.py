@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from decimal import Decimal
+from sqlalchemy import select, update
+from database.checkpoints import get_account_balances_as_of, get_previous_month, refresh_balance_checkpoints
+from database.models import Account, AccountBalanceCheckpoint, AccountGroup, AccountType, Currency, Transaction
+from database.sqlite_handler import MEMORY_DATABASE, close_database, get_session, open_database
+from utils import get_datetime_to_db
+
+
+def get_timestamp(value: str) -> int:
+    return get_datetime_to_db(value)
+
+
+class TestBalanceCheckpoints(unittest.TestCase):
+    def setUp(self):
+        open_database(MEMORY_DATABASE)
+        self.addCleanup(close_database)
+        with get_session() as session:
+            session.add_all([
+                Currency(id=1, code='ARS', description=''),
+                AccountGroup(id=1, name='Assets', description=''),
+                AccountType(id=1, name='CASH', normal_side='DEBIT'),
+                AccountType(id=2, name='SALARY_REVENUE', normal_side='CREDIT'),
+            ])
+            session.flush()
+            session.add_all([
+                Account(id=1, name='Wallet', currency_id=1, opened_at=0, account_group_id=1, account_type_id=1),
+                Account(id=2, name='Salary', currency_id=1, opened_at=0, account_group_id=1, account_type_id=2),
+                Account(id=3, name='Bank', currency_id=1, opened_at=0, account_group_id=1, account_type_id=1),
+            ])
+            session.flush()
+            # 10.00 of salary on the first day of each month of 2023, and 1.00 moved to the bank at the end of each month
+            for month in range(1, 13):
+                session.add(self.get_transaction(f"2023-{month:02d}-01 09:00:00", 1, 2, '10'))
+                session.add(self.get_transaction(f"2023-{month:02d}-28 18:00:00", 3, 1, '1'))
+            session.commit()
+
+    def get_transaction(self, timestamp: str, debit_account_id: int, credit_account_id: int, amount: str) -> Transaction:
+        return Transaction(
+            timestamp=get_timestamp(timestamp), description='',
+            debit_account_id=debit_account_id, debit_amount=Decimal(amount),
+            credit_account_id=credit_account_id, credit_amount=Decimal(amount),
+        )
+
+    def get_checkpoint_months(self, account_id: int) -> list[int]:
+        with get_session() as session:
+            return session.scalars(
+                select(AccountBalanceCheckpoint.month)
+                .where(AccountBalanceCheckpoint.account_id == account_id)
+                .order_by(AccountBalanceCheckpoint.month)
+            ).all()
+
+    def test_get_previous_month(self):
+        self.assertEqual(get_previous_month(202403), 202402)
+        self.assertEqual(get_previous_month(202401), 202312)
+
+    def test_balances_as_of(self):
+        with get_session() as session:
+            for timestamp, expected in [
+                ("2022-12-31 23:59:59", {1: Decimal('0.00'), 2: Decimal('0.00'), 3: Decimal('0.00')}),
+                ("2023-01-01 09:00:00", {1: Decimal('10.00'), 2: Decimal('10.00'), 3: Decimal('0.00')}),
+                ("2023-06-15 00:00:00", {1: Decimal('55.00'), 2: Decimal('60.00'), 3: Decimal('5.00')}),
+                ("2023-06-28 18:00:00", {1: Decimal('54.00'), 2: Decimal('60.00'), 3: Decimal('6.00')}),
+                ("2024-01-01 00:00:00", {1: Decimal('108.00'), 2: Decimal('120.00'), 3: Decimal('12.00')}),
+            ]:
+                with self.subTest(timestamp=timestamp):
+                    self.assertEqual(get_account_balances_as_of(session, get_timestamp(timestamp)), expected)
+            session.commit()
+
+            self.assertEqual(get_account_balances_as_of(session, get_timestamp("2023-06-15 00:00:00"), [3]), {3: Decimal('5.00')})
+
+        # A checkpoint was stored for each month with transactions, and for the month before each query
+        self.assertEqual(self.get_checkpoint_months(1), [202211, 202212, *range(202301, 202313)])
+
+    def test_changes_invalidate_the_later_checkpoints(self):
+        with get_session() as session:
+            refresh_balance_checkpoints(session.connection(), until_month=202312)
+            session.commit()
+        self.assertEqual(len(self.get_checkpoint_months(1)), 12)
+
+        with get_session() as session:
+            session.add(self.get_transaction("2023-06-10 12:00:00", 3, 2, '100'))
+            session.commit()
+        self.assertEqual(self.get_checkpoint_months(1), list(range(202301, 202313)))
+        self.assertEqual(self.get_checkpoint_months(3), list(range(202301, 202306)))
+
+        with get_session() as session:
+            # The salary of March is moved from the Wallet to the Bank
+            session.execute(update(Transaction).where(Transaction.id == 5).values(debit_account_id=3))
+            session.commit()
+        self.assertEqual(self.get_checkpoint_months(1), [202301, 202302])
+        self.assertEqual(self.get_checkpoint_months(2), [202301, 202302])
+        self.assertEqual(self.get_checkpoint_months(3), [202301, 202302])
+
+        with get_session() as session:
+            self.assertEqual(
+                get_account_balances_as_of(session, get_timestamp("2024-01-01 00:00:00")),
+                {1: Decimal('98.00'), 2: Decimal('220.00'), 3: Decimal('122.00')},
+            )
+
+
+class TestCheckpointsWhileWriting(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'ledger.db')
+        open_database(self.path, profile='performance')
+        self.addCleanup(close_database)
+        with get_session() as session:
+            session.add_all([
+                Currency(id=1, code='ARS', description=''),
+                AccountGroup(id=1, name='Assets', description=''),
+                AccountType(id=1, name='CASH', normal_side='DEBIT'),
+                AccountType(id=2, name='SALARY_REVENUE', normal_side='CREDIT'),
+            ])
+            session.flush()
+            session.add_all([
+                Account(id=1, name='Wallet', currency_id=1, opened_at=0, account_group_id=1, account_type_id=1),
+                Account(id=2, name='Salary', currency_id=1, opened_at=0, account_group_id=1, account_type_id=2),
+            ])
+            session.flush()
+            session.add(Transaction(
+                timestamp=get_timestamp("2023-01-01 09:00:00"), description='',
+                debit_account_id=1, debit_amount=Decimal('10'), credit_account_id=2, credit_amount=Decimal('10'),
+            ))
+            session.commit()
+
+    def test_balances_as_of_while_another_connection_writes(self):
+        # e.g. an import job, which holds the write lock until it finishes
+        writer = sqlite3.connect(self.path)
+        self.addCleanup(writer.close)
+        writer.execute("BEGIN IMMEDIATE")
+
+        start = time.perf_counter()
+        with get_session() as session:
+            balances = get_account_balances_as_of(session, get_timestamp("2024-01-01 00:00:00"))
+            session.commit()
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(balances, {1: Decimal('10.00'), 2: Decimal('10.00')})
+
+        # The checkpoints are created by the next read
+        writer.rollback()
+        with get_session() as session:
+            self.assertEqual(session.scalars(select(AccountBalanceCheckpoint)).all(), [])
+            get_account_balances_as_of(session, get_timestamp("2024-01-01 00:00:00"))
+            session.commit()
+            self.assertNotEqual(session.scalars(select(AccountBalanceCheckpoint)).all(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+from decimal import Decimal
+from sqlalchemy import event
+from database.financial_statements import (
+    get_balance_sheet_rows, get_income_statement, get_income_statement_months, get_income_statement_rows,
+)
+from database.models import Account, AccountGroup, AccountType, Currency, Transaction
+from database.sqlite_handler import MEMORY_DATABASE, close_database, get_engine, get_session, open_database
+from utils import get_datetime_to_db
+
+
+class TestFinancialStatements(unittest.TestCase):
+    def setUp(self):
+        open_database(MEMORY_DATABASE)
+        self.addCleanup(close_database)
+        with get_session() as session:
+            session.add_all([
+                Currency(id=1, code='ARS', description=''),
+                AccountType(id=1, name='CASH', normal_side='DEBIT'),
+                AccountType(id=2, name='CREDIT_CARD', normal_side='CREDIT'),
+                AccountType(id=3, name='SALARY_REVENUE', normal_side='CREDIT'),
+                AccountType(id=4, name='SALARY_EXPENSE', normal_side='DEBIT'),
+                AccountGroup(id=1, name='Personal', description=''),
+                AccountGroup(id=2, name='Banks', description='', parent_id=1),
+                AccountGroup(id=3, name='Work', description=''),
+            ])
+            session.flush()
+            session.add_all([
+                Account(id=1, name='Wallet', currency_id=1, opened_at=0, account_group_id=1, account_type_id=1),
+                Account(id=2, name='Bank', currency_id=1, opened_at=0, account_group_id=2, account_type_id=1),
+                Account(id=3, name='Visa', currency_id=1, opened_at=0, account_group_id=2, account_type_id=2),
+                Account(id=4, name='Salary', currency_id=1, opened_at=0, account_group_id=3, account_type_id=3),
+                Account(id=5, name='Food', currency_id=1, opened_at=0, account_group_id=1, account_type_id=4),
+            ])
+            session.flush()
+            for timestamp, debit_account_id, credit_account_id, amount in [
+                ("2023-01-01 09:00:00", 2, 4, '100'),  # The salary, to the bank
+                ("2023-01-15 12:00:00", 5, 3, '30'),  # Food, paid with the credit card
+                ("2023-02-01 10:00:00", 1, 2, '10'),  # Cash withdrawal
+            ]:
+                session.add(Transaction(
+                    timestamp=get_datetime_to_db(timestamp), description='',
+                    debit_account_id=debit_account_id, debit_amount=Decimal(amount),
+                    credit_account_id=credit_account_id, credit_amount=Decimal(amount),
+                ))
+            session.commit()
+
+    def add_dollars(self) -> None:
+        """ A USD bank account and USD salary, the amounts must not be added to the ones in ARS. """
+        with get_session() as session:
+            session.add(Currency(id=2, code='USD', description=''))
+            session.flush()
+            session.add_all([
+                Account(id=7, name='Dollars', currency_id=2, opened_at=0, account_group_id=2, account_type_id=1),
+                Account(id=8, name='Bonus', currency_id=2, opened_at=0, account_group_id=3, account_type_id=3),
+            ])
+            session.flush()
+            session.add(Transaction(
+                timestamp=get_datetime_to_db("2023-01-20 10:00:00"), description='',
+                debit_account_id=7, debit_amount=Decimal('100000'), credit_account_id=8, credit_amount=Decimal('100000'),
+            ))
+            session.commit()
+
+    def get_balance_sheet(self, timestamp: str) -> dict[str, Decimal]:
+        with get_session() as session:
+            return {row['key']: row['balance'] for row in get_balance_sheet_rows(session, get_datetime_to_db(timestamp))}
+
+    def test_balance_sheet(self):
+        self.assertEqual(self.get_balance_sheet("2023-12-31 23:59:59"), {
+            'ARS': None,
+            'ARS/Assets': Decimal('100.00'),
+            'ARS/Assets/CASH': Decimal('100.00'),
+            'ARS/Assets/CASH/1': Decimal('100.00'),
+            'ARS/Assets/CASH/1/2': Decimal('90.00'),
+            'ARS/Liabilities': Decimal('30.00'),
+            'ARS/Liabilities/CREDIT_CARD': Decimal('30.00'),
+            'ARS/Liabilities/CREDIT_CARD/1': Decimal('30.00'),
+            'ARS/Liabilities/CREDIT_CARD/1/2': Decimal('30.00'),
+            'ARS/Equity': Decimal('70.00'),
+            'ARS/Equity/SALARY_EXPENSE': Decimal('-30.00'),
+            'ARS/Equity/SALARY_EXPENSE/1': Decimal('-30.00'),
+            'ARS/Equity/SALARY_REVENUE': Decimal('100.00'),
+            'ARS/Equity/SALARY_REVENUE/3': Decimal('100.00'),
+        })
+
+    def test_balance_sheet_as_of(self):
+        balance_sheet = self.get_balance_sheet("2023-01-10 00:00:00")
+        self.assertEqual(
+            (balance_sheet['ARS/Assets'], balance_sheet['ARS/Liabilities'], balance_sheet['ARS/Equity']),
+            (Decimal('100.00'), Decimal('0.00'), Decimal('100.00')),
+        )
+        self.assertEqual(balance_sheet['ARS/Assets/CASH/1/2'], Decimal('100.00'))
+
+    def test_balance_sheet_by_currency(self):
+        self.add_dollars()
+        balance_sheet = self.get_balance_sheet("2023-12-31 23:59:59")
+
+        self.assertEqual((balance_sheet['ARS/Assets'], balance_sheet['ARS/Equity']), (Decimal('100.00'), Decimal('70.00')))
+        self.assertEqual(balance_sheet['ARS/Assets/CASH/1/2'], Decimal('90.00'))
+        self.assertEqual((balance_sheet['USD/Assets'], balance_sheet['USD/Equity']), (Decimal('100000.00'), Decimal('100000.00')))
+        self.assertEqual(balance_sheet['USD/Assets/CASH/1/2'], Decimal('100000.00'))
+        self.assertNotIn('USD/Liabilities/CREDIT_CARD', balance_sheet)
+
+    def test_rows_follow_the_tree(self):
+        with get_session() as session:
+            rows = get_balance_sheet_rows(session, get_datetime_to_db("2023-12-31 23:59:59"))
+        keys = set()
+        for row in rows:
+            self.assertTrue(row['parent_key'] is None or row['parent_key'] in keys)
+            keys.add(row['key'])
+        self.assertEqual([row['name'] for row in rows[:5]], ['ARS', 'Assets', 'CASH', 'Personal', 'Banks'])
+
+    def test_income_statement_months(self):
+        self.assertEqual(get_income_statement_months(20231115, 20240210), ['2023-11', '2023-12', '2024-01', '2024-02'])
+
+    def test_income_statement(self):
+        with get_session() as session:
+            # A type added by the user is a revenue or an expense by its normal side
+            session.add(AccountType(id=5, name='GIFTS', normal_side='CREDIT'))
+            session.add(Account(id=6, name='Birthday', currency_id=1, opened_at=0, account_group_id=3, account_type_id=5))
+            session.add(Transaction(
+                timestamp=get_datetime_to_db("2023-03-10 10:00:00"), description='',
+                debit_account_id=1, debit_amount=Decimal('5'), credit_account_id=6, credit_amount=Decimal('5'),
+            ))
+            session.commit()
+
+            statement = get_income_statement(session, 20221201, 20230331)
+
+        self.assertEqual(list(statement.columns), ['2022-12', '2023-01', '2023-02', '2023-03', 'Total'])
+        self.assertEqual(list(statement.index), [
+            ('ARS', 'Revenue', 'GIFTS', 'Work>Birthday'),
+            ('ARS', 'Revenue', 'SALARY_REVENUE', 'Work>Salary'),
+            ('ARS', 'Expenses', 'SALARY_EXPENSE', 'Personal>Food'),
+        ])
+        self.assertEqual(statement.loc[('ARS', 'Expenses', 'SALARY_EXPENSE', 'Personal>Food'), '2023-01'], 3000)
+
+        rows = {row['key']: row for row in get_income_statement_rows(statement)}
+        self.assertEqual((rows['ARS/Revenue']['2023-01'], rows['ARS/Revenue']['2023-03']), (Decimal('100.00'), Decimal('5.00')))
+        self.assertEqual(rows['ARS/Revenue/GIFTS/Work>Birthday']['Total'], Decimal('5.00'))
+        self.assertEqual(rows['ARS/Expenses/SALARY_EXPENSE']['Total'], Decimal('30.00'))
+        self.assertEqual(
+            [rows['ARS/Net Income'][month] for month in ('2022-12', '2023-01', '2023-02', '2023-03', 'Total')],
+            [Decimal('0.00'), Decimal('70.00'), Decimal('0.00'), Decimal('5.00'), Decimal('75.00')],
+        )
+
+    def test_income_statement_by_currency(self):
+        self.add_dollars()
+        with get_session() as session:
+            rows = {row['key']: row for row in get_income_statement_rows(get_income_statement(session, 20230101, 20230131))}
+
+        self.assertEqual([key for key, row in rows.items() if row['parent_key'] is None], ['ARS', 'USD'])
+        self.assertEqual(rows['ARS/Revenue/SALARY_REVENUE']['Total'], Decimal('100.00'))
+        self.assertEqual(rows['USD/Revenue/SALARY_REVENUE']['Total'], Decimal('100000.00'))
+        self.assertEqual(rows['USD/Expenses']['Total'], Decimal('0.00'))
+        self.assertEqual(
+            (rows['ARS/Net Income']['Total'], rows['USD/Net Income']['Total']), (Decimal('70.00'), Decimal('100000.00')),
+        )
+        self.assertIsNone(rows['USD']['Total'])
+
+    def test_income_statement_does_not_query_each_month(self):
+        statements = []
+        event.listen(get_engine(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+        for start_date, end_date in ((20230101, 20230131), (20100101, 20301231)):
+            statements.clear()
+            with get_session() as session:
+                get_income_statement(session, start_date, end_date)
+            self.assertEqual(len(statements), 2)
+
+    def test_empty_income_statement(self):
+        with get_session() as session:
+            rows = get_income_statement_rows(get_income_statement(session, 20240101, 20240131))
+        self.assertEqual(rows, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
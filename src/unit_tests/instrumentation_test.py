@@ -0,0 +1,67 @@
+import threading
+import unittest
+from sqlalchemy import create_engine, text
+from database import instrumentation
+from database.instrumentation import UNTRACKED, get_stats, instrument_engine, reset_stats, track
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        reset_stats()
+        self.engine = create_engine("sqlite+pysqlite:///:memory:")
+        instrument_engine(self.engine)
+
+    def execute(self, times: int):
+        with self.engine.connect() as connection:
+            for _ in range(times):
+                connection.execute(text("SELECT 1"))
+
+    def get_stats(self) -> dict:
+        return {action.name: action for action in get_stats()}
+
+    def test_statements_by_action(self):
+        with track("ListView.get_data"):
+            self.execute(3)
+        with track("ListView.get_data"):
+            self.execute(2)
+        with track("EditView.on_accept"):
+            self.execute(1)
+        self.execute(1)
+
+        stats = self.get_stats()
+        self.assertEqual((stats["ListView.get_data"].calls, stats["ListView.get_data"].statements), (2, 5))
+        self.assertEqual(stats["ListView.get_data"].statements_per_call, 2.5)
+        self.assertEqual(stats["EditView.on_accept"].statements, 1)
+        self.assertEqual(stats[UNTRACKED].statements, 1)
+        self.assertEqual(get_stats()[0].name, "ListView.get_data")
+
+    def test_nested_actions_and_threads(self):
+        with track("outer"):
+            with track("inner"):
+                self.execute(2)
+            # The action of the main thread is not seen by other threads
+            worker = threading.Thread(target=self.execute, args=(1,))
+            worker.start()
+            worker.join()
+            self.execute(1)
+
+        stats = self.get_stats()
+        self.assertEqual(stats["inner"].statements, 2)
+        self.assertEqual(stats["outer"].statements, 1)
+        self.assertEqual(stats[UNTRACKED].statements, 1)
+
+    def test_slowest_statements(self):
+        with track("action"):
+            self.execute(instrumentation.SLOWEST_STATEMENTS + 3)
+
+        slowest = self.get_stats()["action"].slowest
+        self.assertEqual(len(slowest), instrumentation.SLOWEST_STATEMENTS)
+        self.assertEqual(slowest, sorted(slowest, reverse=True))
+
+    def tearDown(self):
+        self.engine.dispose()
+        reset_stats()
+
+
+if __name__ == '__main__':
+    unittest.main()
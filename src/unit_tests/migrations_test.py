@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from decimal import Decimal
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from database.models import Account, Transaction
+from database.balances import get_account_balances
+from database.migrations import LATEST_VERSION, get_schema_version, upgrade_database
+
+
+# Schema and data of a database created before the migrations existed (version 0)
+LEGACY_SCHEMA = '''
+    CREATE TABLE currency (id INTEGER PRIMARY KEY, code VARCHAR(3) NOT NULL UNIQUE, description VARCHAR NOT NULL);
+    CREATE TABLE account_group (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL UNIQUE, description VARCHAR NOT NULL, parent_id INTEGER REFERENCES account_group (id));
+    CREATE TABLE account_type (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL UNIQUE, normal_side VARCHAR NOT NULL);
+    CREATE TABLE account (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL UNIQUE, description VARCHAR NOT NULL, account_number VARCHAR NOT NULL, currency_id INTEGER NOT NULL REFERENCES currency (id), opened_at VARCHAR NOT NULL, closed_at VARCHAR, account_group_id INTEGER NOT NULL REFERENCES account_group (id), account_type_id INTEGER NOT NULL REFERENCES account_type (id));
+    CREATE TABLE account_overdraft (id INTEGER PRIMARY KEY, account_id INTEGER NOT NULL REFERENCES account (id), "limit" NUMERIC NOT NULL, started_at VARCHAR NOT NULL, ended_at VARCHAR);
+    CREATE TABLE "transaction" (id INTEGER PRIMARY KEY, timestamp VARCHAR NOT NULL, description VARCHAR NOT NULL, installment_number INTEGER NOT NULL, installment_total INTEGER NOT NULL, debit_reference VARCHAR NOT NULL, debit_account_id INTEGER NOT NULL REFERENCES account (id), debit_amount NUMERIC NOT NULL, credit_reference VARCHAR NOT NULL, credit_account_id INTEGER NOT NULL REFERENCES account (id), credit_amount NUMERIC NOT NULL, is_reconciled BOOLEAN NOT NULL);
+    CREATE TABLE provider (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL UNIQUE, description VARCHAR NOT NULL);
+
+    INSERT INTO currency VALUES (1, 'ARS', '');
+    INSERT INTO account_group VALUES (1, 'Assets', '', NULL), (2, 'Revenue', '', NULL);
+    INSERT INTO account_type VALUES (1, 'CASH', 'DEBIT'), (2, 'SALARY_REVENUE', 'CREDIT');
+    INSERT INTO account VALUES
+        (1, 'Wallet', '', '', 1, '2023-01-01 03:00:00', NULL, 1, 1),
+        (2, 'Salary', '', '', 1, '2023-01-01 03:00:00', NULL, 2, 2);
+    INSERT INTO account_overdraft VALUES (1, 1, 1000.5, '2023-01-01 03:00:00', NULL);
+    INSERT INTO "transaction" VALUES
+        (1, '2023-03-01 15:00:00', 'a', 1, 1, '', 1, 10.1, '', 2, 10.1, 0),
+        (2, '2023-03-02 15:00:00', 'b', 1, 1, '', 1, 0.2, '', 2, 0.2, 0);
+'''
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'test.db')
+        self.engine = create_engine(f"sqlite+pysqlite:///{self.path}")
+
+    def get_index_names(self) -> set[str]:
+        with self.engine.connect() as connection:
+            return set(connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+
+    def test_new_database(self):
+        upgrade_database(self.engine)
+
+        with self.engine.connect() as connection:
+            self.assertEqual(get_schema_version(connection), LATEST_VERSION)
+        self.assertTrue({
+            'ix_transaction_timestamp',
+            'ix_transaction_debit_account_id',
+            'ix_transaction_credit_account_id',
+            'ix_account_account_group_id',
+            'ix_account_group_parent_id',
+            'ix_transaction_import_fingerprint',
+            'ix_transaction_debit_account_id_local_date',
+        }.issubset(self.get_index_names()))
+        with self.engine.connect() as connection:
+            triggers = set(connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+        self.assertIn('trg_transaction_balance_insert', triggers)
+        self.assertIn('trg_transaction_checkpoint_insert', triggers)
+
+    def test_upgrade_legacy_database(self):
+        with sqlite3.connect(self.path) as connection:
+            connection.executescript(LEGACY_SCHEMA)
+
+        upgrade_database(self.engine)
+
+        with Session(self.engine) as session:
+            self.assertEqual(get_schema_version(session.connection()), LATEST_VERSION)
+            transaction = session.get(Transaction, 1)
+            self.assertEqual(transaction.debit_amount, Decimal('10.10'))
+            self.assertEqual(transaction.timestamp, 1677682800)
+            self.assertEqual(get_account_balances(session), {1: Decimal('10.30'), 2: Decimal('10.30')})
+            self.assertEqual(session.get(Account, 2).alias, 'Revenue>Salary')
+            self.assertIsNone(transaction.import_fingerprint)
+        self.assertTrue({'ix_transaction_debit_account_id', 'ix_transaction_import_fingerprint'}.issubset(self.get_index_names()))
+
+    def test_upgrade_is_skipped_when_up_to_date(self):
+        upgrade_database(self.engine)
+
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        upgrade_database(self.engine)
+
+        self.assertEqual(statements, ["PRAGMA user_version"])
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+from sqlalchemy import create_engine, text
+from database.pragmas import set_pragma_profile
+
+
+class TestPragmas(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite+pysqlite:///{os.path.join(self.directory.name, 'test.db')}")
+
+    def get_pragma(self, name: str):
+        with self.engine.connect() as connection:
+            return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+    def test_performance_profile(self):
+        set_pragma_profile(self.engine, 'performance')
+
+        self.assertEqual(self.get_pragma('journal_mode'), 'wal')
+        self.assertEqual(self.get_pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.get_pragma('temp_store'), 2)  # MEMORY
+        self.assertEqual(self.get_pragma('foreign_keys'), 1)
+
+    def test_safe_profile(self):
+        set_pragma_profile(self.engine, 'safe')
+
+        self.assertEqual(self.get_pragma('journal_mode'), 'delete')
+        self.assertEqual(self.get_pragma('foreign_keys'), 1)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            set_pragma_profile(self.engine, 'fast')
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
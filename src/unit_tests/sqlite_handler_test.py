@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func, select
+from database.models import Currency
+from database.sqlite_handler import MEMORY_DATABASE, close_database, get_database_path, get_session, open_database
+
+
+class TestSqliteHandler(unittest.TestCase):
+    def tearDown(self):
+        close_database()
+
+    def test_memory_database_is_shared_by_the_threads(self):
+        open_database(MEMORY_DATABASE)
+        with get_session() as session:
+            session.add(Currency(code='ARS', description=''))
+            session.commit()
+
+        def count_currencies() -> int:
+            with get_session() as session:
+                return session.scalar(select(func.count()).select_from(Currency))
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(executor.submit(count_currencies).result(), 1)
+
+    def test_open_another_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ('first.db', 'second.db'):
+                path = os.path.join(directory, name)
+                open_database(path)
+                self.assertEqual(get_database_path(), path)
+                with get_session() as session:
+                    self.assertEqual(session.scalar(select(func.count()).select_from(Currency)), 0)
+                    session.add(Currency(code=name[:3].upper(), description=''))
+                    session.commit()
+            close_database()
+            self.assertTrue(os.path.exists(os.path.join(directory, 'first.db')))
+
+
+if __name__ == '__main__':
+    unittest.main()
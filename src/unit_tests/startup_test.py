@@ -0,0 +1,15 @@
+import subprocess
+import sys
+import unittest
+
+
+class TestStartup(unittest.TestCase):
+    def test_menu_does_not_load_the_database(self):
+        # The views (and the database) are imported when their menu item is clicked, see `AppMenu.open_view`
+        code = "import sys, main; print('sqlalchemy' in sys.modules, 'database.sqlite_handler' in sys.modules)"
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split(), ['False', 'False'])
+
+
+if __name__ == '__main__':
+    unittest.main()
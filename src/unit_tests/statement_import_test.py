@@ -0,0 +1,239 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from decimal import Decimal
+from sqlalchemy import select
+from database.balances import get_account_balances
+from database.executor import JobCancelled, check_cancelled
+from database.models import Account, AccountGroup, AccountType, Currency, Transaction
+from database.sqlite_handler import MEMORY_DATABASE, close_database, get_engine, get_session, open_database
+from database.statement_import import (
+    STATEMENT_FORMATS, ImportResult, MappingRules, StatementLine, get_fingerprint, import_statement, import_statement_file,
+    parse_amount, parse_date, read_statement,
+)
+from views.statement_import import parse_rules
+
+
+ACCOUNT_STATEMENT = """Cuenta;Caja de Ahorro en Pesos
+Titular;Test
+
+Fecha;Descripción;Referencia;Importe;Saldo
+01/03/2024;Sueldo;0001;150.000,00;150.000,00
+02/03/2024;Supermercado Dia;0002;-1.234,56;148.765,44
+03/03/2024;Ajuste;0003;0,00;148.765,44
+;Saldo final;;;148.765,44
+"""
+
+CREDIT_CARD_STATEMENT = """Fecha,Descripción,Cuotas,Comprobante,Pesos,Dólares
+05/03/2024,NETFLIX,,123456,"2.500,00",
+06/03/2024,FRAVEGA,02/06,654321,"10.000,00",
+10/03/2024,SU PAGO EN PESOS,,,"-50.000,00",
+"""
+
+
+def add_accounts() -> None:
+    with get_session() as session:
+        session.add_all([
+            Currency(id=1, code='ARS', description=''),
+            AccountGroup(id=1, name='Assets', description=''),
+            AccountGroup(id=2, name='Expenses', description=''),
+            AccountType(id=1, name='BANK', normal_side='DEBIT'),
+            AccountType(id=2, name='EXPENSE', normal_side='DEBIT'),
+        ])
+        session.flush()
+        session.add_all([
+            Account(id=1, name='Bank', currency_id=1, opened_at=0, account_group_id=1, account_type_id=1),
+            Account(id=2, name='Food', currency_id=1, opened_at=0, account_group_id=2, account_type_id=2),
+            Account(id=3, name='Other', currency_id=1, opened_at=0, account_group_id=2, account_type_id=2),
+        ])
+        session.commit()
+
+
+class TestStatementParsing(unittest.TestCase):
+    def test_parse_amount(self):
+        self.assertEqual(parse_amount('-1.234,56'), Decimal('-1234.56'))
+        self.assertEqual(parse_amount('$ 1234.5'), Decimal('1234.50'))
+        self.assertIsNone(parse_amount(' '))
+        with self.assertRaisesRegex(ValueError, "amount"):
+            parse_amount('abc')
+
+    def test_parse_date(self):
+        self.assertEqual(parse_date('01/03/2024'), 1709305200)  # 2024-03-01 12:00:00 -03:00
+        self.assertEqual(parse_date('2024-03-01'), 1709305200)
+        with self.assertRaisesRegex(ValueError, "date"):
+            parse_date('March 1st')
+
+    def test_read_account_statement(self):
+        lines = list(read_statement(io.StringIO(ACCOUNT_STATEMENT), STATEMENT_FORMATS['santander_account']))
+
+        self.assertEqual([line.description for line in lines], ['Sueldo', 'Supermercado Dia'])
+        self.assertEqual([line.amount for line in lines], [Decimal('150000.00'), Decimal('-1234.56')])
+        self.assertEqual([line.line_number for line in lines], [5, 6])
+        self.assertEqual(lines[1].reference, '0002')
+
+    def test_read_credit_card_statement(self):
+        lines = list(read_statement(io.StringIO(CREDIT_CARD_STATEMENT), STATEMENT_FORMATS['santander_credit_card']))
+
+        # The charges decrease the balance of the credit card, the payments increase it
+        self.assertEqual([line.amount for line in lines], [Decimal('-2500.00'), Decimal('-10000.00'), Decimal('50000.00')])
+        self.assertEqual((lines[1].installment_number, lines[1].installment_total), (2, 6))
+
+    def test_read_lines_without_date(self):
+        statement = "Fecha;Descripción;Importe;Saldo\n01/03/2024;Sueldo;10,00;10,00\n;Total;TOTAL ARS;Saldo\n"
+        lines = list(read_statement(io.StringIO(statement), STATEMENT_FORMATS['santander_account']))
+
+        self.assertEqual([line.amount for line in lines], [Decimal('10.00')])
+
+    def test_read_errors(self):
+        with self.assertRaisesRegex(ValueError, "header"):
+            list(read_statement(io.StringIO("a;b\n1;2\n"), STATEMENT_FORMATS['santander_account']))
+        with self.assertRaisesRegex(ValueError, "Line 2: .*date"):
+            list(read_statement(io.StringIO("Fecha;Descripcion;Importe\nayer;Sueldo;10\n"), STATEMENT_FORMATS['santander_account']))
+
+    def test_mapping_rules(self):
+        rules = MappingRules(statement_account_id=1, default_account_id=3, rules=[('super|dia', 2)])
+        line = StatementLine(line_number=1, timestamp=0, description='SUPERMERCADO', reference='', amount=Decimal('-10'))
+
+        transaction = rules.get_transaction(line)
+        self.assertEqual((transaction['debit_account_id'], transaction['credit_account_id']), (2, 1))
+        self.assertEqual(transaction['debit_amount'], Decimal('10'))
+
+        transaction = rules.get_transaction(line._replace(description='Sueldo', amount=Decimal('10')))
+        self.assertEqual((transaction['debit_account_id'], transaction['credit_account_id']), (1, 3))
+
+    def test_mapping_rules_to_the_statement_account(self):
+        with self.assertRaisesRegex(ValueError, "default counterpart"):
+            MappingRules(statement_account_id=1, default_account_id=1)
+        with self.assertRaisesRegex(ValueError, "'super'"):
+            MappingRules(statement_account_id=1, default_account_id=3, rules=[('super', 1)])
+
+    def test_parse_rules(self):
+        account_ids = {'Expenses>Food': 2}
+        self.assertEqual(parse_rules("super => Expenses>Food\n\n", account_ids), [('super', 2)])
+        with self.assertRaisesRegex(ValueError, "Rule 1"):
+            parse_rules("super Expenses>Food", account_ids)
+        with self.assertRaisesRegex(ValueError, "does not exist"):
+            parse_rules("super => Expenses>Drinks", account_ids)
+
+
+class TestStatementImport(unittest.TestCase):
+    def setUp(self):
+        open_database(MEMORY_DATABASE)
+        self.addCleanup(close_database)
+        add_accounts()
+        self.rules = MappingRules(statement_account_id=1, default_account_id=3, rules=[('supermercado', 2)])
+
+    def test_import_in_chunks(self):
+        lines = [
+            StatementLine(line_number=number, timestamp=1709305200, description='Supermercado', reference='', amount=Decimal('-1'))
+            for number in range(7)
+        ]
+        progress = []
+
+        result = import_statement(get_engine(), lines, self.rules, chunk_size=3, on_progress=progress.append)
+
+        self.assertEqual(result, ImportResult(read=7, imported=7))
+        self.assertEqual(progress, [3, 6, 7])
+        with get_session() as session:
+            self.assertEqual(get_account_balances(session), {1: Decimal('-7.00'), 2: Decimal('7.00')})
+
+    def test_overlapping_imports(self):
+        def get_lines(days: range) -> list[StatementLine]:
+            # Two equal lines a day, without reference
+            return [
+                StatementLine(line_number=0, timestamp=1709305200 + day * 86400, description='Supermercado', reference='', amount=Decimal('-1'))
+                for day in days for _ in range(2)
+            ]
+
+        self.assertEqual(import_statement(get_engine(), get_lines(range(0, 10)), self.rules, chunk_size=3), ImportResult(20, 20))
+        self.assertEqual(import_statement(get_engine(), get_lines(range(0, 10)), self.rules, chunk_size=4), ImportResult(20, 0))
+        result = import_statement(get_engine(), get_lines(range(5, 15)), self.rules, chunk_size=3)
+
+        self.assertEqual((result.imported, result.duplicates), (10, 10))
+        with get_session() as session:
+            self.assertEqual(get_account_balances(session), {1: Decimal('-30.00'), 2: Decimal('30.00')})
+
+    def test_equal_lines_on_the_same_day(self):
+        def get_lines(count: int) -> list[StatementLine]:
+            # Equal lines between the lines of the previous and the next day
+            return [
+                StatementLine(line_number=0, timestamp=1709305200 + day * 86400, description='Supermercado', reference='', amount=Decimal('-1'))
+                for day, day_count in ((0, 1), (1, count), (2, 1)) for _ in range(day_count)
+            ]
+
+        self.assertEqual(import_statement(get_engine(), get_lines(2), self.rules), ImportResult(4, 4))
+        self.assertEqual(import_statement(get_engine(), get_lines(3), self.rules), ImportResult(5, 1))
+        self.assertEqual(import_statement(get_engine(), get_lines(3), self.rules), ImportResult(5, 0))
+
+    def test_unsorted_statement(self):
+        lines = [
+            StatementLine(line_number=number, timestamp=1709305200 + day * 86400, description='Sueldo', reference='', amount=Decimal('1'))
+            for number, day in enumerate((0, 1, 0), start=1)
+        ]
+        with self.assertRaisesRegex(ValueError, "Line 3: .*sorted"):
+            import_statement(get_engine(), lines, self.rules)
+
+    def test_fingerprint(self):
+        line = StatementLine(line_number=1, timestamp=1709305200, description='Sueldo', reference='0001', amount=Decimal('10'))
+
+        # The description, the time of the day and the leading zeros of the reference are ignored
+        self.assertEqual(
+            get_fingerprint(1, line),
+            get_fingerprint(1, line._replace(description='SUELDO', timestamp=1709305200 + 3600, reference='1')),
+        )
+        for other in (line._replace(amount=Decimal('-10')), line._replace(reference='2'), line._replace(timestamp=1709305200 + 86400)):
+            self.assertNotEqual(get_fingerprint(1, line), get_fingerprint(1, other))
+        self.assertNotEqual(get_fingerprint(1, line), get_fingerprint(2, line))
+        self.assertNotEqual(get_fingerprint(1, line), get_fingerprint(1, line, occurrence=2))
+
+    def test_import_is_atomic(self):
+        def get_lines():
+            yield StatementLine(line_number=1, timestamp=1709305200, description='Sueldo', reference='', amount=Decimal('1'))
+            raise ValueError("Line 2: Could not parse the date")
+
+        with self.assertRaises(ValueError):
+            import_statement(get_engine(), get_lines(), self.rules, chunk_size=1)
+
+        with get_session() as session:
+            self.assertEqual(session.scalars(select(Transaction)).all(), [])
+
+    def test_cancelled_import_is_rolled_back(self):
+        lines = [
+            StatementLine(line_number=number, timestamp=1709305200, description='Supermercado', reference='', amount=Decimal('-1'))
+            for number in range(7)
+        ]
+        cancel = threading.Event()
+
+        def on_progress(read: int) -> None:
+            check_cancelled(cancel)
+            cancel.set()
+
+        with self.assertRaises(JobCancelled):
+            import_statement(get_engine(), lines, self.rules, chunk_size=3, on_progress=on_progress)
+
+        with get_session() as session:
+            self.assertEqual(session.scalars(select(Transaction)).all(), [])
+
+    def test_import_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8-sig') as file:
+            file.write(ACCOUNT_STATEMENT)
+        self.addCleanup(os.remove, file.name)
+        progress = []
+
+        result = import_statement_file(
+            get_engine(), file.name, STATEMENT_FORMATS['santander_account'], self.rules,
+            on_progress=lambda *values: progress.append(values),
+        )
+
+        self.assertEqual(result.imported, 2)
+        self.assertEqual(progress, [(2, 1.0)])
+        with get_session() as session:
+            self.assertEqual(
+                get_account_balances(session), {1: Decimal('148765.44'), 2: Decimal('1234.56'), 3: Decimal('-150000.00')},
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+from database.models import Account, AccountGroup, AccountOverdraft, Currency, Transaction
+from database.balances import get_account_balances
+from benchmarks.synthetic_ledger import LedgerSize, generate_ledger
+
+
+class TestSyntheticLedger(unittest.TestCase):
+    SIZE = LedgerSize(currencies=3, group_depth=2, group_fanout=3, accounts=50, transactions=500)
+
+    def generate(self, seed: int = 0):
+        engine = create_engine("sqlite+pysqlite://")
+        generate_ledger(engine, size=self.SIZE, seed=seed)
+        self.addCleanup(engine.dispose)
+        return engine
+
+    def test_sizes(self):
+        with Session(self.generate()) as session:
+            self.assertEqual(session.scalar(select(func.count(Currency.id))), 3)
+            self.assertEqual(session.scalar(select(func.count(AccountGroup.id))), 3 + 3 * 3)
+            self.assertEqual(session.scalar(select(func.count(Account.id))), 50)
+            self.assertEqual(session.scalar(select(func.count(Transaction.id))), 500)
+            self.assertGreater(session.scalar(select(func.count(AccountOverdraft.id))), 0)
+            self.assertEqual(session.get(AccountGroup, 12).alias, 'Group 3>Group 3.3')
+
+            # The balances rebuilt after the bulk insert add up to zero
+            self.assertEqual(sum(
+                balance if normal_side == 'DEBIT' else -balance
+                for balance, normal_side in (
+                    (balance, session.get(Account, account_id).account_type.normal_side)
+                    for account_id, balance in get_account_balances(session).items()
+                )
+            ), 0)
+
+    def test_reproducible(self):
+        def get_transactions(engine) -> list:
+            with engine.connect() as connection:
+                return connection.execute(select(Transaction.__table__).order_by(Transaction.id)).all()
+
+        self.assertEqual(get_transactions(self.generate(seed=1)), get_transactions(self.generate(seed=1)))
+        self.assertNotEqual(get_transactions(self.generate(seed=1)), get_transactions(self.generate(seed=2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
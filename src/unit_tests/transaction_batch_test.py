@@ -0,0 +1,80 @@
+import unittest
+from decimal import Decimal
+from sqlalchemy import select
+from database.balances import get_account_balances
+from database.common_queries import AccountEntry
+from database.models import Account, AccountGroup, AccountType, Currency, Transaction
+from database.sqlite_handler import MEMORY_DATABASE, close_database, get_session, open_database
+from views.transaction_batch import get_batch_row_values, insert_transactions, is_empty_row
+
+
+ACCOUNT_INDEX = {
+    'Assets>Wallet': AccountEntry(1, 'ARS', 'DEBIT'),
+    'Revenue>Salary': AccountEntry(2, 'ARS', 'CREDIT'),
+}
+
+
+def get_row(**values) -> dict[str, str]:
+    return {
+        'timestamp': '2024-03-01 12:00:00',
+        'description': 'Salary',
+        'debit_account_alias': 'Assets>Wallet',
+        'credit_account_alias': 'Revenue>Salary',
+        'amount': '100.5',
+        'reference': '',
+        **values,
+    }
+
+
+class TestTransactionBatch(unittest.TestCase):
+    def test_valid_row(self):
+        values = get_batch_row_values(get_row(), ACCOUNT_INDEX)
+
+        self.assertEqual(values['timestamp'], 1709305200)  # 2024-03-01 15:00:00 UTC
+        self.assertEqual((values['debit_account_id'], values['credit_account_id']), (1, 2))
+        self.assertEqual((values['debit_amount'], values['credit_amount']), (Decimal('100.50'), Decimal('100.50')))
+
+    def test_invalid_rows(self):
+        for row, message in [
+            (get_row(timestamp='yesterday'), "timestamp"),
+            (get_row(amount='1,5'), "amount"),
+            (get_row(amount='nan'), "amount"),
+            (get_row(amount='0'), "greater than zero"),
+            (get_row(amount=''), "can not be empty"),
+            (get_row(credit_account_alias='Assets>Wallet'), "must be different"),
+            (get_row(debit_account_alias='Assets>Bank'), "not found"),
+        ]:
+            with self.subTest(row=row), self.assertRaisesRegex(ValueError, message):
+                get_batch_row_values(row, ACCOUNT_INDEX)
+
+    def test_empty_row(self):
+        self.assertTrue(is_empty_row(get_row(description='', debit_account_alias='', credit_account_alias='', amount='')))
+        self.assertFalse(is_empty_row(get_row(debit_account_alias='', credit_account_alias='', amount='')))
+
+    def test_insert_transactions(self):
+        open_database(MEMORY_DATABASE)
+        self.addCleanup(close_database)
+        with get_session() as session:
+            session.add_all([
+                Currency(id=1, code='ARS', description=''),
+                AccountGroup(id=1, name='Assets', description=''),
+                AccountGroup(id=2, name='Revenue', description=''),
+                AccountType(id=1, name='CASH', normal_side='DEBIT'),
+                AccountType(id=2, name='SALARY_REVENUE', normal_side='CREDIT'),
+            ])
+            session.flush()
+            session.add_all([
+                Account(id=1, name='Wallet', currency_id=1, opened_at=0, account_group_id=1, account_type_id=1),
+                Account(id=2, name='Salary', currency_id=1, opened_at=0, account_group_id=2, account_type_id=2),
+            ])
+            session.commit()
+
+        insert_transactions([get_batch_row_values(get_row(amount=amount), ACCOUNT_INDEX) for amount in ('10', '20.25')])
+
+        with get_session() as session:
+            self.assertEqual(session.scalars(select(Transaction.local_date)).all(), [20240301, 20240301])
+            self.assertEqual(get_account_balances(session), {1: Decimal('30.25'), 2: Decimal('30.25')})
+
+
+if __name__ == '__main__':
+    unittest.main()
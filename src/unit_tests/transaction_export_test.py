@@ -0,0 +1,108 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from decimal import Decimal
+from database.executor import JobCancelled, check_cancelled
+from database.models import Account, AccountGroup, AccountType, Currency, Transaction
+from database.sqlite_handler import MEMORY_DATABASE, close_database, get_engine, get_session, open_database
+from database.transaction_export import EXPORT_COLUMNS, export_transactions
+from utils import get_date_key
+
+
+class TestTransactionExport(unittest.TestCase):
+    def setUp(self):
+        open_database(MEMORY_DATABASE)
+        self.addCleanup(close_database)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        with get_session() as session:
+            session.add_all([
+                Currency(id=1, code='ARS', description=''),
+                AccountGroup(id=1, name='Assets', description=''),
+                AccountType(id=1, name='CASH', normal_side='DEBIT'),
+            ])
+            session.flush()
+            session.add_all([
+                Account(id=id, name=name, currency_id=1, opened_at=0, account_group_id=1, account_type_id=1)
+                for id, name in ((1, 'Wallet'), (2, 'Bank'), (3, 'Savings'))
+            ])
+            session.flush()
+            # One transaction a day from 2024-03-01, in reverse order, between the accounts 1-2 and 2-3
+            session.add_all([
+                Transaction(
+                    timestamp=1709305200 + day * 86400, description=f"Day {day + 1}",
+                    debit_account_id=1 if day % 2 else 3, debit_amount=Decimal('1.5') * (day + 1),
+                    credit_account_id=2, credit_amount=Decimal('1.5') * (day + 1),
+                )
+                for day in reversed(range(10))
+            ])
+            session.commit()
+
+    def test_export_csv(self):
+        path = os.path.join(self.directory, 'transactions.csv')
+        progress = []
+
+        exported = export_transactions(get_engine(), path, chunk_size=4, on_progress=lambda *values: progress.append(values))
+
+        self.assertEqual(exported, 10)
+        self.assertEqual(progress, [(4, 10), (8, 10), (10, 10)])
+        with open(path, newline='', encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(list(rows[0]), list(EXPORT_COLUMNS))
+        self.assertEqual([row['description'] for row in rows], [f"Day {day}" for day in range(1, 11)])
+        self.assertEqual(rows[1]['timestamp'], '2024-03-02 12:00:00')
+        self.assertEqual((rows[1]['debit_account'], rows[1]['credit_account']), ('Assets>Wallet', 'Assets>Bank'))
+        self.assertEqual((rows[1]['debit_amount'], rows[1]['debit_currency']), ('3.00', 'ARS'))
+        self.assertFalse(os.path.exists(f"{path}.part"))
+
+    def test_export_jsonl_filtered(self):
+        path = os.path.join(self.directory, 'transactions.jsonl')
+
+        exported = export_transactions(get_engine(), path, start_date=20240302, end_date=20240307, account_id=1)
+
+        with open(path, encoding='utf-8') as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual(exported, 3)
+        self.assertEqual([row['description'] for row in rows], ['Day 2', 'Day 4', 'Day 6'])
+        self.assertEqual(rows[0]['debit_amount'], '3.00')
+        self.assertIs(rows[0]['is_reconciled'], False)
+
+    def test_invalid_extension(self):
+        with self.assertRaisesRegex(ValueError, ".csv"):
+            export_transactions(get_engine(), os.path.join(self.directory, 'transactions.xlsx'))
+
+    def test_failed_export_leaves_no_file(self):
+        path = os.path.join(self.directory, 'transactions.csv')
+
+        with mock.patch('database.transaction_export.get_datetime_from_db', side_effect=OSError("Disk full")):
+            with self.assertRaises(OSError):
+                export_transactions(get_engine(), path)
+
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_cancelled_export_leaves_no_file(self):
+        path = os.path.join(self.directory, 'transactions.csv')
+        cancel = threading.Event()
+
+        def on_progress(exported: int, total: int) -> None:
+            check_cancelled(cancel)
+            cancel.set()
+
+        with self.assertRaises(JobCancelled):
+            export_transactions(get_engine(), path, chunk_size=4, on_progress=on_progress)
+
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_get_date_key(self):
+        self.assertEqual(get_date_key('2024-03-01'), 20240301)
+        self.assertIsNone(get_date_key(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
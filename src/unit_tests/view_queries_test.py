@@ -0,0 +1,177 @@
+import unittest
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from database.models import Account, AccountGroup, AccountOverdraft, AccountType, Currency, Transaction
+from database.migrations import upgrade_database
+from database.view_queries import (
+    get_account_aliases, get_account_ledger_page, get_account_group_aliases, get_account_overdraft_rows, get_chart_of_accounts_rows, get_transaction_page,
+    get_transaction_rows,
+)
+
+
+class TestViewQueries(unittest.TestCase):
+    """ The statements issued to build the rows of a view must not grow with the size of the ledger. """
+
+    def setUp(self):
+        self.engine = create_engine("sqlite+pysqlite://")
+        upgrade_database(self.engine)
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._count_statement)
+
+        with Session(self.engine) as session:
+            session.add_all([
+                Currency(id=1, code='ARS'),
+                AccountType(id=1, name='CASH', normal_side='DEBIT'),
+                AccountType(id=2, name='SALARY_REVENUE', normal_side='CREDIT'),
+                AccountGroup(id=1, name='Assets'),
+                AccountGroup(id=2, name='Banks', parent_id=1),
+                AccountGroup(id=3, name='Santander', parent_id=2),
+                AccountGroup(id=4, name='Revenue'),
+            ])
+            session.commit()
+        self.accounts = 0
+        self.transactions = 0
+
+    def _count_statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def add_ledger(self, accounts: int, transactions: int) -> None:
+        """ Add accounts (with an overdraft each) and transactions between them. """
+        with Session(self.engine) as session:
+            for _ in range(accounts):
+                self.accounts += 1
+                session.add(Account(
+                    id=self.accounts,
+                    name=f"Account {self.accounts}",
+                    currency_id=1,
+                    opened_at=1672542000,
+                    account_group_id=3 if self.accounts % 2 else 4,
+                    account_type_id=1 if self.accounts % 2 else 2,
+                ))
+                session.add(AccountOverdraft(account_id=self.accounts, limit=Decimal('100'), started_at=1672542000))
+            session.flush()
+            for _ in range(transactions):
+                self.transactions += 1
+                session.add(Transaction(
+                    timestamp=1677682800 + self.transactions,
+                    debit_account_id=self.transactions % self.accounts + 1,
+                    credit_account_id=(self.transactions + 1) % self.accounts + 1,
+                    debit_amount=Decimal('10.50'),
+                    credit_amount=Decimal('10.50'),
+                ))
+            session.commit()
+
+    def count_statements(self, func) -> int:
+        self.statements.clear()
+        with Session(self.engine) as session:
+            func(session)
+        return len(self.statements)
+
+    def assert_constant_statements(self, func) -> None:
+        self.add_ledger(accounts=4, transactions=10)
+        small_ledger = self.count_statements(func)
+        self.add_ledger(accounts=40, transactions=500)
+        large_ledger = self.count_statements(func)
+
+        self.assertEqual(small_ledger, large_ledger)
+        self.assertLessEqual(large_ledger, 4)
+
+    def test_transaction_rows(self):
+        self.assert_constant_statements(get_transaction_rows)
+
+        with Session(self.engine) as session:
+            rows = get_transaction_rows(session)
+        self.assertEqual(len(rows), self.transactions)
+        self.assertEqual(rows[-1]['debit_account'], 'Revenue>Account 2')
+        self.assertEqual(rows[-1]['credit_account'], 'Assets>Banks>Santander>Account 3')
+        self.assertEqual(rows[-1]['debit_amount'], Decimal('10.50'))
+
+    def test_transaction_pages(self):
+        self.add_ledger(accounts=4, transactions=25)
+
+        with Session(self.engine) as session:
+            for sort_column, descending in (('timestamp', True), ('debit_account', False), ('credit_amount', True)):
+                pages = [get_transaction_page(session, sort_column, descending, limit=10)]
+                while next_page := get_transaction_page(session, sort_column, descending, after=pages[-1][-1]['_key'], limit=10):
+                    pages.append(next_page)
+                previous_page = get_transaction_page(session, sort_column, descending, before=pages[2][0]['_key'], limit=10)
+
+                self.assertEqual([len(page) for page in pages], [10, 10, 5])
+                self.assertEqual(sorted(row['id'] for page in pages for row in page), list(range(1, 26)))
+                self.assertEqual(previous_page, pages[1])
+            self.assertEqual([row['id'] for row in pages[0][:3]], [25, 24, 23])
+
+    def test_account_ledger_pages(self):
+        self.add_ledger(accounts=4, transactions=25)
+        # The running balance of the account 2 (SALARY_REVENUE, a credit account), one entry at a time in timestamp order
+        balances, balance = {}, Decimal('0')
+        with Session(self.engine) as session:
+            for transaction in session.query(Transaction).order_by(Transaction.timestamp):
+                if 2 in (transaction.debit_account_id, transaction.credit_account_id):
+                    balance += transaction.credit_amount if transaction.credit_account_id == 2 else -transaction.debit_amount
+                    balances[transaction.id] = balance
+
+            for descending in (True, False):
+                pages = [get_account_ledger_page(session, 2, descending, limit=4)]
+                while next_page := get_account_ledger_page(session, 2, descending, after=pages[-1][-1]['_key'], limit=4):
+                    pages.append(next_page)
+                previous_page = get_account_ledger_page(session, 2, descending, before=pages[2][0]['_key'], limit=4)
+
+                rows = [row for page in pages for row in page]
+                expected_ids = sorted(balances, reverse=descending)
+                self.assertEqual([row['id'] for row in rows], expected_ids)
+                self.assertEqual({row['id']: row['balance'] for row in rows}, balances)
+                self.assertEqual(previous_page, pages[1])
+            self.assertEqual((rows[0]['debit'], rows[0]['credit']), (Decimal('10.50'), None))
+
+    def test_account_ledger_entries_of_both_sides(self):
+        self.add_ledger(accounts=4, transactions=8)
+        with Session(self.engine) as session:
+            # A transaction that debits and credits the same account has an entry for each side
+            session.add(Transaction(
+                id=100, timestamp=1677682800 + 5, debit_account_id=2, credit_account_id=2,
+                debit_amount=Decimal('1.00'), credit_amount=Decimal('1.00'),
+            ))
+            session.commit()
+
+            for descending in (True, False):
+                expected = [row['entry'] for row in get_account_ledger_page(session, 2, descending, limit=100)]
+                self.assertEqual(len(set(expected)), len(expected))
+                self.assertIn('100-DEBIT', expected)
+                self.assertIn('100-CREDIT', expected)
+                for limit in range(1, 5):
+                    with self.subTest(descending=descending, limit=limit):
+                        pages = [get_account_ledger_page(session, 2, descending, limit=limit)]
+                        while next_page := get_account_ledger_page(session, 2, descending, after=pages[-1][-1]['_key'], limit=limit):
+                            pages.append(next_page)
+                        self.assertEqual([row['entry'] for page in pages for row in page], expected)
+                        self.assertEqual(get_account_ledger_page(session, 2, descending, before=pages[1][0]['_key'], limit=limit), pages[0])
+
+    def test_account_overdraft_rows(self):
+        self.assert_constant_statements(get_account_overdraft_rows)
+
+    def test_chart_of_accounts_rows(self):
+        self.assert_constant_statements(get_chart_of_accounts_rows)
+
+        with Session(self.engine) as session:
+            groups, accounts = get_chart_of_accounts_rows(session)
+        self.assertEqual(len(groups), 4)
+        self.assertEqual(len(accounts), self.accounts)
+        self.assertEqual(accounts[0]['overdraft'], Decimal('100.00'))
+
+    def test_aliases_follow_the_hierarchy(self):
+        self.add_ledger(accounts=1, transactions=0)
+        with Session(self.engine) as session:
+            session.get(AccountGroup, 2).name = 'Bank Accounts'
+            session.get(AccountGroup, 3).parent_id = 4
+            session.commit()
+            self.assertEqual(get_account_group_aliases(session)[2], 'Assets>Bank Accounts')
+            self.assertEqual(get_account_aliases(session)[1], 'Revenue>Santander>Account 1')
+
+    def tearDown(self):
+        self.engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,27 +1,39 @@
 import tkinter as tk
 import re
+from datetime import datetime
 from config import LOCAL_TIME_ZONE
 import pendulum 
 
 
+_LOCAL_TIMEZONE = pendulum.timezone(LOCAL_TIME_ZONE)
+_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
 def datetime_timezone_converter(date_str: str, tz_from: str, tz_to: str) -> str:
     dt_from = pendulum.parser.parse(date_str, tz=tz_from)
     dt_to = dt_from.in_timezone(tz_to)
     return dt_to.to_datetime_string()
 
-def get_datetime_from_db(value: str) -> str:
-    return datetime_timezone_converter(
-        date_str=value,
-        tz_from='UTC',
-        tz_to=LOCAL_TIME_ZONE,
-    )
+def get_datetime_from_db(value: int) -> str:
+    """ Convert a UTC epoch timestamp (as stored in the database) to a local datetime string. """
+    return datetime.fromtimestamp(value, tz=_LOCAL_TIMEZONE).strftime(_DATETIME_FORMAT)
     
-def get_datetime_to_db(value: str) -> str:
-    return datetime_timezone_converter(
-        date_str=value,
-        tz_from=LOCAL_TIME_ZONE,
-        tz_to='UTC',
-    )
+def get_datetime_to_db(value: str) -> int:
+    """ Convert a local datetime string to a UTC epoch timestamp (as stored in the database). """
+    return pendulum.parser.parse(value, tz=LOCAL_TIME_ZONE).int_timestamp
+
+def get_local_date_key(value: int) -> int:
+    """ Convert a UTC epoch timestamp to the local date as an integer `YYYYMMDD`, used to group by day or month. """
+    local_datetime = datetime.fromtimestamp(value, tz=_LOCAL_TIMEZONE)
+    return local_datetime.year * 10000 + local_datetime.month * 100 + local_datetime.day
+
+def get_date_key(value: str | None) -> int | None:
+    """ Convert a `YYYY-MM-DD` date to the `YYYYMMDD` key of `Transaction.local_date`. """
+    return int(value.replace('-', '')) if value else None
+
+def format_money(value) -> str:
+    """ Format an amount (e.g. a `Decimal` loaded from a `Money` column) to be shown in the tables. """
+    return f"$ {value:.2f}"
 
 def test_toplevel_class(ToplevelClass: tk.Toplevel, *args, **kwargs):
     root = tk.Tk()
@@ -1,6 +1,8 @@
 from database.sqlite_handler import get_session
 from database.models import AccountGroup, AccountGroup
 from database.common_queries import get_account_groups_values
+from database.hierarchy import get_descendant_group_ids
+from sqlalchemy import func, select
 from tkinter import messagebox
 from custom.templates_view import TemplateNewEdit, FrameInput
 from views.config_views import VIEW_WIDGET_WIDTH
@@ -67,23 +69,14 @@ class AccountGroupEditView(TemplateNewEdit):
             
             
     def get_account_groups_values(self):
+        """ The available parents are all the groups, except the group itself and its descendants. """
         with get_session() as session:
-            def get_exluded_groups(parent_group):
-                excluded_groups = [parent_group.id]
-                if not parent_group.children:
-                    return excluded_groups
-                for child in parent_group.children:
-                    excluded_groups.extend(get_exluded_groups(parent_group=child))
-                return excluded_groups
-
-            excluded_groups = get_exluded_groups(
-                    parent_group=session.query(AccountGroup)\
-                        .filter(AccountGroup.id == self.account_group.id)\
-                            .first()
-                )
-            available_groups = session.query(AccountGroup).filter(AccountGroup.id.not_in(excluded_groups)).all()
-        
-            return {group.id: group.alias for group in available_groups}
+            excluded_groups = get_descendant_group_ids(session, account_group_id=self.account_group.id)
+            return dict(session.execute(
+                select(AccountGroup.id, AccountGroup.alias)
+                .where(AccountGroup.id.not_in(excluded_groups))
+                .order_by(func.lower(AccountGroup.name))
+            ).all())
         
             
     def set_inputs(self, input_frame: FrameInput):
@@ -0,0 +1,77 @@
+from utils import center_window, format_money
+from database.sqlite_handler import get_session
+from database.executor import run_in_background
+from database.common_queries import get_accounts_values
+from database.view_queries import ACCOUNT_LEDGER_PAGE_SIZE, get_account_ledger_page
+from decimal import Decimal
+from custom.custom_table import CustomTable
+from custom.templates_view import CustomTopLevel
+from views.config_views import TABLE_COLUMN_WIDTH
+import tkinter as tk
+
+
+class AccountLedgerView(CustomTopLevel):
+    """
+        The entries of an account, in timestamp order, with the balance after each one (see `get_account_ledger_page`).
+        The table is paged, and clicking the `Timestamp` heading reverses the order (the other columns are not sortable).
+
+        Key bindings:
+            - Double click / Enter / F2: Edit the transaction of the selected entry
+    """
+
+    def __init__(self, parent: tk.Toplevel | tk.Tk, account_id: int):
+        self.account_id = account_id
+        super().__init__(
+            parent,
+            title="Account Ledger",
+            resizable=True,
+            footer_buttons_config={
+                'Close': self.destroy,
+            },
+        )
+
+        self.set_table()
+        self.load_title()
+        center_window(window=self, context_window=self.parent)
+        self.bind("<<EventUpdateTable>>", self.table.refresh)
+        self.bind('<F2>', self.on_edit_transaction)
+        self.bind('<Double-1>', self.on_edit_transaction)
+        self.bind('<Return>', self.on_edit_transaction)
+
+    def load_title(self) -> None:
+        def on_done(accounts: dict[int, str]) -> None:
+            self.title(f"Account Ledger - {accounts.get(self.account_id, self.account_id)}")
+
+        run_in_background(self, get_accounts_values, on_done=on_done)
+
+    def get_page(self, sort_column: str | None, descending: bool, after: tuple, before: tuple, limit: int) -> list[dict]:
+        """ The entries are always in timestamp order, it is the only sortable column. """
+        with get_session() as session:
+            rows = get_account_ledger_page(
+                session, self.account_id, descending=descending, after=after, before=before, limit=limit,
+            )
+            # Keep the balance checkpoints created by the first page
+            session.commit()
+            return rows
+
+    def on_edit_transaction(self, event=None) -> None:
+        from views.transaction import TransactionEditView
+
+        if selected_items := self.table.get_items_data(selected_only=True):
+            TransactionEditView(self, selected_items[0]['id'])
+
+    def set_table(self) -> None:
+        self.table = CustomTable(
+            parent=self.body_frame, func_get_page=self.get_page, page_size=ACCOUNT_LEDGER_PAGE_SIZE, selectmode="browse",
+            key_column='entry',
+        )
+        self.table.add_column(column='id', dtype=int, anchor=tk.E, width=TABLE_COLUMN_WIDTH['ID'], sortable=False)
+        self.table.add_column(column='timestamp', dtype=str, anchor=tk.W, width=TABLE_COLUMN_WIDTH['TIMESTAMP'], is_sorted_asc=False)
+        self.table.add_column(column='description', dtype=str, anchor=tk.W, width=TABLE_COLUMN_WIDTH['DESCRIPTION'], sortable=False)
+        self.table.add_column(column='counterpart', text='Counterpart Account', dtype=str, anchor=tk.W, width=TABLE_COLUMN_WIDTH['ACCOUNT_ALIAS'], sortable=False)
+        self.table.add_column(column='reference', dtype=str, anchor=tk.W, width=TABLE_COLUMN_WIDTH['DESCRIPTION'], sortable=False)
+        self.table.add_column(column='debit', dtype=Decimal, anchor=tk.E, width=TABLE_COLUMN_WIDTH['MONEY'], formatter=format_money, sortable=False)
+        self.table.add_column(column='credit', dtype=Decimal, anchor=tk.E, width=TABLE_COLUMN_WIDTH['MONEY'], formatter=format_money, sortable=False)
+        self.table.add_column(column='balance', dtype=Decimal, anchor=tk.E, width=TABLE_COLUMN_WIDTH['MONEY'], formatter=format_money, sortable=False)
+        self.table.refresh()
+        self.table.grid(column=0, row=0, sticky="nswe")
@@ -4,8 +4,10 @@ from tkinter import messagebox
 from custom.custom_table import CustomTable
 from custom.templates_view import TemplateListView, TemplateNewEdit, FrameInput
 from database.common_queries import get_accounts_values
-from utils import get_datetime_from_db, get_datetime_to_db
+from database.view_queries import get_account_overdraft_rows
+from utils import format_money, get_datetime_from_db, get_datetime_to_db
 from views.config_views import VIEW_WIDGET_WIDTH, TABLE_COLUMN_WIDTH
+from decimal import Decimal
 import tkinter as tk
 
 
@@ -23,7 +25,7 @@ class AccountOverdraftNewView(TemplateNewEdit):
 
 
     def get_validated_values(self, input_values: dict) -> dict:
-        if not input_values["limit"] or float(input_values["limit"]) <= 0:
+        if not input_values["limit"] or input_values["limit"] <= 0:
             raise ValueError("Limit must be greater than 0")
 
         if not input_values["started_at"]:
@@ -65,8 +67,8 @@ class AccountOverdraftEditView(TemplateNewEdit):
                 "id": self.account_overdraft.id,
                 "account": self.account_overdraft.account.alias,
                 "limit": f"{self.account_overdraft.limit:.2f}",
-                "started_at": get_datetime_from_db(str(self.account_overdraft.started_at)),
-                "ended_at": get_datetime_from_db(str(self.account_overdraft.ended_at)) if self.account_overdraft.ended_at else '',
+                "started_at": get_datetime_from_db(self.account_overdraft.started_at),
+                "ended_at": get_datetime_from_db(self.account_overdraft.ended_at) if self.account_overdraft.ended_at else '',
             })
 
         
@@ -79,7 +81,7 @@ class AccountOverdraftEditView(TemplateNewEdit):
 
     
     def get_validated_values(self, input_values: dict) -> dict:
-        if not input_values["limit"] or float(input_values["limit"]) <= 0:
+        if not input_values["limit"] or input_values["limit"] <= 0:
             raise ValueError("Limit must be greater than 0")
         
         if not input_values["started_at"]:
@@ -126,26 +128,14 @@ class AccountOverdraftListView(TemplateListView):
         """Get the account overdraft from the database."""
 
         with get_session() as session:
-            account_overdrafts = session.query(AccountOverdraft).all()
-            data = [{
-                    "id": account_overdraft.id,
-                    "account": account_overdraft.account.alias,
-                    "limit": f"$ {account_overdraft.limit:.2f}",
-                    "started_at": get_datetime_from_db(str(account_overdraft.started_at)),
-                    "ended_at": get_datetime_from_db(str(account_overdraft.ended_at)) if account_overdraft.ended_at else '',
-                } for account_overdraft in account_overdrafts]
-
-            def _func_sort(x):
-                return (x['account'].lower(), x['started_at'])
-
-            return sorted(data, key=_func_sort)
+            return get_account_overdraft_rows(session)
 
 
     def add_columns(self, table: CustomTable):
         """Set the columns of the table"""
         table.add_column(column='id', dtype=int, anchor=tk.E, width=TABLE_COLUMN_WIDTH['ID'])
         table.add_column(column='account', dtype=str, anchor=tk.W, width=TABLE_COLUMN_WIDTH['ACCOUNT_NAME'], is_sorted_asc=True)
-        table.add_column(column='limit', dtype=str, anchor=tk.E, width=TABLE_COLUMN_WIDTH['MONEY'])
+        table.add_column(column='limit', dtype=Decimal, anchor=tk.E, width=TABLE_COLUMN_WIDTH['MONEY'], formatter=format_money)
         table.add_column(column='started_at', dtype=str, anchor=tk.CENTER, width=TABLE_COLUMN_WIDTH['TIMESTAMP'])
         table.add_column(column='ended_at', dtype=str, anchor=tk.CENTER, width=TABLE_COLUMN_WIDTH['TIMESTAMP'])
 
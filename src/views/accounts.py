@@ -38,16 +38,20 @@ class AccountNewView(TemplateNewEdit):
             key="account_type",
             bindings={
                 "<<ComboboxSelected>>": self.update_normal_side,
+                "<<ComboboxLoaded>>": self.update_normal_side,
             }
         )
         self.update_normal_side()
 
 
     def update_normal_side(self, event=None):
+        if (account_type_id := self.input_frame.get_values()["account_type"]["key"]) is None:
+            # The account types are still loading
+            return
         with get_session() as session:
             account_type = session\
                 .query(AccountType)\
-                    .filter(AccountType.id == self.input_frame.get_values()["account_type"]["key"])\
+                    .filter(AccountType.id == account_type_id)\
                         .first()
             self.input_frame.set_values({
                 "normal_side": account_type.normal_side,
@@ -128,6 +132,7 @@ class AccountEditView(TemplateNewEdit):
                 key="account_type",
                 bindings={
                     "<<ComboboxSelected>>": self.update_normal_side,
+                    "<<ComboboxLoaded>>": self.update_normal_side,
                 }
             )
             self.update_normal_side()
@@ -137,10 +142,13 @@ class AccountEditView(TemplateNewEdit):
             self.destroy()
         
     def update_normal_side(self, event=None):
+        if (account_type_id := self.input_frame.get_values()["account_type"]["key"]) is None:
+            # The account types are still loading
+            return
         with get_session() as session:
             account_type = session\
                 .query(AccountType)\
-                    .filter(AccountType.id == self.input_frame.get_values()["account_type"]["key"])\
+                    .filter(AccountType.id == account_type_id)\
                         .first()
             self.input_frame.set_values({
                 "normal_side": account_type.normal_side,
@@ -0,0 +1,85 @@
+from utils import center_window, format_money, get_datetime_to_db
+from database.sqlite_handler import get_session
+from database.financial_statements import get_balance_sheet_rows
+from decimal import Decimal
+from tkinter import messagebox
+from custom.custom_table import CustomTable
+from custom.templates_view import CustomTopLevel, FrameInput
+from views.config_views import TABLE_COLUMN_WIDTH
+import tkinter as tk
+
+
+class FinancialStatementTable(CustomTable):
+    """
+        Shows the rows of a financial statement as a tree (see `get_balance_sheet_rows` and `get_income_statement_rows`):
+        each row has a `key`, the `parent_key` of the row it goes under, and a `name`.
+    """
+
+    def __init__(self, parent: tk.Toplevel | tk.Tk, func_get_data: callable):
+        super().__init__(
+            parent,
+            selectmode="browse",
+            func_get_data=func_get_data,
+            key_column=None,
+            tree_root_col_width=300,
+            tree_expanded=True,
+        )
+
+    def _insert_data(self, data: list[dict]) -> None:
+        """ Overrides the `super` method to insert each row under its parent (the rows come in the order of the tree). """
+
+        columns = self.get_columns()
+        items = {None: ''}
+        for row in data:
+            items[row['key']] = self._insert_item(
+                items[row['parent_key']], 'end', text=row['name'], values=tuple(row[column] for column in columns),
+            )
+
+
+class BalanceSheetView(CustomTopLevel):
+    """ The assets, liabilities and equity as of the end of a date (see `get_balance_sheet_rows`). """
+
+    def __init__(self, parent: tk.Toplevel | tk.Tk):
+        super().__init__(
+            parent,
+            title="Balance Sheet",
+            resizable=True,
+            top_buttons_config={
+                'Refresh': self.on_refresh,
+            },
+            footer_buttons_config={
+                'Close': self.destroy,
+            },
+        )
+
+        self.set_body()
+        center_window(window=self, context_window=self.parent)
+        self.bind("<<EventUpdateTable>>", self.on_refresh)
+        self.bind('<Return>', self.on_refresh)
+
+    def get_data(self) -> list[dict]:
+        """ Runs in the database worker, it must not use Tk (the date is read by `on_refresh`). """
+        with get_session() as session:
+            rows = get_balance_sheet_rows(session, get_datetime_to_db(f"{self._as_of} 23:59:59"))
+            # Keep the balance checkpoints created by the query
+            session.commit()
+            return rows
+
+    def on_refresh(self, event=None) -> None:
+        as_of = self.input_frame.get_values()['as_of']
+        if not as_of:
+            messagebox.showerror("Error", "The `As of` date is required")
+            return None
+        self._as_of = as_of
+        self.table.refresh()
+
+    def set_body(self) -> None:
+        self.input_frame = FrameInput(self.body_frame, padding=10)
+        self.input_frame.add_input_datetime(key="as_of", text="As of", format="YYYY-MM-DD", default_now=True)
+        self.input_frame.grid(column=0, row=0, sticky="we")
+
+        self.table = FinancialStatementTable(parent=self.body_frame, func_get_data=self.get_data)
+        self.table.add_column(column='type', text='Type', dtype=str, anchor=tk.CENTER, width=50)
+        self.table.add_column(column='balance', dtype=Decimal, anchor=tk.E, width=TABLE_COLUMN_WIDTH['MONEY'], formatter=format_money)
+        self.on_refresh()
+        self.table.grid(column=0, row=1, sticky="nswe")
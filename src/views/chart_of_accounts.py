@@ -1,7 +1,9 @@
-from utils import center_window, get_datetime_from_db
+from utils import center_window, format_money
 from database.sqlite_handler import get_session
 from database.models import AccountGroup, Account
-from sqlalchemy import func
+from database.view_queries import get_chart_of_accounts_rows
+from collections import defaultdict
+from decimal import Decimal
 from tkinter import messagebox
 from custom.custom_table import CustomTable
 from views.config_views import TABLE_COLUMN_WIDTH
@@ -22,55 +24,48 @@ class ChartOfAccountTable(CustomTable):
         super().__init__(
             parent,
             selectmode=selectmode,
+            key_column=None,
             tree_root_col_width=200,
             tree_expanded=True
         )
 
-    def _insert_data(self):
+    def _get_data(self) -> tuple[list[dict], list[dict]]:
+        """ Overrides the `super` method to extract the groups and the accounts (see `get_chart_of_accounts_rows`). """
+
+        with get_session() as session:
+            return get_chart_of_accounts_rows(session)
+
+    def _insert_data(self, data: tuple[list[dict], list[dict]]):
         """
             Overrides the `super` method in order to process the data before each insert:
 
-            1. Extract the data from the database and then create two dataframes with the data.
-            2. Create a template for the row data, which have the same columns as the table (in the same order).
-            3. Fill the template with the data from the database using recursion:
-                3.1 First it loops through the root account groups, and inserts the accounts associated with the group.
-                3.2 Then it loops through the sub groups and accounts, while inserting first the accounts and then the sub groups.
+            1. Index the groups and the accounts extracted by `_get_data` by their parent group.
+            2. Fill the table with the data using recursion:
+                2.1 First it loops through the root account groups, and inserts the accounts associated with the group.
+                2.2 Then it loops through the sub groups and accounts, while inserting first the accounts and then the sub groups.
         """
 
-        with get_session() as session:
-            def recursive_children(parent_iid: str, parent_group: AccountGroup):
-                
-                for account in sorted(parent_group.accounts, key=lambda c: c.name.lower()):
-                    if isinstance(account, Account):
-                        iid = self._table.insert(parent_iid, 'end', text=account.name, values=tuple({
-                            'type': 'A',
-                            'id': account.id,
-                            'description': account.description,
-                            'account_number': account.account_number,
-                            'currency': account.currency.code,
-                            'opened_at': get_datetime_from_db(account.opened_at),
-                            'closed_at': get_datetime_from_db(account.closed_at) if account.closed_at else '',
-                            'account_type': account.account_type.name,
-                            'normal_side': account.account_type.normal_side,
-                            'overdraft': f"$ {account.overdraft_limit:.2f}" if account.overdraft_limit else '',
-                        }.values()))
-                
-                for group in sorted(parent_group.children, key=lambda c: c.name.lower()):
-                    iid = self._table.insert(parent_iid, 'end', text=group.name, values=tuple({
-                        'type': 'G',
-                        'id': group.id,
-                        'description': group.description,
-                    }.values()))
-                    recursive_children(parent_iid=iid, parent_group=group)
-
-            # Iterate through the root groups
-            for group in session.query(AccountGroup).filter_by(parent_id=None).order_by(func.lower(AccountGroup.name)).all():
-                iid = self._table.insert('', 'end', text=group.name, values=tuple({
-                    'type': 'G',
-                    'id': group.id,
-                    'description': group.description,
-                }.values()))
-                recursive_children(parent_iid=iid, parent_group=group)
+        groups, accounts = data
+        columns = self.get_columns()
+        children_by_parent = defaultdict(list)
+        for group in groups:
+            children_by_parent[group['parent_id']].append(group)
+        accounts_by_group = defaultdict(list)
+        for account in accounts:
+            accounts_by_group[account['account_group_id']].append(account)
+
+        def insert_group(parent_iid: str, group: dict):
+            iid = self._insert_item(parent_iid, 'end', text=group['name'], values=('G', group['id'], group['description']))
+
+            for account in accounts_by_group[group['id']]:
+                self._insert_item(iid, 'end', text=account['name'], values=tuple(account[column] for column in columns))
+
+            for child_group in children_by_parent[group['id']]:
+                insert_group(parent_iid=iid, group=child_group)
+
+        # Iterate through the root groups
+        for group in children_by_parent[None]:
+            insert_group(parent_iid='', group=group)
 
 
 class ChartOfAccountView(CustomTopLevel):
@@ -84,7 +79,8 @@ class ChartOfAccountView(CustomTopLevel):
                 'New Account': lambda : AccountNewView(parent=self),
                 'New Group': lambda : AccountGroupNewView(parent=self),
                 'Edit': self.on_edit_item,
-                'Delete': self.on_delete_item
+                'Delete': self.on_delete_item,
+                'Ledger': self.on_open_ledger,
             },
             footer_buttons_config={
                 'Close': self.destroy,
@@ -98,8 +94,16 @@ class ChartOfAccountView(CustomTopLevel):
         self.bind('<F2>', self.on_edit_item)
         self.bind('<Double-1>', self.on_edit_item)
         self.bind('<Return>', self.on_edit_item)
+        self.bind('<Control-l>', self.on_open_ledger)
         
         
+    def on_open_ledger(self, event=None):
+        """Open the ledger of the first selected account."""
+        from views.account_ledger import AccountLedgerView
+
+        if accounts := [data for data in self.table.get_items_data(selected_only=True) if data['type'] == 'A']:
+            AccountLedgerView(parent=self, account_id=accounts[0]['id'])
+
     def on_edit_item(self, event=None):
         """Open the edit view for the first item in the selected items list."""
         if data := self.table.get_items_data(selected_only=True):
@@ -144,7 +148,8 @@ class ChartOfAccountView(CustomTopLevel):
         self.table.add_column(column='closed_at', dtype=str, anchor=tk.CENTER, width=TABLE_COLUMN_WIDTH['TIMESTAMP'])
         self.table.add_column(column='account_type', dtype=str, anchor=tk.W, width=TABLE_COLUMN_WIDTH['ACCOUNT_TYPE_NAME'])
         self.table.add_column(column='normal_side', dtype=str, anchor=tk.W, width=TABLE_COLUMN_WIDTH['ACCOUNT_TYPE_NORMAL_SIDE'])
-        self.table.add_column(column='overdraft', dtype=str, anchor=tk.E, width=TABLE_COLUMN_WIDTH['MONEY'])
+        self.table.add_column(column='overdraft', dtype=Decimal, anchor=tk.E, width=TABLE_COLUMN_WIDTH['MONEY'], formatter=format_money)
+        self.table.add_column(column='balance', dtype=Decimal, anchor=tk.E, width=TABLE_COLUMN_WIDTH['MONEY'], formatter=format_money)
         self.table.refresh()
         self.table.grid(column=0, row=0, sticky="nswe")
 
@@ -0,0 +1,97 @@
+from utils import center_window
+from database.instrumentation import get_stats, reset_stats
+from config import SLOW_QUERY_LOG, SLOW_QUERY_THRESHOLD_MS
+from custom.custom_table import CustomTable
+from custom.templates_view import CustomTopLevel
+import tkinter as tk
+import tkinter.ttk as ttk
+
+
+def format_ms(value: float) -> str:
+    return f"{value:.1f}"
+
+
+def format_statements_per_call(value: float) -> str:
+    """ The average number of statements of a call, without decimals when it is whole (e.g. `3`, `2.5`). """
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+class DiagnosticsView(CustomTopLevel):
+    """
+        Shows the statements issued by each view or action (see `database.instrumentation`),
+        and the slowest statements of the selected one.
+    """
+
+    def __init__(self, parent: tk.Toplevel | tk.Tk):
+        super().__init__(
+            parent,
+            title="Diagnostics",
+            resizable=True,
+            top_buttons_config={
+                'Refresh': self.on_refresh,
+                'Reset': self.on_reset,
+            },
+            footer_buttons_config={
+                'Close': self.destroy,
+            },
+        )
+
+        self.set_table()
+        self.set_details()
+        center_window(window=self, context_window=self.parent)
+        self.bind('<F5>', self.on_refresh)
+
+    def get_data(self) -> list[dict]:
+        return [
+            {
+                'action': action.name,
+                'calls': action.calls,
+                'statements': action.statements,
+                'per_call': action.statements_per_call,
+                'total_ms': action.total_time * 1000,
+                'slowest_ms': action.slowest[0][0] * 1000 if action.slowest else 0.0,
+            }
+            for action in get_stats()
+        ]
+
+    def on_refresh(self, event=None):
+        self.table.refresh()
+
+    def on_reset(self, event=None):
+        reset_stats()
+        self.on_refresh()
+
+    def on_select(self, event=None):
+        """ Show the slowest statements of the selected action. """
+        self.details.configure(state=tk.NORMAL)
+        self.details.delete('1.0', tk.END)
+        if selected := self.table.get_items_data(selected_only=True):
+            for action in get_stats():
+                if action.name == selected[0]['action']:
+                    for duration, statement in action.slowest:
+                        self.details.insert(tk.END, f"{format_ms(duration * 1000)} ms\n{statement.strip()}\n\n")
+        self.details.configure(state=tk.DISABLED)
+
+    def set_table(self):
+        """Create the table"""
+
+        self.table = CustomTable(parent=self.body_frame, selectmode="browse", func_get_data=self.get_data, key_column='action')
+        self.table.add_column(column='action', text='Action', dtype=str, anchor=tk.W, width=300)
+        self.table.add_column(column='calls', text='Calls', dtype=int, anchor=tk.E, width=70)
+        self.table.add_column(column='statements', text='Statements', dtype=int, anchor=tk.E, width=90, is_sorted_asc=False)
+        self.table.add_column(column='per_call', text='Statements / Call', dtype=float, anchor=tk.E, width=110, formatter=format_statements_per_call)
+        self.table.add_column(column='total_ms', text='Total (ms)', dtype=float, anchor=tk.E, width=90, formatter=format_ms)
+        self.table.add_column(column='slowest_ms', text='Slowest (ms)', dtype=float, anchor=tk.E, width=90, formatter=format_ms)
+        self.table.bind('<<TreeviewSelect>>', self.on_select)
+        self.table.refresh()
+        self.table.grid(column=0, row=0, sticky="nswe")
+
+    def set_details(self):
+        """Create the text box with the slowest statements, and the slow query log settings"""
+
+        self.details = tk.Text(self.body_frame, height=12, wrap=tk.WORD, state=tk.DISABLED)
+        self.details.grid(column=0, row=1, sticky="nswe", pady=(5, 0))
+        ttk.Label(
+            self.body_frame,
+            text=f"Statements slower than {SLOW_QUERY_THRESHOLD_MS:g} ms are logged to {SLOW_QUERY_LOG}",
+        ).grid(column=0, row=2, sticky="w", pady=(5, 0))
@@ -0,0 +1,74 @@
+from utils import center_window, format_money, get_date_key
+from database.sqlite_handler import get_session
+from database.financial_statements import get_income_statement, get_income_statement_months, get_income_statement_rows
+from datetime import date
+from decimal import Decimal
+from tkinter import messagebox
+from custom.templates_view import CustomTopLevel, FrameInput
+from views.balance_sheet import FinancialStatementTable
+from views.config_views import TABLE_COLUMN_WIDTH
+import tkinter as tk
+
+
+class IncomeStatementView(CustomTopLevel):
+    """
+        The revenues and expenses of each account between two dates, one column per month (see `get_income_statement`).
+        The columns depend on the dates, so the table is created again on each refresh.
+    """
+
+    def __init__(self, parent: tk.Toplevel | tk.Tk):
+        super().__init__(
+            parent,
+            title="Income Statement",
+            resizable=True,
+            top_buttons_config={
+                'Refresh': self.on_refresh,
+            },
+            footer_buttons_config={
+                'Close': self.destroy,
+            },
+        )
+        self.table = None
+        self._dates = None  # (start_date, end_date) as `YYYYMMDD`, set by `on_refresh`
+
+        self.set_body()
+        center_window(window=self, context_window=self.parent)
+        self.bind("<<EventUpdateTable>>", self.on_refresh)
+        self.bind('<Return>', self.on_refresh)
+
+    def get_data(self) -> list[dict]:
+        """ Runs in the database worker, it must not use Tk (the dates are read by `on_refresh`). """
+        with get_session() as session:
+            return get_income_statement_rows(get_income_statement(session, *self._dates))
+
+    def on_refresh(self, event=None) -> None:
+        values = self.input_frame.get_values()
+        if not values['from_date'] or not values['to_date']:
+            messagebox.showerror("Error", "The dates are required")
+            return None
+        start_date, end_date = get_date_key(values['from_date']), get_date_key(values['to_date'])
+        if start_date > end_date:
+            messagebox.showerror("Error", "The `From` date must be before the `To` date")
+            return None
+
+        self._dates = (start_date, end_date)
+        self.set_table(get_income_statement_months(start_date, end_date))
+
+    def set_body(self) -> None:
+        today = date.today()
+        self.input_frame = FrameInput(self.body_frame, padding=10)
+        self.input_frame.add_input_datetime(key="from_date", text="From", format="YYYY-MM-DD")
+        self.input_frame.add_input_datetime(key="to_date", text="To", format="YYYY-MM-DD")
+        self.input_frame.set_values({'from_date': f"{today.year}-01-01", 'to_date': today.isoformat()})
+        self.input_frame.grid(column=0, row=0, sticky="we")
+        self.on_refresh()
+
+    def set_table(self, months: list[str]) -> None:
+        if self.table is not None:
+            self.table.destroy()
+        self.table = FinancialStatementTable(parent=self.body_frame, func_get_data=self.get_data)
+        self.table.add_column(column='type', text='Type', dtype=str, anchor=tk.CENTER, width=50)
+        for column in [*months, 'Total']:
+            self.table.add_column(column=column, text=column, dtype=Decimal, anchor=tk.E, width=TABLE_COLUMN_WIDTH['MONEY'], formatter=format_money)
+        self.table.refresh()
+        self.table.grid(column=0, row=1, sticky="nswe")
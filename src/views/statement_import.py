@@ -0,0 +1,159 @@
+from utils import center_window
+from database.sqlite_handler import get_engine
+from database.executor import JobCancelled, check_cancelled, run_job
+from database.common_queries import get_accounts_values
+from database.statement_import import STATEMENT_FORMATS, ImportResult, MappingRules, import_statement_file
+from tkinter import filedialog, messagebox
+from custom.templates_view import CustomTopLevel, FrameInput
+from views.config_views import VIEW_WIDGET_WIDTH
+import tkinter as tk
+import tkinter.ttk as ttk
+
+
+PROGRESS_INTERVAL_MS = 100
+STATEMENT_FILE_TYPES = [("Statements", "*.csv *.txt *.tsv"), ("All files", "*.*")]
+
+
+def parse_rules(text: str, account_ids: dict[str, int]) -> list[tuple[str, int]]:
+    """
+        Parse the mapping rules, one per line as `pattern => account alias` (the empty lines are ignored).
+        It raises a `ValueError` if a line has no `=>`, or its account does not exist.
+    """
+    rules = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        pattern, separator, alias = line.partition('=>')
+        if not separator or not pattern.strip():
+            raise ValueError(f"Rule {line_number}: it must be `pattern => account alias`")
+        if alias.strip() not in account_ids:
+            raise ValueError(f"Rule {line_number}: the account '{alias.strip()}' does not exist")
+        rules.append((pattern.strip(), account_ids[alias.strip()]))
+    return rules
+
+
+class StatementImportView(CustomTopLevel):
+    """
+        Import a statement export (see `database.statement_import`) in the background, showing the progress.
+            - statement_format: A key of `STATEMENT_FORMATS`.
+    """
+
+    def __init__(self, parent: tk.Toplevel | tk.Tk, statement_format: str):
+        self.statement_format = STATEMENT_FORMATS[statement_format]
+        super().__init__(
+            parent,
+            title=f"Import {self.statement_format.name}",
+            footer_buttons_config={
+                'Import': self.on_accept,
+                'Close': self.destroy,
+            },
+        )
+        self._job = None  # The cancel event of the running import (see `run_job`)
+        self._progress = (0, 0.0)  # (lines read, fraction of the file), set by the jobs worker
+
+        self.set_body()
+        center_window(window=self, context_window=self.parent)
+        self.protocol("WM_DELETE_WINDOW", self.destroy)
+
+    def destroy(self, event=None) -> None:
+        """ While importing, ask to cancel the import instead (the window is closed once it is rolled back). """
+        if self._job is None:
+            return super().destroy()
+        if messagebox.askyesno(self.title(), "Cancel the import? Nothing will be imported.", parent=self):
+            self._job.set()
+            self.progress_text.set("Cancelling…")
+
+    def set_body(self) -> None:
+        self.input_frame = FrameInput(self.body_frame, padding=10)
+        self.input_frame.add_input_entry(key="file", width=VIEW_WIDGET_WIDTH['ACCOUNT_ALIAS'])
+        self.input_frame.add_input_combobox(
+            key="statement_account", func_get_values=get_accounts_values, width=VIEW_WIDGET_WIDTH['ACCOUNT_ALIAS'],
+        )
+        self.input_frame.add_input_combobox(
+            key="default_account", text="Default Counterpart", func_get_values=get_accounts_values,
+            width=VIEW_WIDGET_WIDTH['ACCOUNT_ALIAS'],
+        )
+        self.input_frame.grid(column=0, row=0, sticky="we")
+        ttk.Button(self.input_frame, text="Browse…", command=self.on_browse).grid(column=2, row=0, padx=5)
+
+        ttk.Label(self.body_frame, text="Rules (one per line: description pattern => account alias)") \
+            .grid(column=0, row=1, sticky="w", padx=10)
+        self.rules_text = tk.Text(self.body_frame, height=6, width=80)
+        self.rules_text.grid(column=0, row=2, sticky="we", padx=10)
+
+        self.progress_bar = ttk.Progressbar(self.body_frame, maximum=1.0, mode="determinate")
+        self.progress_bar.grid(column=0, row=3, sticky="we", padx=10, pady=(10, 0))
+        self.progress_text = tk.StringVar()
+        ttk.Label(self.body_frame, textvariable=self.progress_text).grid(column=0, row=4, sticky="w", padx=10)
+
+    def on_browse(self) -> None:
+        if path := filedialog.askopenfilename(parent=self, filetypes=STATEMENT_FILE_TYPES):
+            self.input_frame.set_values({'file': path})
+
+    def get_rules(self) -> MappingRules:
+        values = self.input_frame.get_values()
+        if not values['file']:
+            raise ValueError("Select the statement file")
+        if values['statement_account']['key'] is None or values['default_account']['key'] is None:
+            raise ValueError("Select the statement account and the default counterpart")
+
+        account_ids = {alias: id for id, alias in get_accounts_values().items()}
+        return MappingRules(
+            statement_account_id=values['statement_account']['key'],
+            default_account_id=values['default_account']['key'],
+            rules=parse_rules(self.rules_text.get('1.0', tk.END), account_ids),
+        )
+
+    def _set_progress(self, read: int, fraction: float) -> None:
+        """ Called by the jobs worker, it must not use Tk (see `_show_progress`). """
+        self._progress = (read, fraction)
+
+    def _show_progress(self) -> None:
+        read, fraction = self._progress
+        self.progress_bar['value'] = fraction
+        self.progress_text.set(f"{read} lines read")
+        if self._job is not None:
+            self.after(PROGRESS_INTERVAL_MS, self._show_progress)
+
+    def on_accept(self, event=None) -> None:
+        if self._job is not None:
+            return None
+        if self.input_frame.is_loading():
+            messagebox.showinfo("Loading", "The values are still loading, please try again.")
+            return None
+        try:
+            rules = self.get_rules()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return None
+
+        path = self.input_frame.get_values()['file']
+        statement_format = self.statement_format
+
+        def import_file(cancel) -> ImportResult:
+            def on_progress(read: int, fraction: float) -> None:
+                # Raising here rolls back the import
+                check_cancelled(cancel)
+                self._set_progress(read, fraction)
+
+            return import_statement_file(get_engine(), path, statement_format, rules, on_progress=on_progress)
+
+        def on_done(result: ImportResult) -> None:
+            self._job = None
+            self._show_progress()
+            messagebox.showinfo(
+                self.title(),
+                f"{result.imported} transactions were imported, {result.duplicates} lines were already imported",
+            )
+            self.destroy()
+
+        def on_error(error: Exception) -> None:
+            self._job = None
+            if isinstance(error, JobCancelled):
+                self.destroy()
+            else:
+                messagebox.showerror("Error", f"Nothing was imported: {error}")
+
+        self._progress = (0, 0.0)
+        self._job = run_job(self, import_file, on_done=on_done, on_error=on_error)
+        self._show_progress()
@@ -1,18 +1,61 @@
 from abc import abstractmethod
+from decimal import Decimal
 from utils import center_window, get_datetime_from_db
 from database.sqlite_handler import get_session
-from database.models import Account, Transaction
+from database.executor import run_in_background
+from database.models import Transaction
+from database.view_queries import get_transaction_page, get_transaction_rows
+from database.common_queries import AccountEntry, get_account_index
 from tkinter import messagebox
 from custom.custom_table import CustomTable
 from custom.templates_view import TemplateListView, CustomTopLevel
 from custom.custom_widgets import TimestampEntry
-from custom.custom_variables import PendulumVar
+from custom.custom_variables import PendulumVar, DecimalVar
 from views.config_views import VIEW_WIDGET_WIDTH, TABLE_COLUMN_WIDTH
-from decimal import Decimal
 import tkinter as tk
 import tkinter.ttk as ttk
 
 
+def validate_transaction_values(values: dict, account_index: dict[str, AccountEntry]) -> dict:
+    """
+        Validate the values of a transaction entered by the user (see `TransactionChangeTemplate.variables_input`),
+        and return the values of the `Transaction`, with the account ids instead of the aliases.
+        It raises a `ValueError` with the first rule that is not met.
+    """
+    if values['installment_number'] > values['installment_total']:
+        raise ValueError("Installment number must be less or equal than installment total")
+
+    # Accounts
+    if values['debit_account_alias'] == values['credit_account_alias']:
+        raise ValueError("Debit and credit accounts must be different")
+    if values['debit_account_alias'] not in account_index:
+        raise ValueError(f"Debit account alias '{values['debit_account_alias']}' not found in account map")
+    if values['credit_account_alias'] not in account_index:
+        raise ValueError(f"Credit account alias '{values['credit_account_alias']}' not found in account map")
+
+    # Amounts
+    if values['debit_amount'] is None or values['credit_amount'] is None:
+        raise ValueError("Debit and credit amounts can not be empty")
+    if values['debit_amount'] != values['credit_amount']:
+        raise ValueError("Debit and credit amounts must be equal")
+    if values['debit_amount'] <= 0:
+        raise ValueError("Debit and credit amounts must be greater than zero")
+
+    return {
+        "timestamp": values['timestamp'],
+        "installment_number": values['installment_number'],
+        "installment_total": values['installment_total'],
+        "description": values['description'],
+        "debit_reference": values['debit_reference'],
+        "debit_account_id": account_index[values['debit_account_alias']].id,
+        "debit_amount": values['debit_amount'],
+        "credit_reference": values['credit_reference'],
+        "credit_account_id": account_index[values['credit_account_alias']].id,
+        "credit_amount": values['credit_amount'],
+        "is_reconciled": values['is_reconciled'],
+    }
+
+
 class TransactionChangeTemplate(CustomTopLevel):
     def __init__(self, parent: tk.Toplevel | tk.Tk, title: str):
         
@@ -26,17 +69,43 @@ class TransactionChangeTemplate(CustomTopLevel):
         
         self.create_variables_input()
         self.create_variables_ui()
-        self.load_account_aliases()
+        self.account_index = {}
+        self.account_aliases = []
+        self.account_cboxes = []
         self.set_body()
+        self.load_account_index()
 
 
-    def load_account_aliases(self) -> None:
-        with get_session() as session:
-            accounts = session.query(Account).all()
-            self.cbox_account_map = {account.alias: account.id for account in accounts}
-    
-    def get_account_aliases(self) -> list[str]:
-            return sorted(self.cbox_account_map.keys())
+    def load_account_index(self) -> None:
+        """
+            Load the index of the accounts ({alias: AccountEntry}) in the background, once per form.
+            The selection of an account reads its currency and normal side from the index, without querying the database.
+        """
+
+        def on_done(account_index: dict[str, AccountEntry]) -> None:
+            self.account_index = account_index
+            self.account_aliases = sorted(account_index)
+            for cbox in self.account_cboxes:
+                cbox['values'] = self.account_aliases
+            self.update_account_labels("debit_account_alias")
+            self.update_account_labels("credit_account_alias")
+
+        run_in_background(self, get_account_index, on_done=on_done)
+
+    def update_account_labels(self, variable_key: str) -> None:
+        """ Show the currency and the change icon of the selected account (if the index is loaded). """
+        if (account := self.account_index.get(self.variables_input[variable_key].get())) is None:
+            return None
+
+        if 'debit' in variable_key:
+            variable_icon = self.variables_ui['debit_change_icon']
+            variable_code = self.variables_ui['debit_currency_code']
+        else:
+            variable_icon = self.variables_ui['credit_change_icon']
+            variable_code = self.variables_ui['credit_currency_code']
+
+        variable_code.set(account.currency_code)
+        variable_icon.set("▲" if account.normal_side.lower() in variable_key.lower() else "▼")
 
     def create_variables_input(self) -> None:
         self.variables_input = {
@@ -46,10 +115,10 @@ class TransactionChangeTemplate(CustomTopLevel):
             "installment_total": tk.IntVar(value=1),
             "debit_reference": tk.StringVar(),
             "debit_account_alias": tk.StringVar(),
-            "debit_amount": tk.DoubleVar(value=0.0),
+            "debit_amount": DecimalVar(value="0.00"),
             "credit_reference": tk.StringVar(),
             "credit_account_alias": tk.StringVar(),
-            "credit_amount": tk.DoubleVar(value=0.0),
+            "credit_amount": DecimalVar(value="0.00"),
             "is_reconciled": tk.BooleanVar(value=False),
         }
         
@@ -113,6 +182,9 @@ class TransactionChangeTemplate(CustomTopLevel):
                 messagebox.showerror(title="Error", message=f"Could not get {variable_key} amount: {e}")
                 return None
 
+            if amount is None:
+                return None
+
             if variable_key == 'debit_amount':
                 self.variables_input['credit_amount'].set(amount)
             else:
@@ -142,33 +214,15 @@ class TransactionChangeTemplate(CustomTopLevel):
             return amount_frame
 
         def get_account_cbox(variable_key: str) -> ttk.Combobox:
-            def _update_labels(event, variable_key: str) -> None:
-                with get_session() as session:
-                    account_alias = self.variables_input[variable_key].get()
-                    account_id = self.cbox_account_map[account_alias]
-                    account = session.query(Account).filter_by(id=account_id).first()
-
-                    code = account.currency.code
-                    change_icon = "▲" if account.account_type.normal_side.lower() in variable_key.lower() else "▼"
-                    
-                if 'debit' in variable_key:
-                    variable_icon = self.variables_ui['debit_change_icon']
-                    variable_code = self.variables_ui['debit_currency_code']
-                else:
-                    variable_icon = self.variables_ui['credit_change_icon']
-                    variable_code = self.variables_ui['credit_currency_code']
-
-                variable_code.set(code)
-                variable_icon.set(change_icon)
-
             cbox = ttk.Combobox(
                 double_entry_frame,
                 textvariable=self.variables_input[variable_key],
                 width=VIEW_WIDGET_WIDTH['ACCOUNT_ALIAS'],
-                values=self.get_account_aliases(),
+                values=self.account_aliases,
                 state="readonly"
             )
-            cbox.bind("<<ComboboxSelected>>", lambda event: _update_labels(event, variable_key))
+            cbox.bind("<<ComboboxSelected>>", lambda event: self.update_account_labels(variable_key))
+            self.account_cboxes.append(cbox)
 
             return cbox
 
@@ -217,12 +271,6 @@ class TransactionChangeTemplate(CustomTopLevel):
             messagebox.showerror(title="Error", message=f"Could not get Installment Total: {e}")
             return None
 
-        try:
-            assert installment_number <= installment_total, "Installment number must be less or equal than installment total"
-        except Exception as e:
-            messagebox.showerror(title="Error", message=e)
-            return None
-
         # Timestamp
 
         try:
@@ -230,30 +278,6 @@ class TransactionChangeTemplate(CustomTopLevel):
         except Exception as e:
             messagebox.showerror(title="Error", message=f"Could not parse the timestamp: {e}")
             return None
-        
-        # Accounts
-        
-        try:
-            debit_account_alias = self.variables_input['debit_account_alias'].get()
-            credit_account_alias = self.variables_input['credit_account_alias'].get()
-            assert debit_account_alias != credit_account_alias, "Debit and credit accounts must be different"
-        except Exception as e:
-            messagebox.showerror(title="Error", message=e)
-            return None
-        
-        try:
-            assert debit_account_alias in self.cbox_account_map, f"Debit account alias '{debit_account_alias}' not found in account map"
-            debit_account_id = self.cbox_account_map[debit_account_alias]
-        except Exception as e:
-            messagebox.showerror(title="Error", message=e)
-            return None
-
-        try:
-            assert credit_account_alias in self.cbox_account_map, f"Credit account alias '{credit_account_alias}' not found in account map"
-            credit_account_id = self.cbox_account_map[credit_account_alias]
-        except Exception as e:
-            messagebox.showerror(title="Error", message=e)
-            return None
 
         # Amounts
         
@@ -270,25 +294,25 @@ class TransactionChangeTemplate(CustomTopLevel):
             return None
 
         try:
-            assert debit_amount == credit_amount, "Debit and credit amounts must be equal"
-            assert debit_amount > 0 and credit_amount > 0, "Debit and credit amounts must be greater than zero"
-        except Exception as e:
+            return validate_transaction_values(
+                {
+                    "timestamp": timestamp,
+                    "installment_number": installment_number,
+                    "installment_total": installment_total,
+                    "description": self.variables_input["description"].get(),
+                    "debit_reference": self.variables_input["debit_reference"].get(),
+                    "debit_account_alias": self.variables_input['debit_account_alias'].get(),
+                    "debit_amount": debit_amount,
+                    "credit_reference": self.variables_input["credit_reference"].get(),
+                    "credit_account_alias": self.variables_input['credit_account_alias'].get(),
+                    "credit_amount": credit_amount,
+                    "is_reconciled": self.variables_input["is_reconciled"].get(),
+                },
+                account_index=self.account_index,
+            )
+        except ValueError as e:
             messagebox.showerror(title="Error", message=e)
             return None
-        
-        return {
-                "timestamp": timestamp,
-                "installment_number": installment_number,
-                "installment_total": installment_total,
-                "description": self.variables_input["description"].get(),
-                "debit_reference": self.variables_input["debit_reference"].get(),
-                "debit_account_id": debit_account_id,
-                "debit_amount": debit_amount,
-                "credit_reference": self.variables_input["credit_reference"].get(),
-                "credit_account_id": credit_account_id,
-                "credit_amount": credit_amount,
-                "is_reconciled": self.variables_input["is_reconciled"].get(),
-            }
 
 
     @abstractmethod
@@ -305,7 +329,7 @@ class TransactionNewView(TransactionChangeTemplate):
         if input_values:=self._get_validated_input_values():
             try:
                 input_values.update({
-                    "timestamp": input_values['timestamp'].in_timezone('UTC').to_datetime_string(),
+                    "timestamp": input_values['timestamp'].int_timestamp,
                 })
             
                 with get_session() as session:
@@ -321,40 +345,54 @@ class TransactionNewView(TransactionChangeTemplate):
 class TransactionEditView(TransactionChangeTemplate):
     def __init__(self, parent: tk.Toplevel | tk.Tk, transaction_id: int):
         self.transaction_id = transaction_id
+        self.transaction = None
         super().__init__(parent, title='Edit Transaction')
         self.load_data(transaction_id)
         center_window(window=self, context_window=parent)
         
         
     def load_data(self, transaction_id: int) -> None:
-        
-        with get_session() as session:
-            self.transaction = session.query(Transaction).filter(Transaction.id == transaction_id).first()
-
-            self.variables_input['timestamp'].set(get_datetime_from_db(self.transaction.timestamp))
-            self.variables_input['description'].set(self.transaction.description)
-            self.variables_input['installment_number'].set(self.transaction.installment_number)
-            self.variables_input['installment_total'].set(self.transaction.installment_total)
-            self.variables_input['debit_reference'].set(self.transaction.debit_reference)
-            self.variables_input['debit_account_alias'].set(self.transaction.debit_account.alias)
-            self.variables_input['debit_amount'].set(self.transaction.debit_amount.quantize(Decimal('0.01')))
-            self.variables_input['credit_reference'].set(self.transaction.credit_reference)
-            self.variables_input['credit_account_alias'].set(self.transaction.credit_account.alias)
-            self.variables_input['credit_amount'].set(self.transaction.credit_amount.quantize(Decimal('0.01')))
-            self.variables_input['is_reconciled'].set(self.transaction.is_reconciled)
-
-            self.variables_ui['debit_change_icon'].set("▲" if self.transaction.debit_account.account_type.normal_side == 'DEBIT' else "▼")
-            self.variables_ui['debit_currency_code'].set(self.transaction.debit_account.currency.code)
-            
-            self.variables_ui['credit_change_icon'].set("▲" if self.transaction.credit_account.account_type.normal_side == 'CREDIT' else "▼")
-            self.variables_ui['credit_currency_code'].set(self.transaction.credit_account.currency.code)
+        """ Load the transaction in the background, and then fill the inputs with its values. """
+
+        def get_transaction() -> tuple[Transaction, dict]:
+            with get_session() as session:
+                transaction = session.query(Transaction).filter(Transaction.id == transaction_id).first()
+
+                values_input = {
+                    'timestamp': get_datetime_from_db(transaction.timestamp),
+                    'description': transaction.description,
+                    'installment_number': transaction.installment_number,
+                    'installment_total': transaction.installment_total,
+                    'debit_reference': transaction.debit_reference,
+                    'debit_account_alias': transaction.debit_account.alias,
+                    'debit_amount': transaction.debit_amount,
+                    'credit_reference': transaction.credit_reference,
+                    'credit_account_alias': transaction.credit_account.alias,
+                    'credit_amount': transaction.credit_amount,
+                    'is_reconciled': transaction.is_reconciled,
+                }
+                return transaction, values_input
+
+        def on_done(result: tuple[Transaction, dict]) -> None:
+            self.transaction, values_input = result
+            for key, value in values_input.items():
+                self.variables_input[key].set(value)
+            # The labels are set when the account index is loaded, if it is still loading
+            self.update_account_labels("debit_account_alias")
+            self.update_account_labels("credit_account_alias")
+
+        run_in_background(self, get_transaction, on_done=on_done)
 
 
     def on_accept(self, event=None) -> None:
+        if self.transaction is None:
+            messagebox.showinfo(title="Loading", message="The transaction is still loading, please try again.")
+            return None
+
         if input_values:=self._get_validated_input_values():
             try:
                 input_values.update({
-                    "timestamp": input_values['timestamp'].in_timezone('UTC').to_datetime_string(),
+                    "timestamp": input_values['timestamp'].int_timestamp,
                 })
             
                 with get_session() as session:
@@ -377,36 +415,36 @@ class TransactionListView(TemplateListView):
     
     def __init__(self, parent: tk.Toplevel | tk.Tk):
         super().__init__(parent, title="Transactions")
+        self.bind('<Control-b>', self._on_batch_entry)
+
+    def get_top_buttons_config(self) -> dict:
+        return {**super().get_top_buttons_config(), 'Batch Entry': self._on_batch_entry}
+
+    def _on_batch_entry(self, event=None):
+        from views.transaction_batch import TransactionBatchView
+
+        TransactionBatchView(self)
         
     def get_data(self):
         
         with get_session() as session:
-            transactions = session.query(Transaction).order_by(Transaction.timestamp.desc()).all()
-            return [
-                {
-                    'id': transaction.id,
-                    'timestamp': get_datetime_from_db(transaction.timestamp),
-                    'description': transaction.description,
-                    'cuotas': f"{transaction.installment_number:02d}/{transaction.installment_total:02d}",
-                    'debit_account': transaction.debit_account.alias,
-                    'debit_currency': transaction.debit_account.currency.code,
-                    'debit_amount': transaction.debit_amount.quantize(Decimal('0.01')),
-                    'credit_account': transaction.credit_account.alias,
-                    'credit_currency': transaction.credit_account.currency.code,
-                    'credit_amount': transaction.credit_amount.quantize(Decimal('0.01')),
-                }
-                for transaction in transactions
-            ]
+            return get_transaction_rows(session)
+
+    def get_page(self, sort_column: str | None, descending: bool, after: tuple, before: tuple, limit: int) -> list[dict]:
+        with get_session() as session:
+            return get_transaction_page(
+                session, sort_column=sort_column or 'timestamp', descending=descending, after=after, before=before, limit=limit,
+            )
         
     def add_columns(self, table: CustomTable):
         def add_account_columns(side: str):
             table.add_column(column=f"{side}_account", dtype=str, anchor=tk.W, width=TABLE_COLUMN_WIDTH['ACCOUNT_ALIAS'])
             table.add_column(column=f"{side}_currency", text='Code', dtype=str, anchor=tk.CENTER, width=TABLE_COLUMN_WIDTH['CURRENCY_CODE'])
-            table.add_column( column=f"{side}_amount", text='Amount', dtype=str, anchor=tk.CENTER, width=TABLE_COLUMN_WIDTH['MONEY'])
+            table.add_column( column=f"{side}_amount", text='Amount', dtype=Decimal, anchor=tk.CENTER, width=TABLE_COLUMN_WIDTH['MONEY'])
 
         """Set the columns of the table"""
         table.add_column(column='id', dtype=int, anchor=tk.E, width=TABLE_COLUMN_WIDTH['ID'])
-        table.add_column(column='timestamp', dtype=str, anchor=tk.W, width=TABLE_COLUMN_WIDTH['TIMESTAMP'])
+        table.add_column(column='timestamp', dtype=str, anchor=tk.W, width=TABLE_COLUMN_WIDTH['TIMESTAMP'], is_sorted_asc=False)
         table.add_column(column='description', dtype=str, anchor=tk.W, width=TABLE_COLUMN_WIDTH['DESCRIPTION'])
         table.add_column(column='cuotas', dtype=str, anchor=tk.CENTER, width=50)
         add_account_columns(side='debit')
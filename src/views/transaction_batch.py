@@ -0,0 +1,255 @@
+from decimal import Decimal, InvalidOperation
+from utils import center_window
+from database.sqlite_handler import get_session
+from database.executor import run_in_background
+from database.instrumentation import track
+from database.models import Transaction
+from database.common_queries import AccountEntry, get_account_index
+from sqlalchemy import insert
+from tkinter import messagebox
+from custom.templates_view import CustomTopLevel
+from views.transaction import validate_transaction_values
+from views.config_views import VIEW_WIDGET_WIDTH
+from config import LOCAL_TIME_ZONE
+import pendulum
+import tkinter as tk
+import tkinter.ttk as ttk
+
+
+BATCH_COLUMNS = {
+    'timestamp': 'Timestamp',
+    'description': 'Description',
+    'debit_account_alias': 'Debit Account',
+    'credit_account_alias': 'Credit Account',
+    'amount': 'Amount',
+    'reference': 'Reference',
+}
+INITIAL_ROWS = 10
+MAX_ERRORS_SHOWN = 10
+
+
+def is_empty_row(row: dict[str, str]) -> bool:
+    """ A row without description, accounts and amount is ignored (the timestamp is filled by default). """
+    return not any(row[key].strip() for key in BATCH_COLUMNS if key != 'timestamp')
+
+
+def get_batch_row_values(row: dict[str, str], account_index: dict[str, AccountEntry]) -> dict:
+    """
+        Parse and validate a row of the batch grid (the text of each column, see `BATCH_COLUMNS`),
+        with the same rules as the transaction form (see `validate_transaction_values`).
+        It returns the values to be inserted in `Transaction`, or raises a `ValueError`.
+    """
+    try:
+        timestamp = pendulum.parse(row['timestamp'].strip(), tz=LOCAL_TIME_ZONE)
+    except ValueError:
+        raise ValueError(f"Could not parse the timestamp '{row['timestamp']}'")
+
+    try:
+        amount = Decimal(row['amount'].strip()).quantize(Decimal('0.01')) if row['amount'].strip() else None
+    except InvalidOperation:
+        raise ValueError(f"Could not parse the amount '{row['amount']}'")
+    if amount is not None and not amount.is_finite():
+        raise ValueError(f"Could not parse the amount '{row['amount']}'")
+
+    values = validate_transaction_values(
+        {
+            "timestamp": timestamp,
+            "installment_number": 1,
+            "installment_total": 1,
+            "description": row['description'].strip(),
+            "debit_reference": row['reference'].strip(),
+            "debit_account_alias": row['debit_account_alias'].strip(),
+            "debit_amount": amount,
+            "credit_reference": row['reference'].strip(),
+            "credit_account_alias": row['credit_account_alias'].strip(),
+            "credit_amount": amount,
+            "is_reconciled": False,
+        },
+        account_index=account_index,
+    )
+    values['timestamp'] = values['timestamp'].int_timestamp
+    return values
+
+
+def insert_transactions(rows: list[dict]) -> None:
+    """ Insert the transactions with a single bulk INSERT, in one database transaction. """
+    with get_session() as session:
+        session.execute(insert(Transaction), rows)
+        session.commit()
+
+
+class TransactionBatchView(CustomTopLevel):
+    """
+        A grid to enter many transactions at once, that are saved together in a single commit.
+
+        Key bindings:
+            - Tab / Shift+Tab: Next / previous cell
+            - Enter: The same column of the next row (a new row is added after the last one)
+            - Control+N: Add a row
+            - Control+D: Remove the row of the focused cell
+            - Control+S: Validate and save every row
+    """
+
+    def __init__(self, parent: tk.Toplevel | tk.Tk):
+        super().__init__(
+            parent,
+            title="Batch Journal Entry",
+            resizable=True,
+            top_buttons_config={
+                'Add Row': self.add_row,
+                'Remove Row': self.remove_row,
+            },
+            footer_buttons_config={
+                'Save': self.on_accept,
+                'Cancel': self.destroy,
+            },
+        )
+        self.account_index = {}
+        self.account_aliases = []
+        self.rows = []  # The variables and the widgets of each row, as dictionaries
+        self._grid_row = 0  # The grid row of the last row (the removed rows leave an empty grid row)
+
+        self.set_body()
+        self.load_account_index()
+        center_window(window=self, context_window=self.parent)
+
+        self.bind('<Control-n>', self.add_row)
+        self.bind('<Control-d>', self.remove_row)
+        self.bind('<Control-s>', self.on_accept)
+
+    def load_account_index(self) -> None:
+        def on_done(account_index: dict[str, AccountEntry]) -> None:
+            self.account_index = account_index
+            self.account_aliases = sorted(account_index)
+            for row in self.rows:
+                row['debit_account_alias_widget']['values'] = self.account_aliases
+                row['credit_account_alias_widget']['values'] = self.account_aliases
+
+        run_in_background(self, get_account_index, on_done=on_done)
+
+    def set_body(self) -> None:
+        # The rows are in a frame inside a canvas, to scroll them
+        self.canvas = tk.Canvas(self.body_frame, height=400, highlightthickness=0)
+        scrollbar = ttk.Scrollbar(self.body_frame, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas.grid(column=0, row=0, sticky="nsew")
+        scrollbar.grid(column=1, row=0, sticky="ns")
+
+        self.grid_frame = ttk.Frame(self.canvas)
+        self.canvas.create_window((0, 0), window=self.grid_frame, anchor="nw")
+        self.grid_frame.bind('<Configure>', self._on_grid_configure)
+        for column, text in enumerate([*BATCH_COLUMNS.values(), '']):
+            ttk.Label(self.grid_frame, text=text).grid(column=column, row=0, sticky="w", padx=2)
+
+        for _ in range(INITIAL_ROWS):
+            self.add_row()
+        self.rows[0]['description_widget'].focus_set()
+
+    def _create_cell(self, key: str, variable: tk.StringVar) -> tk.Widget:
+        if key in ('debit_account_alias', 'credit_account_alias'):
+            return ttk.Combobox(
+                self.grid_frame, textvariable=variable, values=self.account_aliases, width=VIEW_WIDGET_WIDTH['ACCOUNT_ALIAS'],
+            )
+        if key == 'amount':
+            return ttk.Entry(self.grid_frame, textvariable=variable, justify="right", width=VIEW_WIDGET_WIDTH['MONEY'])
+        if key == 'timestamp':
+            return ttk.Entry(self.grid_frame, textvariable=variable, width=VIEW_WIDGET_WIDTH['TIMESTAMP'])
+        return ttk.Entry(self.grid_frame, textvariable=variable, width=VIEW_WIDGET_WIDTH['DESCRIPTION'])
+
+    def add_row(self, event=None) -> None:
+        """ Add a row at the end, with the timestamp of the previous row (or now). """
+        timestamp = self.rows[-1]['timestamp'].get() if self.rows else pendulum.now(LOCAL_TIME_ZONE).format('YYYY-MM-DD HH:mm:ss')
+        row = {'status': tk.StringVar()}
+        for key in BATCH_COLUMNS:
+            row[key] = tk.StringVar(value=timestamp if key == 'timestamp' else '')
+            row[f'{key}_widget'] = self._create_cell(key, row[key])
+            row[f'{key}_widget'].bind('<Return>', lambda event, key=key, row=row: self._on_return(row, key))
+        row['status_widget'] = ttk.Label(self.grid_frame, textvariable=row['status'], foreground='red')
+        self.rows.append(row)
+
+        self._grid_row += 1
+        for column, key in enumerate([*BATCH_COLUMNS, 'status']):
+            row[f'{key}_widget'].grid(column=column, row=self._grid_row, sticky="we", padx=2, pady=1)
+            if key != 'status':
+                row[f'{key}_widget'].bind('<FocusIn>', self._see, add=True)
+        if event is not None:
+            row['description_widget'].focus_set()
+
+    def remove_row(self, event=None) -> None:
+        """ Remove the row of the focused cell. """
+        focused = self.focus_get()
+        for row in self.rows:
+            if focused in [row[f'{key}_widget'] for key in BATCH_COLUMNS]:
+                for key in [*BATCH_COLUMNS, 'status']:
+                    row[f'{key}_widget'].destroy()
+                self.rows.remove(row)
+                return None
+
+    def _on_grid_configure(self, event=None) -> None:
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"), width=self.grid_frame.winfo_reqwidth())
+
+    def _see(self, event) -> None:
+        """ Scroll the canvas to show the focused cell. """
+        height = self.grid_frame.winfo_height()
+        if not height:
+            return None
+        top, bottom = self.canvas.yview()
+        widget_top = event.widget.winfo_y() / height
+        widget_bottom = (event.widget.winfo_y() + event.widget.winfo_height()) / height
+        if widget_top < top:
+            self.canvas.yview_moveto(widget_top)
+        elif widget_bottom > bottom:
+            self.canvas.yview_moveto(widget_bottom - (bottom - top))
+
+    def _on_return(self, row: dict, key: str) -> str:
+        """ Move to the same column of the next row, adding a row after the last one. """
+        index = self.rows.index(row)
+        if index == len(self.rows) - 1:
+            self.add_row()
+        self.rows[index + 1][f'{key}_widget'].focus_set()
+        return "break"
+
+    def get_validated_values(self) -> list[dict] | None:
+        """
+            Returns the values of the rows that are not empty, or None if any row is not valid
+            (its error is shown next to it).
+        """
+        values, errors = [], []
+        for index, row in enumerate(self.rows, start=1):
+            row['status'].set('')
+            texts = {key: row[key].get() for key in BATCH_COLUMNS}
+            if is_empty_row(texts):
+                continue
+            try:
+                values.append(get_batch_row_values(texts, self.account_index))
+            except ValueError as e:
+                row['status'].set(str(e))
+                errors.append(f"Row {index}: {e}")
+
+        if errors:
+            more = f"\n… and {len(errors) - MAX_ERRORS_SHOWN} more" if len(errors) > MAX_ERRORS_SHOWN else ''
+            messagebox.showerror("Error", "\n".join(errors[:MAX_ERRORS_SHOWN]) + more)
+            self.focus()
+            return None
+        return values
+
+    def on_accept(self, event=None) -> None:
+        if not self.account_index:
+            messagebox.showinfo("Loading", "The accounts are still loading, please try again.")
+            return None
+        if (values := self.get_validated_values()) is None:
+            return None
+        if not values:
+            messagebox.showinfo("Batch Journal Entry", "There are no transactions to save.")
+            return None
+
+        try:
+            with track(f"{type(self).__name__}.on_accept"):
+                insert_transactions(values)
+        except Exception as e:
+            messagebox.showerror(title="Error", message=f"Could not create the transactions: {e}")
+            return None
+
+        # The list is refreshed once, for the whole batch
+        self.parent.event_generate("<<EventUpdateTable>>")
+        self.destroy()
@@ -0,0 +1,114 @@
+from utils import center_window, get_date_key
+from database.sqlite_handler import get_engine
+from database.executor import JobCancelled, check_cancelled, run_job
+from database.common_queries import get_accounts_values
+from database.transaction_export import EXPORT_FORMATS, export_transactions
+from tkinter import filedialog, messagebox
+from custom.templates_view import CustomTopLevel, FrameInput
+from views.config_views import VIEW_WIDGET_WIDTH
+import tkinter as tk
+import tkinter.ttk as ttk
+
+
+PROGRESS_INTERVAL_MS = 100
+EXPORT_FILE_TYPES = [("CSV", "*.csv"), ("JSON Lines", "*.jsonl")]
+
+
+class TransactionExportView(CustomTopLevel):
+    """ Export the transactions to a CSV or JSON Lines file (see `database.transaction_export`) in the background. """
+
+    def __init__(self, parent: tk.Toplevel | tk.Tk):
+        super().__init__(
+            parent,
+            title="Export Transactions",
+            footer_buttons_config={
+                'Export': self.on_accept,
+                'Close': self.destroy,
+            },
+        )
+        self._job = None  # The cancel event of the running export (see `run_job`)
+        self._progress = (0, 0)  # (exported, total), set by the jobs worker
+
+        self.set_body()
+        center_window(window=self, context_window=self.parent)
+        self.protocol("WM_DELETE_WINDOW", self.destroy)
+
+    def destroy(self, event=None) -> None:
+        """ While exporting, ask to cancel the export instead (the window is closed once the partial file is removed). """
+        if self._job is None:
+            return super().destroy()
+        if messagebox.askyesno(self.title(), "Cancel the export?", parent=self):
+            self._job.set()
+            self.progress_text.set("Cancelling…")
+
+    def set_body(self) -> None:
+        self.input_frame = FrameInput(self.body_frame, padding=10)
+        self.input_frame.add_input_entry(key="file", width=VIEW_WIDGET_WIDTH['ACCOUNT_ALIAS'])
+        self.input_frame.add_input_datetime(key="from_date", text="From", format="YYYY-MM-DD")
+        self.input_frame.add_input_datetime(key="to_date", text="To", format="YYYY-MM-DD")
+        self.input_frame.add_input_combobox(
+            key="account", func_get_values=get_accounts_values, width=VIEW_WIDGET_WIDTH['ACCOUNT_ALIAS'],
+            enable_empty_option=True,
+        )
+        self.input_frame.grid(column=0, row=0, sticky="we")
+        ttk.Button(self.input_frame, text="Browse…", command=self.on_browse).grid(column=2, row=0, padx=5)
+
+        self.progress_bar = ttk.Progressbar(self.body_frame, maximum=1.0, mode="determinate")
+        self.progress_bar.grid(column=0, row=1, sticky="we", padx=10, pady=(10, 0))
+        self.progress_text = tk.StringVar()
+        ttk.Label(self.body_frame, textvariable=self.progress_text).grid(column=0, row=2, sticky="w", padx=10)
+
+    def on_browse(self) -> None:
+        if path := filedialog.asksaveasfilename(parent=self, filetypes=EXPORT_FILE_TYPES, defaultextension=".csv"):
+            self.input_frame.set_values({'file': path})
+
+    def _set_progress(self, exported: int, total: int) -> None:
+        """ Called by the jobs worker, it must not use Tk (see `_show_progress`). """
+        self._progress = (exported, total)
+
+    def _show_progress(self) -> None:
+        exported, total = self._progress
+        self.progress_bar['value'] = exported / total if total else 0
+        self.progress_text.set(f"{exported} of {total} transactions exported")
+        if self._job is not None:
+            self.after(PROGRESS_INTERVAL_MS, self._show_progress)
+
+    def on_accept(self, event=None) -> None:
+        if self._job is not None:
+            return None
+        values = self.input_frame.get_values()
+        if not values['file'].lower().endswith(tuple(EXPORT_FORMATS)):
+            messagebox.showerror("Error", f"The file must be one of: {', '.join(EXPORT_FORMATS)}")
+            return None
+
+        path = values['file']
+        filters = {
+            'start_date': get_date_key(values['from_date']),
+            'end_date': get_date_key(values['to_date']),
+            'account_id': values['account']['key'],
+        }
+
+        def export(cancel) -> int:
+            def on_progress(exported: int, total: int) -> None:
+                # Raising here removes the partial file
+                check_cancelled(cancel)
+                self._set_progress(exported, total)
+
+            return export_transactions(get_engine(), path, **filters, on_progress=on_progress)
+
+        def on_done(exported: int) -> None:
+            self._job = None
+            self._show_progress()
+            messagebox.showinfo(self.title(), f"{exported} transactions were exported to {path}")
+            self.destroy()
+
+        def on_error(error: Exception) -> None:
+            self._job = None
+            if isinstance(error, JobCancelled):
+                self.destroy()
+            else:
+                messagebox.showerror("Error", f"Could not export the transactions: {error}")
+
+        self._progress = (0, 0)
+        self._job = run_job(self, export, on_done=on_done, on_error=on_error)
+        self._show_progress()